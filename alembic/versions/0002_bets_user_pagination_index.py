@@ -0,0 +1,28 @@
+"""bets user pagination index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_bets_user_id_created_at_id",
+        "bets",
+        ["user_id", "created_at", "id"],
+        unique=False,
+        schema="bts",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bets_user_id_created_at_id", table_name="bets", schema="bts")
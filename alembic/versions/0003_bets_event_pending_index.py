@@ -0,0 +1,31 @@
+"""bets event pending index.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_bets_event_id_id_pending",
+        "bets",
+        ["event_id", "id"],
+        unique=False,
+        schema="bts",
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bets_event_id_id_pending", table_name="bets", schema="bts")
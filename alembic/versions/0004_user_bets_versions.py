@@ -0,0 +1,39 @@
+"""user bets versions.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+import sqlmodel.sql.sqltypes
+
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_bets_versions",
+        sa.Column("user_id", sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sqlalchemy_utils.types.arrow.ArrowType(),
+            server_default=sa.text("(clock_timestamp() at time zone 'utc')"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["bts.users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+        schema="bts",
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_bets_versions", schema="bts")
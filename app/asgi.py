@@ -74,7 +74,6 @@ def get_app() -> fastapi.FastAPI:
 
 
 fastapi_app = get_app()
-logs.setup_logging()
 
 
 if __name__ == "__main__":
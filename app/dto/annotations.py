@@ -1,3 +1,4 @@
+import decimal
 import typing
 
 import pydantic
@@ -18,6 +19,19 @@ HttpsUrl = typing.Annotated[pydantic_core.Url, pydantic.UrlConstraints(allowed_s
 
 GreaterEqualZero = typing.Annotated[int, pydantic.conint(ge=0)]
 
+BetAmount = typing.Annotated[
+    decimal.Decimal,
+    pydantic.Field(
+        ge=0,
+        max_digits=10,
+        decimal_places=2,
+        allow_inf_nan=False,
+    ),
+]
+"""
+Amount of a bet, a non-negative number of at most 10 digits, 2 of them decimal places.
+"""
+
 String = typing.Annotated[
     str,
     pydantic.StringConstraints(
@@ -24,6 +24,14 @@ class MakeBet(BaseModel):
     amount: decimal.Decimal
 
 
+@typing.final
+class MakeBets(BaseModel):
+    """Command emitted when we need to create several bets of a user at once."""
+
+    user: models.User
+    bets: list[tuple[uuid.UUID, decimal.Decimal]]
+
+
 @typing.final
 class UpdateEvent(BaseModel):
     """Command emitted when we need to update an event."""
@@ -1,3 +1,3 @@
-from . import base, bets
+from . import auth, base, bets, events
 
-__all__ = ["base", "bets"]
+__all__ = ["auth", "base", "bets", "events"]
@@ -0,0 +1,17 @@
+import typing
+import uuid
+
+import pydantic
+
+from app.dto.entities.base import BaseModel
+
+
+@typing.final
+class TokenClaims(BaseModel):
+    """Claims of the bearer token issued to a user."""
+
+    model_config = pydantic.ConfigDict(extra="ignore", frozen=True)
+
+    sub: uuid.UUID
+    email: pydantic.EmailStr
+    exp: int
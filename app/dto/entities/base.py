@@ -1,17 +1,22 @@
 from __future__ import annotations
 
 import abc
+import base64
+import binascii
 import contextlib
 import operator
 import typing
+import uuid  # noqa: TCH003
 
 import arrow
+import orjson
 import pydantic
 import pydantic.alias_generators
 import pydantic.json_schema
 import pydantic_core
 
 from app.dto.annotations import GreaterEqualZero  # noqa: TCH001
+from app.dto.exceptions import ClientError
 
 T = typing.TypeVar("T")
 C = typing.TypeVar("C")
@@ -145,19 +150,60 @@ class AbstractPage(BaseModel, typing.Generic[T], abc.ABC):
                 cls.model_rebuild(force=True)
 
 
+class Cursor(BaseModel):
+    """Keyset position of the last item of a page.
+
+    Items are ordered by `(created_at, id)` descending,
+    so the next page starts strictly after this pair.
+    """
+
+    model_config = pydantic.ConfigDict(frozen=True)
+
+    created_at: ISOArrowType
+    id: uuid.UUID
+
+    @classmethod
+    def from_entity(cls, entity: typing.Any) -> Cursor:  # noqa: ANN401
+        return cls(created_at=entity.created_at, id=entity.id)
+
+    def encode(self) -> str:
+        """Serialize the cursor into an opaque url-safe token."""
+        raw = orjson.dumps([self.created_at.isoformat(), str(self.id)])
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> Cursor:
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            created_at, id_ = orjson.loads(raw)
+            return cls(created_at=created_at, id=id_)
+        except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError) as exc:
+            raise ClientError("Invalid cursor.") from exc
+
+
 class BasePage(AbstractPage[T], typing.Generic[T], abc.ABC):
     items: typing.Sequence[T]
-    total: GreaterEqualZero
+    total: GreaterEqualZero | None = None
+    next_cursor: str | None = pydantic.Field(None, serialization_alias="nextCursor")
 
 
 class Page(BasePage[T], typing.Generic[T]):
     items: typing.Sequence[T]
-    total: GreaterEqualZero
+    total: GreaterEqualZero | None = None
+    next_cursor: str | None = pydantic.Field(None, serialization_alias="nextCursor")
 
     @classmethod
     def create(
         cls,
         items: typing.Sequence[T],
+        *,
+        total: int | None = None,
+        next_cursor: Cursor | None = None,
         **kwargs: typing.Any,  # noqa: ANN401
     ) -> Page[T]:
-        return cls(items=items, total=len(items), **kwargs)
+        return cls(
+            items=items,
+            total=total,
+            next_cursor=next_cursor.encode() if next_cursor is not None else None,
+            **kwargs,
+        )
@@ -0,0 +1,27 @@
+import typing
+import uuid
+
+from app.dto import enums
+from app.dto.annotations import GreaterEqualZero
+from app.dto.entities.base import BaseModel
+
+
+@typing.final
+class SettlementProgress(BaseModel):
+    """Progress of settling the pending bets of an event.
+
+    `total` is the number of pending bets when the settlement started,
+    `remaining` the number still pending after the last pass.
+    """
+
+    event_id: uuid.UUID
+    status: enums.EventStatus
+    total: GreaterEqualZero
+    settled: GreaterEqualZero = 0
+    chunks: GreaterEqualZero = 0
+    passes: GreaterEqualZero = 0
+    remaining: GreaterEqualZero = 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.remaining == 0
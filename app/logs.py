@@ -1,12 +1,28 @@
+import atexit
+import collections.abc
+import functools
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+import typing
+import weakref
 
 import gunicorn.app.base
 import gunicorn.glogging
+import orjson
 from loguru import logger
 
 from app.settings import settings
 
+if typing.TYPE_CHECKING:
+    import loguru
+
+_STOP: typing.Final = object()
+_JSON_OPTIONS: typing.Final = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+
 
 class InterceptHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:  # noqa: PLR6301
@@ -51,6 +67,165 @@ class GunicornLogger(gunicorn.glogging.Logger):  # type: ignore[misc]
         logger.configure(handlers=[{"sink": sys.stdout, "level": settings.LOGGING_LEVEL}])
 
 
+@typing.final
+class AsyncJSONSink:
+    """Loguru sink writing JSON lines from a background thread.
+
+    The caller only copies the record into a bounded queue. A writer thread encodes
+    queued records with orjson and writes them in batches. When the queue is full,
+    records are dropped and counted instead of blocking the event loop, and the writer
+    reports the count in a `logs_dropped` line.
+
+    The sink survives forks, e.g. of gunicorn workers from a preloaded master: the child
+    starts with an empty queue and no writer, records queued by the parent are left to it,
+    and `start` runs a writer of its own.
+
+    Args:
+    ----
+        stream (BinaryIO): where lines are written, stdout by default.
+        maxsize (int): maximum number of records waiting to be written.
+        batch_size (int): maximum number of records written at once.
+
+    """
+
+    def __init__(
+        self,
+        stream: typing.BinaryIO | None = None,
+        *,
+        maxsize: int = 10_000,
+        batch_size: int = 256,
+    ) -> None:
+        self._stream = stream
+        self._maxsize = maxsize
+        self._queue: queue.Queue[dict[str, typing.Any] | object] = queue.Queue(maxsize=maxsize)
+        self._batch_size = batch_size
+        self._thread: threading.Thread | None = None
+        self._dropped = self._reported = 0
+        # NOTE: a weak reference, sinks are not kept alive by the fork hook
+        ref = weakref.ref(self)
+        os.register_at_fork(after_in_child=functools.partial(_reset_after_fork, ref))
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def __call__(self, message: "loguru.Message") -> None:
+        record = message.record
+        entry = {
+            "time": record["time"],
+            "level": record["level"].name,
+            "message": record["message"],
+            "logger": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            **record["extra"],
+        }
+        if record["exception"] is not None:
+            # NOTE: the sink's format is "{message}", loguru appends the formatted traceback
+            entry["exception"] = str(message)[len(record["message"]) :].strip()
+        self.put(entry)
+
+    def put(self, entry: dict[str, typing.Any]) -> None:
+        """Queue a JSON-encodable mapping to be written as a line, or count it as dropped."""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._dropped += 1
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="log_writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write the queued records and stop the writer."""
+        thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            # The writer is stuck, e.g. on a blocked stream, it is a daemon and dies with the process
+            return
+        thread.join(timeout)
+
+    def _after_fork(self) -> None:
+        # The writer is not copied into the child, and its lock may have been held while forking
+        self._queue = queue.Queue(maxsize=self._maxsize)
+        self._thread = None
+        self._dropped = self._reported = 0
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            stopped = _STOP in batch
+            entries = [entry for entry in batch if entry is not _STOP]
+            try:
+                self._write(entries)
+            except Exception:  # noqa: BLE001
+                # Logging from here would feed the queue being written, count the lines lost instead
+                self._dropped += len(entries)
+            if stopped:
+                return
+
+    def _write(self, batch: list[typing.Any]) -> None:
+        if self._dropped > self._reported:
+            dropped, self._reported = self._dropped - self._reported, self._dropped
+            batch.append({"level": "WARNING", "message": "logs_dropped", "dropped": dropped})
+        stream = self._stream or sys.stdout.buffer
+        stream.write(b"".join(orjson.dumps(entry, default=str, option=_JSON_OPTIONS) for entry in batch))
+        stream.flush()
+
+
+def _reset_after_fork(ref: weakref.ref[AsyncJSONSink]) -> None:
+    if (sink := ref()) is not None:
+        sink._after_fork()  # noqa: SLF001
+
+
+@typing.final
+class AccessLogSampler:
+    """Decide whether an `api_request` line is logged.
+
+    Rates are fractions of the requests kept, looked up from the most to the least
+    specific key: `"<route> <status class>"`, `"<route>"`, `"<status class>"`, e.g.
+    `{"/health": 0.01, "/health 5xx": 1, "2xx": 0.1}`. Other requests are kept at `default`.
+    """
+
+    def __init__(
+        self,
+        rates: collections.abc.Mapping[str, float] | None = None,
+        *,
+        default: float = 1.0,
+        random_: typing.Callable[[], float] = random.random,
+    ) -> None:
+        self._rates = dict(rates or {})
+        self._default = default
+        self._random = random_
+        self._resolved: dict[tuple[str, int], float] = {}
+
+    def rate(self, route: str, status: int) -> float:
+        key = (route, status)
+        if (rate := self._resolved.get(key)) is None:
+            status_class = f"{status // 100}xx"
+            rate = next(
+                (self._rates[name] for name in (f"{route} {status_class}", route, status_class) if name in self._rates),
+                self._default,
+            )
+            # NOTE: bounded, routes are templates and unmatched paths share the empty route
+            self._resolved[key] = rate
+        return rate
+
+    def __call__(self, route: str, status: int) -> bool:
+        rate = self.rate(route, status)
+        return rate >= 1 or (rate > 0 and self._random() < rate)
+
+
+log_sink = AsyncJSONSink(maxsize=settings.LOG_QUEUE_SIZE)
+atexit.register(log_sink.stop)
+
+
 def setup_logging() -> None:
     intercept_handler = InterceptHandler()
     logging.root.setLevel(settings.LOGGING_LEVEL)
@@ -73,11 +248,12 @@ def setup_logging() -> None:
     for name in logger_names:
         logging.getLogger(name).handlers = [intercept_handler]
 
+    log_sink.start()
     logger.configure(
         handlers=[
             {
-                "sink": sys.stdout,
-                "serialize": True,
+                "sink": log_sink,
+                "format": "{message}",
                 "backtrace": settings.DEBUG,
                 "diagnose": settings.DEBUG,
                 "level": settings.LOGGING_LEVEL,
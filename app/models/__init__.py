@@ -1,5 +1,5 @@
 from .base import ALEMBIC_VERSION_SCHEMA, Base, METADATA
-from .bets import Bets
+from .bets import Bets, UserBetsVersion
 from .users import User
 
 Bets.model_rebuild()
@@ -10,4 +10,5 @@ __all__ = [
     "Base",
     "Bets",
     "User",
+    "UserBetsVersion",
 ]
@@ -25,6 +25,8 @@ def get_sqlalchemy_type(field: typing.Any) -> typing.Any:  # noqa: ANN401
 ALEMBIC_VERSION_SCHEMA: typing.Final[str] = "bts_alembic"
 METADATA: typing.Final[sqlmodel.MetaData] = sqlmodel.MetaData(schema="bts")
 now_at_utc: typing.Final[sqlalchemy.sql.ClauseElement] = sqlalchemy.text("(now() at time zone 'utc')")
+# NOTE: the time of the statement rather than of the start of its transaction
+clock_at_utc: typing.Final[sqlalchemy.sql.ClauseElement] = sqlalchemy.text("(clock_timestamp() at time zone 'utc')")
 create_uuid: typing.Final[sqlalchemy.sql.ClauseElement] = sqlalchemy.text("uuid_generate_v4()")
 
 
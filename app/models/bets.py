@@ -2,10 +2,12 @@ import decimal
 import typing
 import uuid
 
+import sqlalchemy
 import sqlmodel
 
 from app.dto import enums
-from app.models.base import Base
+from app.dto.entities.base import ArrowType
+from app.models.base import Base, clock_at_utc
 
 if typing.TYPE_CHECKING:
     from app.models.users import User
@@ -16,7 +18,17 @@ class Bets(Base, table=True):
     """Represent a bet made by a user."""
 
     __tablename__ = "bets"
-    __table_args__ = (sqlmodel.Index("ix_bets_user_id_event_id", "user_id", "event_id", unique=False),)
+    __table_args__ = (
+        sqlmodel.Index("ix_bets_user_id_event_id", "user_id", "event_id", unique=False),
+        sqlmodel.Index("ix_bets_user_id_created_at_id", "user_id", "created_at", "id", unique=False),
+        sqlmodel.Index(
+            "ix_bets_event_id_id_pending",
+            "event_id",
+            "id",
+            unique=False,
+            postgresql_where=sqlmodel.text("status = 'PENDING'"),
+        ),
+    )
 
     event_id: uuid.UUID = sqlmodel.Field(index=True)
     user_id: uuid.UUID = sqlmodel.Field(foreign_key="users.id", index=True)
@@ -40,3 +52,18 @@ class Bets(Base, table=True):
     )
 
     user: "User" = sqlmodel.Relationship(back_populates="bets")
+
+
+@typing.final
+class UserBetsVersion(sqlmodel.SQLModel, table=True):
+    """Version of the bets of a user, bumped in the transaction of every write to them.
+
+    Writers of the same user's bets queue on this row, so versions follow the order
+    their changes are committed in and a version tells exactly which changes are visible.
+    """
+
+    __tablename__ = "user_bets_versions"
+
+    user_id: uuid.UUID = sqlmodel.Field(foreign_key="users.id", primary_key=True)
+    version: int = sqlmodel.Field(sa_column=sqlmodel.Column(sqlalchemy.BigInteger(), nullable=False))
+    updated_at: ArrowType = sqlmodel.Field(sa_column_kwargs={"server_default": clock_at_utc})
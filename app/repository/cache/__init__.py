@@ -0,0 +1,12 @@
+from app.repository.cache.invalidation import InvalidationBus, InvalidationHandler
+from app.repository.cache.memory import BoundedMemoryCache, CacheStats, Eviction
+from app.repository.cache.serializers import MsgPackSerializer
+
+__all__ = [
+    "BoundedMemoryCache",
+    "CacheStats",
+    "Eviction",
+    "InvalidationBus",
+    "InvalidationHandler",
+    "MsgPackSerializer",
+]
@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import typing
+
+import asyncpg  # type: ignore[import-untyped]
+from loguru import logger
+
+INVALIDATION_CHANNEL: typing.Final[str] = "bts_cache_invalidation"
+# NOTE: Postgres rejects NOTIFY payloads of 8000 bytes and more
+_MAX_PAYLOAD_SIZE: typing.Final[int] = 7900
+_TOPIC_SEPARATOR: typing.Final[str] = "|"
+_KEY_SEPARATOR: typing.Final[str] = ","
+
+
+def encode_payloads(topic: str, keys: typing.Iterable[str]) -> list[str]:
+    """Pack the keys of a topic into as few NOTIFY payloads as fit the size limit."""
+    payloads: list[str] = []
+    prefix = f"{topic}{_TOPIC_SEPARATOR}"
+    current: list[str] = []
+    size = len(prefix)
+    for key in dict.fromkeys(keys):
+        if current and size + len(key) + 1 > _MAX_PAYLOAD_SIZE:
+            payloads.append(prefix + _KEY_SEPARATOR.join(current))
+            current, size = [], len(prefix)
+        current.append(key)
+        size += len(key) + 1
+    if current:
+        payloads.append(prefix + _KEY_SEPARATOR.join(current))
+    return payloads
+
+
+def decode_payload(payload: str) -> tuple[str, tuple[str, ...]]:
+    topic, _, keys = payload.partition(_TOPIC_SEPARATOR)
+    return topic, tuple(keys.split(_KEY_SEPARATOR)) if keys else ()
+
+
+class InvalidationHandler(typing.Protocol):
+    async def invalidate(self, keys: typing.Sequence[str]) -> None: ...
+
+    async def clear(self) -> None: ...
+
+
+@typing.final
+class InvalidationBus:
+    """Evict cache entries of this worker when any worker commits a write.
+
+    Repository writes publish `topic|key,key,...` payloads with `pg_notify` in their transaction,
+    so they are delivered only once the write is committed. Every worker keeps one
+    `LISTEN` connection and hands the keys to the handlers subscribed to the topic.
+    Notifications sent while the connection is down are lost, so handlers are cleared
+    whenever it is (re)established.
+
+    Args:
+    ----
+        dsn (str): Postgres DSN of the listening connection, outside of the engine's pool.
+        channel (str): channel the repository notifies.
+        reconnect_delay (float): seconds to wait before reconnecting after a failure.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        dsn: str,
+        channel: str = INVALIDATION_CHANNEL,
+        reconnect_delay: float = 1.0,
+    ) -> None:
+        self._dsn = dsn
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        self._handlers: dict[str, list[InvalidationHandler]] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._pending: set[asyncio.Task[None]] = set()
+
+    def subscribe(self, topic: str, handler: InvalidationHandler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def dispatch(self, payload: str) -> None:
+        topic, keys = decode_payload(payload)
+        for handler in self._handlers.get(topic, ()):
+            await handler.invalidate(keys)
+
+    async def clear(self) -> None:
+        for handlers in self._handlers.values():
+            for handler in handlers:
+                await handler.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(), name="cache_invalidation_listener")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                connection = await asyncpg.connect(self._dsn)
+                try:
+                    await connection.add_listener(self._channel, self._on_notification)
+                    await self.clear()
+                    logger.debug("cache_invalidation_listening", channel=self._channel)
+                    while not connection.is_closed():
+                        await asyncio.sleep(self._reconnect_delay)
+                finally:
+                    await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("cache_invalidation_listener_failed", error=str(exc))
+            await asyncio.sleep(self._reconnect_delay)
+
+    def _on_notification(self, _connection: object, _pid: int, _channel: str, payload: str) -> None:
+        task = asyncio.create_task(self.dispatch(payload))
+        # Keep a reference until done, the event loop only holds weak ones
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
@@ -0,0 +1,319 @@
+import collections
+import collections.abc
+import sys
+import time
+import types
+import typing
+
+import aiocache
+import aiocache.serializers  # type: ignore[import-untyped]
+import attrs
+
+Eviction = typing.Literal["lru", "lfu"]
+
+
+def approximate_sizeof(obj: object) -> int:
+    """Estimate the memory held by an object.
+
+    Containers, sequences (including SQLAlchemy rows) and public instance attributes are followed.
+    Private attributes are not, they tend to reference shared state such as ORM sessions.
+    """
+    seen: set[int] = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, type | types.ModuleType | types.FunctionType | types.MethodType):
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, str | bytes | bytearray | int | float):
+            continue
+        if isinstance(item, collections.abc.Mapping):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, collections.abc.Collection):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.extend(value for name, value in vars(item).items() if not name.startswith("_"))
+        stack.extend(
+            getattr(item, slot)
+            for slot in getattr(type(item), "__slots__", ())
+            if not slot.startswith("_") and hasattr(item, slot)
+        )
+    return size
+
+
+class _LRUPolicy:
+    def __init__(self) -> None:
+        self._order: collections.OrderedDict[str, None] = collections.OrderedDict()
+
+    def add(self, key: str) -> None:
+        self._order[key] = None
+
+    def touch(self, key: str) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        del self._order[key]
+
+    def victim(self) -> str:
+        return next(iter(self._order))
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class _LFUPolicy:
+    """Least-frequently-used eviction in O(1), ties broken by least recent use."""
+
+    def __init__(self) -> None:
+        self._counts: dict[str, int] = {}
+        self._buckets: dict[int, collections.OrderedDict[str, None]] = {}
+        self._min_count = 0
+
+    def add(self, key: str) -> None:
+        self._counts[key] = 1
+        self._buckets.setdefault(1, collections.OrderedDict())[key] = None
+        self._min_count = 1
+
+    def touch(self, key: str) -> None:
+        count = self._counts[key]
+        self._discard(key, count)
+        if self._min_count == count and count not in self._buckets:
+            self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, collections.OrderedDict())[key] = None
+
+    def remove(self, key: str) -> None:
+        self._discard(key, self._counts.pop(key))
+
+    def victim(self) -> str:
+        if self._min_count not in self._buckets:
+            self._min_count = min(self._buckets)
+        return next(iter(self._buckets[self._min_count]))
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+    def _discard(self, key: str, count: int) -> None:
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+
+
+@typing.final
+@attrs.frozen(slots=True, kw_only=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    rejections: int
+    entries: int
+    size: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@attrs.define(slots=True)
+class _Slot:
+    value: typing.Any
+    size: int
+    expires_at: float | None
+
+
+class BoundedMemoryCache(aiocache.BaseCache):  # type: ignore[misc]
+    """In-process `aiocache` backend with a bounded number of entries and bytes.
+
+    When a limit is exceeded, least recently used (`lru`) or least frequently used (`lfu`)
+    entries are evicted. An entry larger than `max_bytes` on its own is not stored and is
+    counted as a rejection. Expired entries are dropped lazily when they are read or evicted,
+    so no timer is scheduled per key. Values are stored as is, their size is estimated
+    with `approximate_sizeof`.
+
+    Args:
+    ----
+        max_entries (int): maximum number of entries kept.
+        max_bytes (int): maximum estimated size of the keys and values kept, unbounded if None.
+        eviction (str): `lru` or `lfu`.
+        timer (Callable): monotonic clock, overridable in tests.
+
+    """
+
+    NAME = "bounded_memory"
+
+    def __init__(  # noqa: PLR0913
+        self,
+        serializer: aiocache.serializers.BaseSerializer | None = None,
+        *,
+        max_entries: int = 10_000,
+        max_bytes: int | None = None,
+        eviction: Eviction = "lru",
+        timer: typing.Callable[[], float] = time.monotonic,
+        **kwargs: typing.Any,  # noqa: ANN401
+    ) -> None:
+        super().__init__(serializer=serializer or aiocache.serializers.NullSerializer(), **kwargs)
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._timer = timer
+        self._policy: _LRUPolicy | _LFUPolicy = _LFUPolicy() if eviction == "lfu" else _LRUPolicy()
+        self._data: dict[str, _Slot] = {}
+        self._size = 0
+        self._hits = self._misses = self._evictions = self._expirations = self._rejections = 0
+
+    @classmethod
+    def parse_uri_path(cls, path: str) -> dict[str, typing.Any]:  # noqa: ARG003
+        return {}
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            rejections=self._rejections,
+            entries=len(self._data),
+            size=self._size,
+        )
+
+    def _lookup(self, key: str) -> _Slot | None:
+        slot = self._data.get(key)
+        if slot is not None and slot.expires_at is not None and slot.expires_at <= self._timer():
+            self._expirations += 1
+            self._remove(key)
+            slot = None
+        if slot is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._policy.touch(key)
+        return slot
+
+    def _remove(self, key: str) -> _Slot | None:
+        slot = self._data.pop(key, None)
+        if slot is not None:
+            self._size -= slot.size
+            self._policy.remove(key)
+        return slot
+
+    def _store(self, key: str, value: typing.Any, ttl: float | None) -> bool:  # noqa: ANN401
+        self._remove(key)
+        slot = _Slot(
+            value=value,
+            size=approximate_sizeof(key) + approximate_sizeof(value),
+            expires_at=self._timer() + ttl if ttl else None,
+        )
+        # An entry larger than the whole cache would evict every other one and still exceed the limit
+        if self._max_bytes is not None and slot.size > self._max_bytes:
+            self._rejections += 1
+            return False
+        # Evict before adding, otherwise `lfu` would pick the new entry as the least used one
+        while self._data and (
+            len(self._data) >= self._max_entries
+            or (self._max_bytes is not None and self._size + slot.size > self._max_bytes)
+        ):
+            self._remove(self._policy.victim())
+            self._evictions += 1
+        self._data[key] = slot
+        self._size += slot.size
+        self._policy.add(key)
+        return True
+
+    async def _get(self, key: str, encoding: str = "utf-8", _conn: object = None) -> typing.Any:  # noqa: ANN401, ARG002
+        slot = self._lookup(key)
+        return slot.value if slot is not None else None
+
+    async def _gets(self, key: str, encoding: str = "utf-8", _conn: object = None) -> typing.Any:  # noqa: ANN401
+        return await self._get(key, encoding=encoding, _conn=_conn)
+
+    async def _multi_get(
+        self,
+        keys: typing.Iterable[str],
+        encoding: str = "utf-8",
+        _conn: object = None,
+    ) -> list[typing.Any]:
+        return [await self._get(key, encoding=encoding, _conn=_conn) for key in keys]
+
+    async def _set(
+        self,
+        key: str,
+        value: typing.Any,  # noqa: ANN401
+        ttl: float | None = None,
+        _cas_token: object = None,
+        _conn: object = None,
+    ) -> bool:
+        if _cas_token is not None and _cas_token != await self._get(key):
+            return False
+        return self._store(key, value, ttl)
+
+    async def _multi_set(
+        self,
+        pairs: typing.Iterable[tuple[str, typing.Any]],
+        ttl: float | None = None,
+        _conn: object = None,
+    ) -> bool:
+        stored = [self._store(key, value, ttl) for key, value in pairs]
+        return all(stored)
+
+    async def _add(self, key: str, value: typing.Any, ttl: float | None = None, _conn: object = None) -> bool:  # noqa: ANN401
+        if await self._exists(key):
+            raise ValueError(f"Key {key} already exists, use .set to update the value")
+        return self._store(key, value, ttl)
+
+    async def _exists(self, key: str, _conn: object = None) -> bool:
+        slot = self._data.get(key)
+        return slot is not None and (slot.expires_at is None or slot.expires_at > self._timer())
+
+    async def _increment(self, key: str, delta: int, _conn: object = None) -> int:
+        slot = self._lookup(key)
+        try:
+            value = delta if slot is None else int(slot.value) + delta
+        except ValueError:
+            raise TypeError("Value is not an integer") from None
+        self._store(key, value, slot.expires_at - self._timer() if slot and slot.expires_at else None)
+        return value
+
+    async def _expire(self, key: str, ttl: float, _conn: object = None) -> bool:
+        if not await self._exists(key):
+            return False
+        self._data[key].expires_at = self._timer() + ttl if ttl else None
+        return True
+
+    async def _delete(self, key: str, _conn: object = None) -> int:
+        return int(self._remove(key) is not None)
+
+    async def _clear(self, namespace: str | None = None, _conn: object = None) -> bool:
+        if namespace:
+            for key in [key for key in self._data if key.startswith(namespace)]:
+                self._remove(key)
+        else:
+            self._data.clear()
+            self._policy.clear()
+            self._size = 0
+        return True
+
+    async def _raw(
+        self,
+        command: str,
+        *args: typing.Any,  # noqa: ANN401
+        encoding: str = "utf-8",  # noqa: ARG002
+        _conn: object = None,
+        **kwargs: typing.Any,  # noqa: ANN401
+    ) -> typing.Any:  # noqa: ANN401
+        return getattr(self._data, command)(*args, **kwargs)
+
+    async def _redlock_release(self, key: str, value: typing.Any) -> int:  # noqa: ANN401
+        slot = self._data.get(key)
+        if slot is not None and slot.value == value:
+            self._remove(key)
+            return 1
+        return 0
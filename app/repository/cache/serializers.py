@@ -0,0 +1,112 @@
+import decimal
+import enum
+import typing
+import uuid
+
+import aiocache.serializers  # type: ignore[import-untyped]
+import arrow
+import msgpack  # type: ignore[import-untyped]
+import pydantic
+
+from app.dto import enums
+
+
+@typing.final
+@enum.unique
+class ExtType(enum.IntEnum):
+    """msgpack extension type codes, stable across releases since they are stored in shared caches."""
+
+    UUID = 1
+    DECIMAL = 2
+    ARROW = 3
+    ENUM = 4
+    MODEL = 5
+
+
+DEFAULT_ENUMS: typing.Final[tuple[type[enum.Enum], ...]] = (
+    enums.BetStatus,
+    enums.BetType,
+    enums.ResultValue,
+)
+
+_BUILTINS: typing.Final[tuple[tuple[type | tuple[type, ...], type], ...]] = (
+    ((tuple, list), list),
+    (dict, dict),
+    (bool, bool),
+    (int, int),
+    (float, float),
+    (str, str),
+    (bytes, bytes),
+)
+
+
+class MsgPackSerializer(aiocache.serializers.BaseSerializer):  # type: ignore[misc]
+    """Serialize cached values with msgpack, keeping the types of our entities.
+
+    `uuid.UUID`, `decimal.Decimal` and `arrow.Arrow` are encoded as extension types,
+    so are members of the registered enums (`BetStatus` and friends by default)
+    and instances of the registered pydantic models, e.g. `models.Bets` or `models.User`.
+    Values are packed with `strict_types`, so subclasses of builtins, e.g. our `StrEnum`s,
+    reach the encoder instead of being packed as their base type. Sequences are decoded as tuples.
+
+    Args:
+    ----
+        models (Iterable): pydantic models, including SQLModel tables, that may be cached.
+        enums (Iterable): enums whose members may be cached.
+
+    """
+
+    DEFAULT_ENCODING = None
+
+    def __init__(
+        self,
+        *,
+        models: typing.Iterable[type[pydantic.BaseModel]] = (),
+        enums: typing.Iterable[type[enum.Enum]] = DEFAULT_ENUMS,
+        **kwargs: typing.Any,  # noqa: ANN401
+    ) -> None:
+        super().__init__(**kwargs)
+        self._models = {model.__name__: model for model in models}
+        self._enums = {enum_.__name__: enum_ for enum_ in enums}
+
+    def dumps(self, value: typing.Any) -> bytes:  # noqa: ANN401
+        return typing.cast(bytes, msgpack.packb(value, default=self._default, strict_types=True))
+
+    def loads(self, value: bytes | None) -> typing.Any:  # noqa: ANN401
+        if value is None:
+            return None
+        return msgpack.unpackb(value, ext_hook=self._ext_hook, use_list=False)
+
+    def _default(self, obj: object) -> typing.Any:  # noqa: ANN401
+        match obj:
+            case uuid.UUID():
+                return msgpack.ExtType(ExtType.UUID, obj.bytes)
+            case decimal.Decimal():
+                return msgpack.ExtType(ExtType.DECIMAL, str(obj).encode())
+            case arrow.Arrow():
+                return msgpack.ExtType(ExtType.ARROW, obj.isoformat().encode())
+            case enum.Enum() if type(obj).__name__ in self._enums:
+                return msgpack.ExtType(ExtType.ENUM, self.dumps((type(obj).__name__, obj.value)))
+            case pydantic.BaseModel() if type(obj).__name__ in self._models:
+                return msgpack.ExtType(ExtType.MODEL, self.dumps((type(obj).__name__, obj.model_dump())))
+        # NOTE: strict types pack exact builtins only, the rest are packed as their base type
+        for bases, builtin in _BUILTINS:
+            if isinstance(obj, bases):
+                return builtin(obj)
+        raise TypeError(f"Cannot serialize {type(obj).__name__} to msgpack")
+
+    def _ext_hook(self, code: int, data: bytes) -> typing.Any:  # noqa: ANN401
+        match code:
+            case ExtType.UUID:
+                return uuid.UUID(bytes=data)
+            case ExtType.DECIMAL:
+                return decimal.Decimal(data.decode())
+            case ExtType.ARROW:
+                return arrow.get(data.decode())
+            case ExtType.ENUM:
+                name, value = self.loads(data)
+                return self._enums[name](value)
+            case ExtType.MODEL:
+                name, fields = self.loads(data)
+                return self._models[name].model_validate(fields)
+        return msgpack.ExtType(code, data)
@@ -1,8 +1,13 @@
-from app.repository.db.base import BaseDB, DatabaseSessionManager
+from app.repository.db.base import BaseDB, DatabaseSessionManager, PoolStatus
 from app.repository.db.db import DB
+from app.repository.db.instrumentation import QueryInstrumentation, QueryStats, track_queries
 
 __all__ = [
     "DB",
     "BaseDB",
     "DatabaseSessionManager",
+    "PoolStatus",
+    "QueryInstrumentation",
+    "QueryStats",
+    "track_queries",
 ]
@@ -1,47 +1,216 @@
 from __future__ import annotations
 
 import contextlib
+import contextvars
+import functools
+import time
 import typing
 
+import attrs
+import sqlalchemy.dialects.postgresql
 import sqlalchemy.exc
 import sqlalchemy.ext.asyncio
+import sqlalchemy.pool
+import sqlalchemy.sql.dml
 import sqlalchemy.sql.elements
+import sqlalchemy.sql.schema
 import sqlmodel
 import sqlmodel.sql.expression
 from loguru import logger
 
-from app.dto.exceptions import AlreadyExistsError, NotFoundError
+from app.dto.exceptions import AlreadyExistsError, APIError, ClientError, NotFoundError
 from app.models.base import Base
+from app.repository.cache.invalidation import encode_payloads, INVALIDATION_CHANNEL
+from app.utils.metrics import registry
+from app.utils.tracing import trace_methods
+
+if typing.TYPE_CHECKING:
+    from app.dto.entities.base import Cursor
+    from app.repository.db.instrumentation import QueryInstrumentation
 
 T = typing.TypeVar("T", bound=Base)
-_Tb = typing.TypeVar("_Tb", bound=sqlmodel.Table)
+_Ts = typing.TypeVar("_Ts", bound=sqlalchemy.Select[typing.Any])
 Filters = typing.Any
+AfterCommit = typing.Callable[[], typing.Awaitable[None]]
+
+_AFTER_COMMIT: typing.Final[str] = "bts_after_commit"
+
+
+_POOL_CHECKOUT_WAIT: typing.Final = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection of the pool.",
+)
+_POOL_CAPACITY: typing.Final = registry.gauge("db_pool_capacity", "Connections the pool may open.")
+_POOL_CHECKED_OUT: typing.Final = registry.gauge("db_pool_checked_out", "Connections lent to sessions.")
+_POOL_CHECKED_IN: typing.Final = registry.gauge("db_pool_checked_in", "Idle connections kept in the pool.")
 
 
 class NoTransactionError(Exception):
     """No bet error."""
 
 
+_checkout_started_at: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "checkout_started_at",
+    default=None,
+)
+
+
+class CheckoutTimingPool(sqlalchemy.pool.AsyncAdaptedQueuePool):
+    """Queue pool stamping the start of each checkout, whatever acquires the connection.
+
+    The pool's `checkout` event fires once a connection is lent, the stamp tells how long it waited.
+    """
+
+    def connect(self) -> sqlalchemy.pool.PoolProxiedConnection:
+        token = _checkout_started_at.set(time.perf_counter())
+        try:
+            return super().connect()
+        finally:
+            _checkout_started_at.reset(token)
+
+
+async def run_after_commit(connection: sqlalchemy.ext.asyncio.AsyncConnection) -> None:
+    """Run the callbacks `EntityDB.after_commit` deferred until the connection's transaction committed."""
+    for callback in connection.info.pop(_AFTER_COMMIT, ()):
+        try:
+            await callback()
+        except Exception as exc:  # noqa: BLE001
+            # The transaction is committed regardless, its response must not fail
+            logger.warning("after_commit_failed", error=str(exc))
+
+
+@typing.final
+@attrs.define(slots=True, frozen=True, kw_only=True)
+class PoolStatus:
+    """Snapshot of the engine connection pool.
+
+    Attributes
+    ----------
+        capacity (int): maximum number of connections the pool may open (size + overflow)
+        checked_out (int): connections currently lent to sessions
+        checked_in (int): idle connections kept in the pool
+        checkouts (int): number of checkouts since the engine was initialized
+        checkout_wait_total (float): total seconds spent waiting for a connection
+        checkout_wait_max (float): longest single wait for a connection, in seconds
+
+    """
+
+    capacity: int
+    checked_out: int
+    checked_in: int
+    checkouts: int
+    checkout_wait_total: float
+    checkout_wait_max: float
+
+    @property
+    def saturation(self) -> float:
+        """Share of the pool capacity currently in use."""
+        if not self.capacity:
+            return 0.0
+        return self.checked_out / self.capacity
+
+    @property
+    def checkout_wait_avg(self) -> float:
+        if not self.checkouts:
+            return 0.0
+        return self.checkout_wait_total / self.checkouts
+
+
 class DatabaseSessionManager:
+    """Own the process-wide engine and hand out sessions bound to its pool.
+
+    The manager is created once per worker and initialized on startup,
+    so requests reuse pooled connections instead of opening new ones.
+    """
+
     _engine: sqlalchemy.ext.asyncio.AsyncEngine | None
     _sessionmaker: sqlalchemy.ext.asyncio.async_sessionmaker[sqlalchemy.ext.asyncio.AsyncSession] | None
+    _checkouts: int
+    _checkout_wait_total: float
+    _checkout_wait_max: float
+    _max_overflow: int
 
     def __init__(self) -> None:
         self._engine = None
         self._sessionmaker = None
+        self._max_overflow = 0
+        self._reset_stats()
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._engine is not None
 
-    def initialize(self, *, url: str, **kwargs: str | int) -> None:
-        self._engine = sqlalchemy.ext.asyncio.create_async_engine(url=url, **kwargs)
+    def initialize(
+        self,
+        *,
+        url: str,
+        instrumentation: QueryInstrumentation | None = None,
+        **kwargs: str | float,
+    ) -> None:
+        self._engine = sqlalchemy.ext.asyncio.create_async_engine(
+            url=url,
+            **{"poolclass": CheckoutTimingPool, **kwargs},
+        )
+        self._max_overflow = int(kwargs.get("max_overflow", 10))
+        self.instrument_pool()
+        if instrumentation is not None:
+            instrumentation.attach(self._engine)
         self._sessionmaker = sqlalchemy.ext.asyncio.async_sessionmaker(
             bind=self._engine,
             expire_on_commit=False,
             autoflush=False,
         )
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self._checkouts = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+
+    def instrument_pool(self) -> None:
+        """Record every checkout of the engine's pool, sessions acquiring their connection lazily included."""
+        self._check_engine()
+        sqlalchemy.event.listen(self._engine.pool, "checkout", self._on_checkout)  # type: ignore[union-attr]
+
+    def _on_checkout(self, *_args: object) -> None:
+        started_at = _checkout_started_at.get()
+        self._record_checkout(time.perf_counter() - started_at if started_at is not None else 0.0)
+
+    def _record_checkout(self, wait: float) -> None:
+        self._checkouts += 1
+        self._checkout_wait_total += wait
+        self._checkout_wait_max = max(self._checkout_wait_max, wait)
+        _POOL_CHECKOUT_WAIT.observe(wait)
 
     def _check_engine(self) -> None:
         if self._engine is None:
             raise NoTransactionError("DatabaseSessionManager is not initialized")
 
+    def pool_status(self) -> PoolStatus:
+        """Report pool utilisation and checkout latency."""
+        self._check_engine()
+        pool = self._engine.pool  # type: ignore[union-attr]
+        capacity = checked_out = checked_in = 0
+        if isinstance(pool, sqlalchemy.pool.QueuePool):
+            capacity = pool.size() + self._max_overflow
+            checked_out = pool.checkedout()
+            checked_in = pool.checkedin()
+        return PoolStatus(
+            capacity=capacity,
+            checked_out=checked_out,
+            checked_in=checked_in,
+            checkouts=self._checkouts,
+            checkout_wait_total=self._checkout_wait_total,
+            checkout_wait_max=self._checkout_wait_max,
+        )
+
+    def collect_metrics(self) -> None:
+        """Set the pool gauges, meant for `MetricsRegistry.on_collect`."""
+        status = self.pool_status()
+        _POOL_CAPACITY.set(status.capacity)
+        _POOL_CHECKED_OUT.set(status.checked_out)
+        _POOL_CHECKED_IN.set(status.checked_in)
+
     async def close(self) -> None:
         self._check_engine()
         await self._engine.dispose()  # type: ignore[union-attr]
@@ -84,106 +253,246 @@ class DatabaseSessionManager:
                 await session.rollback()
                 raise
 
+    async def is_alive(self) -> bool:
+        """Check the database with a connection borrowed from the pool for a single query."""
+        try:
+            async with self.connection() as connection:
+                await connection.execute(sqlalchemy.text("SELECT 1"))
+        except (sqlalchemy.exc.DBAPIError, OSError) as exc:
+            logger.exception(exc)
+            return False
+        return True
+
     @contextlib.asynccontextmanager
     async def bet(self) -> typing.AsyncIterator[sqlalchemy.ext.asyncio.AsyncTransaction]:
+        """Wrap the work into a transaction, then run the callbacks deferred until it committed."""
         self._check_engine()
-        async with self.connection() as connection, connection.begin() as bet:
+        committed = False
+        async with self.connection() as connection:
             try:
-                yield bet
-            except Exception:
-                await bet.rollback()
+                async with connection.begin() as bet:
+                    try:
+                        yield bet
+                    except Exception:
+                        await bet.rollback()
+                        raise
+                    committed = bet.is_active
+            except BaseException:
+                # NOTE: the info outlives the checkout, drop the callbacks of a transaction that didn't commit
+                connection.info.pop(_AFTER_COMMIT, None)
                 raise
-
-
-class EntityDB:
-    session: sqlalchemy.ext.asyncio.AsyncSession
-
-    @staticmethod
-    def _get_filter_bool_expression(
-        *,
-        model: _Tb,
-        filter_name: str,
-        filter_value: Filters,
-        query: sqlmodel.sql.expression.Select[_Tb] | None = None,
-    ) -> sqlalchemy.sql.elements.ColumnElement[bool]:
-        """Create filter expression for query from filter name and value.
-
-        The filter name should be in the format of `column_name_sign`, where:
-        - `column_name` is the name of the column to filter by
-        - `sign` is the sign of the comparison operation to perform
-
-        The filter value should be the value to compare the column to.
-
-        The following signs are supported:
-        - `lt` - less than
-        - `le` - less than or equal to
-        - `gt` - greater than
-        - `ge` - greater than or equal to
-        - `ne` - not equal to
-        - `in` - in list
-        - `notin` - not in list
-        - `is` - is
-        - `isnot` - is not
-        - `like` - like
-        - `ilike` - ilike
-
-        Example:
-        -------
-        - `id_lt` - id less than
-        - `name_like` - name like
-        - `is_active` - is active
-        - `is_active_is` - is active is
-        - `payment_system_in` - payment system in list
-        - `status_ne` - status not equal to
-
-        """
-        if query is not None and filter_name in (dict(query.subquery().columns).keys() | model.model_fields.keys()):  # type: ignore[attr-defined]
-            return sqlmodel.column(filter_name).__eq__(filter_value)  # noqa: PLC2801
-        if query is None and filter_name in model.columns:
-            return model.columns[filter_name].__eq__(filter_value)  # noqa: PLC2801
-
-        split_by_underscore = filter_name.split("_")
-        sign = split_by_underscore.pop()
-        col_name = "_".join(split_by_underscore)
-        col = sqlmodel.column(col_name) if query is not None else model.columns[col_name]
-
+            if committed:
+                await run_after_commit(connection)
+            else:
+                connection.info.pop(_AFTER_COMMIT, None)
+
+
+_FILTER_SIGNS: typing.Final[frozenset[str]] = frozenset({
+    "eq",
+    "lt",
+    "le",
+    "gt",
+    "ge",
+    "ne",
+    "in",
+    "notin",
+    "is",
+    "isnot",
+    "like",
+    "ilike",
+})
+_LITERAL_SIGNS: typing.Final[frozenset[str]] = frozenset({"is", "isnot"})
+_FILTER_PARAM_PREFIX: typing.Final[str] = "filter_"
+
+
+def _constraint_name(exc: sqlalchemy.exc.IntegrityError) -> str:
+    # NOTE: the driver's own error, e.g. asyncpg's, is the cause of the adapted DBAPI one
+    error = getattr(exc.orig, "__cause__", None) or exc.orig
+    return getattr(error, "constraint_name", None) or "a constraint"
+
+
+def _resolve_filter(table: sqlalchemy.Table, filter_name: str) -> tuple[str, str]:
+    """Split filter name into the column name and the sign of the comparison.
+
+    The filter name should be in the format of `column_name_sign`, where:
+    - `column_name` is the name of the column to filter by
+    - `sign` is the sign of the comparison operation to perform
+
+    A bare column name compares for equality.
+
+    The following signs are supported:
+    - `lt` - less than
+    - `le` - less than or equal to
+    - `gt` - greater than
+    - `ge` - greater than or equal to
+    - `ne` - not equal to
+    - `in` - in list
+    - `notin` - not in list
+    - `is` - is
+    - `isnot` - is not
+    - `like` - like
+    - `ilike` - ilike
+
+    Example:
+    -------
+    - `id_lt` - id less than
+    - `name_like` - name like
+    - `is_active` - is active
+    - `is_active_is` - is active is
+    - `payment_system_in` - payment system in list
+    - `status_ne` - status not equal to
+
+    """
+    if filter_name in table.c:
+        return filter_name, "eq"
+    col_name, _, sign = filter_name.rpartition("_")
+    if col_name not in table.c or sign not in _FILTER_SIGNS:
+        raise ValueError(f"Unknown filter name ({filter_name})")
+    return col_name, sign
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_filters(
+    table: sqlalchemy.Table,
+    key: tuple[tuple[str, typing.Hashable], ...],
+) -> sqlalchemy.sql.elements.ColumnElement[bool]:
+    """Build the filter expression for a set of filter names.
+
+    Values are bound parameters named after the filters, except for
+    `is`/`isnot` filters whose values are part of the key, since SQL
+    only accepts literals there. Reusing the same expression object keeps
+    SQLAlchemy's compiled statement cache warm.
+    """
+    expressions = []
+    for filter_name, literal in key:
+        col_name, sign = _resolve_filter(table, filter_name)
+        col = table.c[col_name]
+        value: sqlalchemy.BindParameter[typing.Any] = sqlalchemy.bindparam(
+            _FILTER_PARAM_PREFIX + filter_name, expanding=sign in {"in", "notin"}
+        )
         match sign:
+            case "eq":
+                expr = col == value
             case "lt" | "le" | "gt" | "ge" | "ne":
-                expr = getattr(col, f"__{sign}__")(filter_value)
+                expr = getattr(col, f"__{sign}__")(value)
             case "in":
-                expr = col.in_(filter_value)
+                expr = col.in_(value)
             case "notin":
-                expr = ~col.in_(filter_value)
+                expr = ~col.in_(value)
             case "is":
-                expr = col.is_(filter_value)
+                expr = col.is_(literal)
             case "isnot":
-                expr = col.is_not(filter_value)
+                expr = col.is_not(literal)
             case "like":
-                expr = col.like(filter_value)
+                expr = col.like(value)
             case "ilike":
-                expr = col.ilike(filter_value)
-            case _:
-                raise ValueError(f"Unknown filter name ({filter_name})")
+                expr = col.ilike(value)
+        expressions.append(expr)
+    return sqlalchemy.and_(*expressions)
 
-        return typing.cast(sqlalchemy.sql.elements.ColumnElement[bool], expr)
+
+@trace_methods
+class EntityDB:
+    """Generic repository operations, the public coroutine methods of every subclass are traced."""
+
+    session: sqlalchemy.ext.asyncio.AsyncSession
+
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:  # noqa: ANN401
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)
+
+    @staticmethod
+    def _get_table(model: type[T]) -> sqlalchemy.Table:
+        return typing.cast(sqlalchemy.Table, model.__table__)  # type: ignore[attr-defined]
+
+    @classmethod
+    def _get_insert_values(cls, entity: T) -> dict[str, typing.Any]:
+        """Collect column values of the entity, leaving unset ones to server defaults."""
+        return {
+            column.key: value
+            for column in cls._get_table(type(entity)).columns
+            if (value := getattr(entity, column.key, None)) is not None
+        }
+
+    @staticmethod
+    def _get_conflict_target(table: sqlalchemy.Table, names: typing.Iterable[str]) -> list[str]:
+        """Pick the primary key or the first unique constraint covered by the given columns."""
+        covered = set(names)
+        candidates: list[sqlalchemy.sql.schema.ColumnCollectionMixin] = [
+            table.primary_key,
+            *(c for c in table.constraints if isinstance(c, sqlalchemy.UniqueConstraint)),
+            *(index for index in table.indexes if index.unique),
+        ]
+        for candidate in candidates:
+            columns = candidate.columns.keys()
+            if columns and set(columns) <= covered:
+                return list(columns)
+        raise ValueError(f"No unique constraint of {table.name} is covered by {sorted(covered)}")
 
     def _apply_filters(
         self,
         *,
         model: type[T],
-        query: sqlmodel.sql.expression.SelectOfScalar[T],
+        query: _Ts,
         **filters: Filters,
-    ) -> sqlmodel.sql.expression.SelectOfScalar[T]:
+    ) -> typing.Annotated[tuple[_Ts, dict[str, typing.Any]], "Tuple[query, params]"]:
+        """Add the compiled filter expression to the query.
+
+        Filter values are returned as execution parameters,
+        so the expression itself is built once per set of filter names.
+        """
+        if not filters:
+            return query, {}
+        table = self._get_table(model)
+        key: list[tuple[str, typing.Hashable]] = []
+        params: dict[str, typing.Any] = {}
         for filter_name, filter_value in filters.items():
-            query = query.where(
-                self._get_filter_bool_expression(
-                    model=model,  # type: ignore[type-var]
-                    filter_name=filter_name,
-                    filter_value=filter_value,
-                    query=query,  # type: ignore[arg-type]
-                )
-            )
-        return query
+            _, sign = _resolve_filter(table, filter_name)
+            if sign in _LITERAL_SIGNS:
+                key.append((filter_name, filter_value))
+            else:
+                key.append((filter_name, None))
+                params[_FILTER_PARAM_PREFIX + filter_name] = filter_value
+        return query.where(_compile_filters(table, tuple(key))), params
+
+    def _select_columns(
+        self,
+        *,
+        model: type[T],
+        columns: typing.Sequence[str],
+        **filters: Filters,
+    ) -> tuple[sqlalchemy.Select[typing.Any], dict[str, typing.Any]]:
+        table = self._get_table(model)
+        unknown = set(columns).difference(table.c.keys())
+        if unknown:
+            raise ValueError(f"Unknown columns {sorted(unknown)} of {table.name}")
+        return self._apply_filters(
+            model=model,
+            query=sqlmodel.select(*(table.c[name] for name in columns)),
+            **filters,
+        )
+
+    async def publish_invalidation(self, topic: str, keys: typing.Iterable[str]) -> None:
+        """Notify every worker to evict cached entries of the topic's keys.
+
+        The notification is part of the current transaction and is delivered on commit only,
+        so call it before the write commits.
+        """
+        for payload in encode_payloads(topic, keys):
+            await self.session.execute(sqlalchemy.select(sqlalchemy.func.pg_notify(INVALIDATION_CHANNEL, payload)))
+
+    async def after_commit(self, callback: AfterCommit) -> None:
+        """Call back once the writes of the session are committed, e.g. to evict cached entries of this worker.
+
+        A session joining an outer transaction, like the request's, defers the callback until
+        `DatabaseSessionManager.bet` commits that transaction, and drops it on rollback.
+        Otherwise the repository's writes are committed already, so it is called at once.
+        """
+        bind = self.session.bind
+        if isinstance(bind, sqlalchemy.ext.asyncio.AsyncConnection) and bind.in_transaction():
+            bind.info.setdefault(_AFTER_COMMIT, []).append(callback)
+            return
+        await callback()
 
     async def create(self, model: T, /) -> T:
         try:
@@ -198,49 +507,296 @@ class EntityDB:
         await self.session.refresh(model)
         return model
 
+    async def create_many(self, models: typing.Sequence[T], /) -> list[T]:
+        """Insert entities of one model with a multi-row `INSERT ... RETURNING`.
+
+        All rows are written in a single transaction and returned in the order given.
+        """
+        if not models:
+            return []
+        model = type(models[0])
+        try:
+            rows = await self.session.scalars(
+                sqlalchemy.insert(model).returning(model),
+                [self._get_insert_values(entity) for entity in models],
+                execution_options={"populate_existing": True},
+            )
+            created = {entity.id: entity for entity in rows.all()}
+            await self.session.commit()
+        except sqlalchemy.exc.IntegrityError as exc:
+            if "duplicate key value violates unique constraint" in str(exc):
+                raise AlreadyExistsError(f"Some of {len(models)} {model.__name__} entities already exist") from exc
+            raise
+        # NOTE: RETURNING order of a multi-row insert is not guaranteed, ids are generated client-side
+        return [created[entity.id] for entity in models]
+
     async def update(self, model: T, /) -> T:
         self.session.add(model)
         await self.session.commit()
         return model
 
     async def get(self, model: type[T], /, **filters: Filters) -> T:
-        query = self._apply_filters(model=model, query=sqlmodel.select(model), **filters)
-        rows = await self.session.execute(query)
+        query, params = self._apply_filters(model=model, query=sqlmodel.select(model), **filters)
+        rows = await self.session.execute(query, params)
         result = rows.scalars().first()
         if result is None:
             raise NotFoundError(f"Entity {model.__name__} with filters {filters} not found")
         return result
 
+    @classmethod
+    def _paginate(
+        cls,
+        *,
+        model: type[T],
+        query: _Ts,
+        limit: int | None = None,
+        after: Cursor | None = None,
+    ) -> _Ts:
+        """Order the query by `(created_at, id)` descending and seek past the cursor."""
+        columns = cls._get_table(model).c
+        created_at, id_ = columns.created_at, columns.id
+        if after is not None:
+            query = query.where(
+                sqlalchemy.tuple_(created_at, id_)
+                < sqlalchemy.tuple_(
+                    sqlalchemy.literal(after.created_at, created_at.type),
+                    sqlalchemy.literal(after.id, id_.type),
+                )
+            )
+        query = query.order_by(created_at.desc(), id_.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
     async def get_many(
         self,
         model: type[T],
         /,
+        *,
+        limit: int | None = None,
+        after: Cursor | None = None,
         **filters: Filters,
     ) -> list[T]:
-        query = self._apply_filters(model=model, query=sqlmodel.select(model), **filters)
-        rows = await self.session.execute(query.order_by(sqlmodel.col(model.created_at).desc()))
+        """Get entities newest first, optionally a page of `limit` entities after the cursor."""
+        query, params = self._apply_filters(model=model, query=sqlmodel.select(model), **filters)
+        rows = await self.session.execute(self._paginate(model=model, query=query, limit=limit, after=after), params)
         return typing.cast(list[T], rows.scalars().all())
 
+    async def get_many_rows(
+        self,
+        model: type[T],
+        /,
+        *,
+        columns: typing.Sequence[str],
+        limit: int | None = None,
+        after: Cursor | None = None,
+        **filters: Filters,
+    ) -> list[sqlalchemy.Row[typing.Any]]:
+        """Get only the given columns of entities as named rows, newest first.
+
+        Rows skip ORM hydration and identity map bookkeeping, and only the
+        selected columns are converted, which makes them much cheaper to load
+        than entities. Columns are accessible as row attributes, so rows can
+        be validated into schemas with `from_attributes=True`.
+        """
+        query, params = self._select_columns(model=model, columns=columns, **filters)
+        rows = await self.session.execute(self._paginate(model=model, query=query, limit=limit, after=after), params)
+        return list(rows.all())
+
+    async def stream(
+        self,
+        model: type[T],
+        /,
+        *,
+        columns: typing.Sequence[str],
+        batch_size: int = 1000,
+        **filters: Filters,
+    ) -> typing.AsyncIterator[typing.Sequence[sqlalchemy.Row[typing.Any]]]:
+        """Yield the given columns of every matching entity newest first, in batches of `batch_size` rows.
+
+        Rows are fetched through a server-side cursor as the batches are consumed,
+        so memory is bounded by a batch however many rows match. The session
+        can't run other statements until the iteration is over.
+        """
+        query, params = self._select_columns(model=model, columns=columns, **filters)
+        query = self._paginate(model=model, query=query).execution_options(yield_per=batch_size)
+        result = await self.session.stream(query, params)
+        try:
+            async for batch in result.partitions():
+                yield batch
+        finally:
+            await result.close()
+
     async def get_or_create(
         self,
         model: type[T],
         /,
         **filters: Filters,
     ) -> typing.Annotated[tuple[T, bool], "Tuple[Entity, is_created]"]:
-        entities = await self.get_many(model, **filters)
-        if len(entities) > 1:
-            raise AlreadyExistsError(f"Multiple entities {model.__name__} with filters {filters} found")
-        if entities:
-            return entities[0], False
-        return await self.create(model(**filters)), True
+        """Return the entity matching the filters, creating it if it does not exist.
+
+        Filters are plain column values and must cover the primary key or a unique
+        constraint, so concurrent callers never create duplicates. The entity is inserted
+        with `INSERT ... ON CONFLICT DO NOTHING RETURNING` and, when it already exists, the row
+        matching every filter is selected by the same statement, so an existing row is neither
+        written nor costs another round trip. The caller commits.
+        Raises `AlreadyExistsError` if the conflicting row doesn't match the other filters.
+        """
+        table = self._get_table(model)
+        inserted = (
+            sqlalchemy.dialects.postgresql.insert(table)
+            .values(self._get_insert_values(model(**filters)))
+            .on_conflict_do_nothing(index_elements=self._get_conflict_target(table, filters.keys()))
+            .returning(*table.c)
+            .cte("inserted")
+        )
+        existing, params = self._apply_filters(
+            model=model,
+            query=sqlalchemy.select(*table.c, sqlalchemy.false().label("is_created")),
+            **filters,
+        )
+        query = sqlmodel.select(model, sqlalchemy.column("is_created", sqlalchemy.Boolean)).from_statement(
+            sqlalchemy.union_all(
+                sqlalchemy.select(*inserted.c, sqlalchemy.true().label("is_created")),
+                existing.where(~sqlalchemy.exists(inserted.select())),
+            )
+        )
+        try:
+            rows = await self.session.execute(query, params, execution_options={"populate_existing": True})
+        except sqlalchemy.exc.IntegrityError as exc:
+            if "duplicate key value violates unique constraint" in str(exc):
+                raise AlreadyExistsError(f"Entity {model.__name__} conflicting with {filters} already exists") from exc
+            raise
+        row = rows.first()
+        if row is not None:
+            entity, is_created = row
+            return entity, is_created
+        # NOTE: a row committed concurrently conflicts but is not in the snapshot of the statement
+        query, params = self._apply_filters(model=model, query=sqlmodel.select(model), **filters)
+        rows = await self.session.execute(query, params)
+        result = rows.scalars().first()
+        if result is None:
+            raise AlreadyExistsError(f"Entity {model.__name__} conflicting with {filters} already exists")
+        return result, False
+
+    async def upsert(
+        self,
+        entity: T,
+        /,
+        *,
+        conflict_on: typing.Sequence[str] | None = None,
+        update: typing.Sequence[str] | None = None,
+    ) -> typing.Annotated[tuple[T, bool], "Tuple[Entity, is_created]"]:
+        """Insert the entity or update the conflicting row in one round trip.
+
+        Args:
+        ----
+            entity: entity to insert.
+            conflict_on: columns of the unique constraint to resolve conflicts on.
+                Defaults to the primary key.
+            update: columns overwritten with the new values on conflict.
+                Defaults to every inserted column except the conflict target and `created_at`.
+                Pass an empty sequence to keep the existing row as is.
+
+        """
+        model = type(entity)
+        table = self._get_table(model)
+        conflict_on = list(conflict_on or table.primary_key.columns.keys())
+        values = self._get_insert_values(entity)
+        if update is None:
+            update = [name for name in values if name not in conflict_on and name != "created_at"]
+
+        insert = sqlalchemy.dialects.postgresql.insert(model).values(values)
+        # NOTE: DO NOTHING would not return the existing row,
+        # so an empty update rewrites the conflict target with itself.
+        set_: dict[str, typing.Any] = {name: insert.excluded[name] for name in update} or {
+            name: table.c[name] for name in conflict_on
+        }
+        query: sqlalchemy.sql.dml.ReturningInsert[tuple[T, bool]] = insert.on_conflict_do_update(
+            index_elements=conflict_on,
+            set_=set_,
+        ).returning(model, sqlalchemy.literal_column("xmax = 0", sqlalchemy.Boolean).label("is_created"))
+        try:
+            rows = await self.session.execute(query, execution_options={"populate_existing": True})
+            result, is_created = rows.one()
+            await self.session.commit()
+        except sqlalchemy.exc.IntegrityError as exc:
+            if "duplicate key value violates unique constraint" in str(exc):
+                raise AlreadyExistsError(f"Entity {model.__name__} with values {values} already exists") from exc
+            raise
+        return result, is_created
+
+    async def insert_ignore(
+        self,
+        entity: T,
+        /,
+        *,
+        conflict_on: typing.Sequence[str] | None = None,
+    ) -> T | None:
+        """Insert the entity unless it conflicts with an existing row.
+
+        Returns the inserted entity, or None if a conflicting row already exists.
+        Without `conflict_on` any unique constraint violation is ignored.
+        """
+        model = type(entity)
+        query = (
+            sqlalchemy.dialects.postgresql.insert(model)
+            .values(self._get_insert_values(entity))
+            .on_conflict_do_nothing(index_elements=conflict_on)
+            .returning(model)
+        )
+        rows = await self.session.execute(query, execution_options={"populate_existing": True})
+        result = rows.scalars().first()
+        await self.session.commit()
+        return result
+
+    async def create_many_isolated(self, models: typing.Sequence[T], /) -> list[T | APIError]:
+        """Insert entities of one model, reporting the rows that can't be inserted instead of failing them all.
+
+        Rows conflicting with existing ones are skipped by a multi-row
+        `INSERT ... ON CONFLICT DO NOTHING RETURNING` and reported as `AlreadyExistsError`.
+        When the statement fails otherwise, e.g. on a foreign key, rows are inserted
+        one by one in savepoints and the faulty ones are reported as `ClientError`.
+        Results follow the order of the entities.
+        """
+        if not models:
+            return []
+        model = type(models[0])
+        results: dict[typing.Any, T | APIError] = {}
+        try:
+            async with self.session.begin_nested():
+                results.update(await self._insert_many_ignore(models))
+        except sqlalchemy.exc.IntegrityError:
+            for entity in models:
+                try:
+                    async with self.session.begin_nested():
+                        results.update(await self._insert_many_ignore([entity]))
+                except sqlalchemy.exc.IntegrityError as exc:
+                    results[entity.id] = ClientError(f"{model.__name__} violates {_constraint_name(exc)}")
+        await self.session.commit()
+        return [
+            result
+            if (result := results.get(entity.id)) is not None
+            else AlreadyExistsError(f"{model.__name__} with id {entity.id} already exists")
+            for entity in models
+        ]
+
+    async def _insert_many_ignore(self, models: typing.Sequence[T]) -> dict[typing.Any, T]:
+        model = type(models[0])
+        rows = await self.session.scalars(
+            sqlalchemy.dialects.postgresql.insert(model).on_conflict_do_nothing().returning(model),
+            [self._get_insert_values(entity) for entity in models],
+            execution_options={"populate_existing": True},
+        )
+        return {entity.id: entity for entity in rows.all()}
 
     async def count(self, model: type[T], /, **filters: Filters) -> int:
-        query = self._apply_filters(  # type: ignore[misc]
+        query, params = self._apply_filters(
             model=model,
             query=sqlmodel.select(sqlmodel.func.count(model.id)),  # type: ignore[arg-type]
             **filters,
         )
-        rows = await self.session.execute(query)
+        rows = await self.session.execute(query, params)
         return typing.cast(int, rows.scalar())
 
     async def close(self) -> None:
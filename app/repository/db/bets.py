@@ -1,38 +1,143 @@
 import decimal
+import typing
 import uuid
 
+import arrow
+import sqlalchemy
+import sqlalchemy.dialects.postgresql
 import sqlmodel
 
 from app import models
 from app.dto import enums
-from app.dto.exceptions import ClientError
+from app.dto.entities.base import Cursor
+from app.dto.exceptions import APIError, ClientError
+from app.models.base import clock_at_utc, now_at_utc
 from app.repository.db.base import BaseDB, Filters
 
+USER_BETS_TOPIC: typing.Final[str] = "user_bets"
+"""Invalidation topic of bets, keyed by the id of the user who made them."""
+_USER_BETS_VERSIONS: typing.Final = typing.cast(sqlalchemy.Table, models.UserBetsVersion.__table__)  # type: ignore[attr-defined]
+
 
 class BetsDB(BaseDB):
-    async def create_bet(
-        self,
+    @staticmethod
+    def new_bet(
         user: models.User,
         event_id: uuid.UUID,
         amount: decimal.Decimal,
     ) -> models.Bets:
-        return await self.create(
-            models.Bets(
-                event_id=event_id,
-                user_id=user.id,
-                amount=amount,
-                status=enums.BetStatus.PENDING,
+        """Build a pending bet without writing it."""
+        return models.Bets(
+            event_id=event_id,
+            user_id=user.id,
+            amount=amount,
+            status=enums.BetStatus.PENDING,
+        )
+
+    async def bump_bets_versions(self, user_ids: typing.Iterable[uuid.UUID]) -> None:
+        """Bump the versions of the users' bets and notify the other workers once committed.
+
+        Must run in the transaction of the write. Rows are upserted in id order,
+        so concurrent writes to the bets of several users lock them in the same order.
+        """
+        ids = sorted(set(user_ids))
+        if not ids:
+            return
+        table = _USER_BETS_VERSIONS
+        query = sqlalchemy.dialects.postgresql.insert(table).values([{"user_id": id_, "version": 1} for id_ in ids])
+        await self.session.execute(
+            query.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={"version": table.c.version + 1, "updated_at": clock_at_utc},
             )
         )
+        await self.publish_invalidation(USER_BETS_TOPIC, [str(id_) for id_ in ids])
+
+    async def create_bet(
+        self,
+        user: models.User,
+        event_id: uuid.UUID,
+        amount: decimal.Decimal,
+    ) -> models.Bets:
+        await self.bump_bets_versions([user.id])
+        return await self.create(self.new_bet(user=user, event_id=event_id, amount=amount))
+
+    async def add_bets(self, bets: typing.Sequence[models.Bets]) -> list[models.Bets]:
+        """Insert bets, possibly of several users, in one statement."""
+        await self.bump_bets_versions(bet.user_id for bet in bets)
+        return await self.create_many(bets)
+
+    async def create_bets(
+        self,
+        user: models.User,
+        bets: typing.Sequence[tuple[uuid.UUID, decimal.Decimal]],
+    ) -> list[models.Bets]:
+        """Create bets of a user from `(event_id, amount)` pairs in one statement."""
+        return await self.add_bets([
+            self.new_bet(user=user, event_id=event_id, amount=amount) for event_id, amount in bets
+        ])
+
+    async def create_bets_isolated(
+        self,
+        user: models.User,
+        bets: typing.Sequence[tuple[uuid.UUID, decimal.Decimal]],
+    ) -> list[models.Bets | APIError]:
+        """Create bets of a user from `(event_id, amount)` pairs, reporting those that can't be created."""
+        if bets:
+            await self.bump_bets_versions([user.id])
+        return await self.create_many_isolated([
+            self.new_bet(user=user, event_id=event_id, amount=amount) for event_id, amount in bets
+        ])
 
     async def get_user_bets(
         self,
         user: models.User,
+        *,
+        limit: int | None = None,
+        after: Cursor | None = None,
         **filters: Filters,
     ) -> list[models.Bets]:
-        """Get all bets made by a user."""
+        """Get bets made by a user, newest first."""
+        filters["user_id"] = user.id
+        return await self.get_many(models.Bets, limit=limit, after=after, **filters)
+
+    async def get_user_bets_rows(
+        self,
+        user: models.User,
+        *,
+        columns: typing.Sequence[str],
+        limit: int | None = None,
+        after: Cursor | None = None,
+        **filters: Filters,
+    ) -> list[sqlalchemy.Row[typing.Any]]:
+        """Get the given columns of bets made by a user, newest first."""
         filters["user_id"] = user.id
-        return await self.get_many(models.Bets, **filters)
+        return await self.get_many_rows(models.Bets, columns=columns, limit=limit, after=after, **filters)
+
+    def stream_user_bets_rows(
+        self,
+        user: models.User,
+        *,
+        columns: typing.Sequence[str],
+        batch_size: int = 1000,
+    ) -> typing.AsyncIterator[typing.Sequence[sqlalchemy.Row[typing.Any]]]:
+        """Stream the given columns of every bet made by a user, newest first."""
+        return self.stream(models.Bets, columns=columns, batch_size=batch_size, user_id=user.id)
+
+    async def count_user_bets(self, user: models.User) -> int:
+        return await self.count(models.Bets, user_id=user.id)
+
+    async def get_user_bets_version(
+        self,
+        user: models.User,
+    ) -> typing.Annotated[tuple[int, arrow.Arrow | None], "Tuple[version, last_modified]"]:
+        """Get the version of the user's bets and when it was bumped, `(0, None)` before their first write."""
+        table = _USER_BETS_VERSIONS
+        rows = await self.session.execute(
+            sqlalchemy.select(table.c.version, table.c.updated_at).where(table.c.user_id == user.id)
+        )
+        row = rows.one_or_none()
+        return (row.version, row.updated_at) if row is not None else (0, None)
 
     async def update_bet_status(
         self,
@@ -40,18 +145,84 @@ class BetsDB(BaseDB):
         status: enums.BetStatus,
     ) -> models.Bets:
         """Update the status of a bet."""
-        bet = await self.get(models.Bets, id=bet_id)
-        if bet.status.is_final():
-            raise ClientError("Cannot update the status of a final bet.")
-        bet.status = status
-        return await self.update(bet)
+        transitioned = await self.transition_bets_status([bet_id], status)
+        if transitioned:
+            return transitioned[0]
+        # Nothing matched, tell a missing bet from a final one
+        await self.get(models.Bets, id=bet_id)
+        raise ClientError("Cannot update the status of a final bet.")
+
+    async def transition_bets_status(
+        self,
+        bet_ids: typing.Sequence[uuid.UUID],
+        status: enums.BetStatus,
+        *,
+        current: enums.BetStatus = enums.BetStatus.PENDING,
+    ) -> list[models.Bets]:
+        """Move bets from the `current` status to `status` with one conditional `UPDATE ... RETURNING`.
+
+        Bets in any other status are left untouched and omitted from the result,
+        so concurrent transitions of the same bet succeed only once.
+        """
+        if not bet_ids:
+            return []
+        rows = await self.session.scalars(
+            sqlmodel.update(models.Bets)
+            .where(
+                sqlmodel.col(models.Bets.id).in_(bet_ids),
+                sqlmodel.col(models.Bets.status) == current,
+            )
+            .values(status=status, updated_at=now_at_utc)
+            .returning(models.Bets),
+            execution_options={"synchronize_session": "fetch", "populate_existing": True},
+        )
+        transitioned = list(rows.all())
+        await self.bump_bets_versions(bet.user_id for bet in transitioned)
+        await self.session.commit()
+        return transitioned
 
-    async def update_event(
+    async def count_event_pending_bets(self, event_id: uuid.UUID) -> int:
+        return await self.count(models.Bets, event_id=event_id, status=enums.BetStatus.PENDING)
+
+    async def settle_event_bets(
         self,
         event_id: uuid.UUID,
         status: enums.EventStatus,
-    ) -> None:
-        """Update the status of all bets of an event."""
-        await self.session.execute(
-            sqlmodel.update(models.Bets).where(sqlmodel.col(models.Bets.event_id) == event_id).values(status=status)
+        *,
+        limit: int,
+        after: uuid.UUID | None = None,
+    ) -> list[uuid.UUID]:
+        """Settle the next chunk of pending bets of an event and commit it.
+
+        Bets are walked by `id` after the given one and locked with `FOR UPDATE SKIP LOCKED`,
+        so rows held by concurrent writers are left for a later pass instead of blocking the chunk.
+        Returns the ids of the settled bets.
+        """
+        table = self._get_table(models.Bets)
+        chunk = (
+            sqlalchemy.select(table.c.id)
+            .where(
+                table.c.event_id == event_id,
+                # NOTE: Inlined to match the predicate of the partial `ix_bets_event_id_id_pending` index
+                table.c.status
+                == sqlalchemy.literal(enums.BetStatus.PENDING, table.c.status.type, literal_execute=True),
+            )
+            .order_by(table.c.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if after is not None:
+            chunk = chunk.where(table.c.id > after)
+        chunk_cte = chunk.cte("chunk")
+
+        result = await self.session.execute(
+            sqlmodel.update(models.Bets)
+            .where(sqlmodel.col(models.Bets.id) == chunk_cte.c.id)
+            .values(status=status, updated_at=now_at_utc)
+            .returning(sqlmodel.col(models.Bets.id), sqlmodel.col(models.Bets.user_id)),
+            execution_options={"synchronize_session": "fetch"},
         )
+        settled = result.all()
+        await self.bump_bets_versions(user_id for _, user_id in settled)
+        await self.session.commit()
+        return [bet_id for bet_id, _ in settled]
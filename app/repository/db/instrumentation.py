@@ -0,0 +1,114 @@
+import collections
+import contextlib
+import contextvars
+import time
+import typing
+
+import attrs
+import sqlalchemy.engine
+import sqlalchemy.event
+import sqlalchemy.ext.asyncio
+from loguru import logger
+
+from app.utils.metrics import registry
+
+_STARTED_AT_KEY: typing.Final[str] = "query_started_at"
+_QUERY_DURATION: typing.Final = registry.histogram("db_query_duration_seconds", "Time to execute SQL statements.")
+
+
+@typing.final
+@attrs.define(slots=True, kw_only=True)
+class QueryStats:
+    """Statements executed within a `track_queries` block, e.g. while serving a request."""
+
+    count: int = 0
+    total: float = 0.0
+    slowest: float = 0.0
+    slowest_statement: str | None = None
+    statements: collections.Counter[str] = attrs.field(factory=collections.Counter)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.statements[statement] += 1
+        if duration > self.slowest:
+            self.slowest, self.slowest_statement = duration, statement
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Statements executed at least `threshold` times, the telltale of N+1 queries."""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+_query_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar("query_stats", default=None)
+
+
+@contextlib.contextmanager
+def track_queries() -> typing.Iterator[QueryStats]:
+    """Collect the statements executed by the current task and the tasks it spawns."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+@typing.final
+class QueryInstrumentation:
+    """Time every statement of an engine.
+
+    Statements slower than `slow_threshold` seconds are logged. Within `track_queries`,
+    statements are also added to its `QueryStats`.
+
+    Args:
+    ----
+        slow_threshold (float): duration in seconds from which a statement is logged as slow.
+        timer (Callable): monotonic clock, overridable in tests.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        slow_threshold: float = 0.2,
+        timer: typing.Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._slow_threshold = slow_threshold
+        self._timer = timer
+
+    def attach(self, engine: sqlalchemy.ext.asyncio.AsyncEngine) -> None:
+        sqlalchemy.event.listen(engine.sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        sqlalchemy.event.listen(engine.sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        sqlalchemy.event.listen(engine.sync_engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        _cursor: object,
+        _statement: str,
+        _parameters: object,
+        _context: object,
+        _executemany: bool,  # noqa: FBT001
+    ) -> None:
+        conn.info.setdefault(_STARTED_AT_KEY, []).append(self._timer())
+
+    def _after_cursor_execute(
+        self,
+        conn: sqlalchemy.engine.Connection,
+        _cursor: object,
+        statement: str,
+        _parameters: object,
+        _context: object,
+        _executemany: bool,  # noqa: FBT001
+    ) -> None:
+        duration = self._timer() - conn.info[_STARTED_AT_KEY].pop()
+        _QUERY_DURATION.observe(duration)
+        if duration >= self._slow_threshold:
+            logger.warning("slow_query", statement=statement, duration=duration)
+        if (stats := _query_stats.get()) is not None:
+            stats.record(statement, duration)
+
+    @staticmethod
+    def _handle_error(context: sqlalchemy.engine.ExceptionContext) -> None:
+        if context.connection is not None and (started_at := context.connection.info.get(_STARTED_AT_KEY)):
+            started_at.pop()
@@ -1,4 +1,19 @@
+import typing
+
+import sqlalchemy
+
+from app.repository.cache.invalidation import encode_payloads, INVALIDATION_CHANNEL
 from app.repository.db.base import BaseDB
 
+USERS_TOPIC: typing.Final[str] = "users"
+"""Invalidation topic of users, keyed by their id, or by `ALL_USERS` for every user."""
+ALL_USERS: typing.Final[str] = "*"
+
+
+def publish_users_invalidation(connection: sqlalchemy.Connection, keys: typing.Iterable[str]) -> None:
+    """Like `BaseDB.publish_invalidation`, for ORM event hooks which run on the synchronous connection."""
+    for payload in encode_payloads(USERS_TOPIC, keys):
+        connection.execute(sqlalchemy.select(sqlalchemy.func.pg_notify(INVALIDATION_CHANNEL, payload)))
+
 
 class UsersDB(BaseDB): ...
@@ -0,0 +1,41 @@
+import typing
+
+import arrow
+import attrs
+import jwt
+import pydantic
+
+from app import models
+from app.dto.entities.auth import TokenClaims
+from app.dto.exceptions import AuthenticationError
+
+
+@typing.final
+@attrs.define(slots=True, frozen=True, kw_only=True)
+class AuthService:
+    _secret_key: pydantic.SecretStr
+    _algorithm: str
+    _expiration: int
+
+    def issue_token(self, *, user: models.User) -> str:
+        return jwt.encode(
+            {
+                "sub": str(user.id),
+                "email": user.email,
+                "exp": arrow.utcnow().shift(seconds=self._expiration).int_timestamp,
+            },
+            self._secret_key.get_secret_value(),
+            algorithm=self._algorithm,
+        )
+
+    def decode_token(self, token: str) -> TokenClaims:
+        try:
+            payload = jwt.decode(
+                token,
+                self._secret_key.get_secret_value(),
+                algorithms=[self._algorithm],
+                options={"require": ["sub", "exp"]},
+            )
+            return TokenClaims.model_validate(payload)
+        except (jwt.PyJWTError, pydantic.ValidationError) as exc:
+            raise AuthenticationError("Invalid bearer token.") from exc
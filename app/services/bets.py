@@ -1,34 +1,233 @@
+import contextlib
+import functools
 import typing
 
 import attrs
+import pydantic
+import sqlalchemy
 
 from app import models
 from app.dto import commands
-from app.dto.exceptions import PermissionScopeError
+from app.dto.annotations import BetAmount
+from app.dto.entities.base import Cursor
+from app.dto.exceptions import APIError, ClientError, PermissionScopeError
 from app.repository.db import DB
+from app.settings import settings
+from app.utils import cached
+from app.utils.tracing import traced
+
+if typing.TYPE_CHECKING:
+    import decimal
+    import uuid
+
+    import arrow
+
+    from app.services.ingestion import BetsIngestionQueue, StorageFactory
+
+_Item = typing.TypeVar("_Item", models.Bets, sqlalchemy.Row[typing.Any])
+
+_bet_amount: typing.Final = pydantic.TypeAdapter(BetAmount)
+
+
+def _bets_key(user_id: str, **kwargs: typing.Any) -> str:  # noqa: ANN401
+    return repr((user_id, sorted(kwargs.items())))
+
+
+def _user_bets_key(
+    _func: typing.Callable[..., typing.Any],
+    _self: object,
+    *,
+    user: models.User,
+    **kwargs: typing.Any,  # noqa: ANN401
+) -> str:
+    return _bets_key(str(user.id), **kwargs)
 
 
 @typing.final
 @attrs.define(slots=True, frozen=True, kw_only=True)
 class BetsService:
     _bets_storage: DB
+    _ingestion: "BetsIngestionQueue | None" = None
+    _storage_factory: "StorageFactory | None" = None
+
+    @contextlib.asynccontextmanager
+    async def _own_storage(self) -> typing.AsyncIterator[DB]:
+        """Yield a repository over a session of its own, for work that may outlive the caller's session.
+
+        Cached loads are shared with concurrent callers and refreshed in background,
+        and exports are streamed once the request is over, so they must not use the request session.
+        Without a storage factory, the service's own repository is used.
+        """
+        if self._storage_factory is None:
+            yield self._bets_storage
+            return
+        async with self._storage_factory() as storage:
+            yield storage
+
+    @staticmethod
+    def _check_bet(*, user: models.User) -> None:
+        if user.is_superuser:
+            raise PermissionScopeError("Superusers are not allowed to make bets.")
+
+    @staticmethod
+    def _check_amount(amount: "decimal.Decimal") -> None:
+        try:
+            _bet_amount.validate_python(amount)
+        except pydantic.ValidationError as exc:
+            reason = exc.errors()[0]["msg"]
+            raise ClientError(f"Invalid amount: {reason}.") from exc
 
+    @traced()
     async def make_bet(
         self,
         *,
         command: commands.MakeBet,
     ) -> models.Bets:
-        if command.user.is_superuser:
-            raise PermissionScopeError("Superusers are not allowed to make bets.")
-        return await self._bets_storage.create_bet(
-            user=command.user,
-            event_id=command.event_id,
-            amount=command.amount,
+        self._check_bet(user=command.user)
+        if self._ingestion is not None:
+            bet = await self._ingestion.submit(
+                self._bets_storage.new_bet(user=command.user, event_id=command.event_id, amount=command.amount),
+            )
+        else:
+            bet = await self._bets_storage.create_bet(
+                user=command.user,
+                event_id=command.event_id,
+                amount=command.amount,
+            )
+        # NOTE: other workers are notified by the repository once the bet is committed
+        await self._bets_storage.after_commit(
+            functools.partial(user_bets_invalidation.invalidate, [str(command.user.id)])
         )
+        return bet
+
+    @traced()
+    async def make_bets(
+        self,
+        *,
+        command: commands.MakeBets,
+    ) -> list[models.Bets | APIError]:
+        """Create the bets that pass validation in a single statement.
+
+        Results follow the order of the command's bets, a bet that is rejected,
+        by validation or by the database, is reported by its error instead of failing the batch.
+        """
+        results: list[models.Bets | APIError | None] = []
+        accepted: list[tuple[int, tuple[uuid.UUID, decimal.Decimal]]] = []
+        for index, (event_id, amount) in enumerate(command.bets):
+            try:
+                self._check_bet(user=command.user)
+                self._check_amount(amount)
+            except APIError as exc:
+                results.append(exc)
+            else:
+                results.append(None)
+                accepted.append((index, (event_id, amount)))
+
+        created = await self._bets_storage.create_bets_isolated(user=command.user, bets=[bet for _, bet in accepted])
+        if any(not isinstance(result, APIError) for result in created):
+            await self._bets_storage.after_commit(
+                functools.partial(user_bets_invalidation.invalidate, [str(command.user.id)])
+            )
+        for (index, _), result in zip(accepted, created, strict=True):
+            results[index] = result
+        return typing.cast(list[models.Bets | APIError], results)
 
     async def get_user_bets(
         self,
         *,
         user: models.User,
-    ) -> list[models.Bets]:
-        return await self._bets_storage.get_user_bets(user=user)
+        limit: int,
+        cursor: Cursor | None = None,
+    ) -> typing.Annotated[tuple[list[models.Bets], Cursor | None], "Tuple[Bets, next_cursor]"]:
+        """Get a page of the user's bets and the cursor of the next page, if any."""
+        # NOTE: one extra row tells whether there is a next page without counting
+        bets = await self._bets_storage.get_user_bets(user=user, limit=limit + 1, after=cursor)
+        return self._split_page(bets, limit=limit)
+
+    @cached(ttl=settings.BETS_CACHE_TTL, key_builder=_user_bets_key)
+    async def get_user_bets_rows(  # noqa: PLR0913
+        self,
+        *,
+        user: models.User,
+        version: int,  # noqa: ARG002
+        columns: typing.Sequence[str],
+        limit: int,
+        cursor: Cursor | None = None,
+    ) -> typing.Annotated[tuple[list[sqlalchemy.Row[typing.Any]], Cursor | None], "Tuple[rows, next_cursor]"]:
+        """Get a page of the user's bets projected onto the given columns.
+
+        Cursor columns are always selected in addition to the requested ones.
+        Pages are cached under the `version` of the user's bets, see `get_user_bets_version`,
+        so every worker shares them and a new version is never served an older page.
+        """
+        async with self._own_storage() as storage:
+            rows = await storage.get_user_bets_rows(
+                user=user,
+                columns=list(dict.fromkeys([*columns, "created_at", "id"])),
+                limit=limit + 1,
+                after=cursor,
+            )
+        return self._split_page(rows, limit=limit)
+
+    @staticmethod
+    def _split_page(items: list[_Item], *, limit: int) -> tuple[list[_Item], Cursor | None]:
+        if len(items) <= limit:
+            return items, None
+        return items[:limit], Cursor.from_entity(items[limit - 1])
+
+    @cached(ttl=settings.BETS_CACHE_TTL, key_builder=_user_bets_key)
+    async def get_user_bets_version(
+        self,
+        *,
+        user: models.User,
+    ) -> typing.Annotated[tuple[int, "arrow.Arrow | None"], "Tuple[version, last_modified]"]:
+        """Get the version of the user's bets, it changes along with any page of them.
+
+        Cached until the user's bets change, so telling a client its copy is still current costs no query.
+        """
+        async with self._own_storage() as storage:
+            return await storage.get_user_bets_version(user=user)
+
+    @cached(ttl=settings.BETS_CACHE_TTL, key_builder=_user_bets_key)
+    async def count_user_bets(
+        self,
+        *,
+        user: models.User,
+        version: int,  # noqa: ARG002
+    ) -> int:
+        """Count the user's bets, cached under the `version` of them like the pages."""
+        async with self._own_storage() as storage:
+            return await storage.count_user_bets(user=user)
+
+    async def export_user_bets_rows(
+        self,
+        *,
+        user: models.User,
+        columns: typing.Sequence[str],
+        batch_size: int = settings.EXPORT_BATCH_SIZE,
+    ) -> typing.AsyncIterator[typing.Sequence[sqlalchemy.Row[typing.Any]]]:
+        """Stream all bets of the user projected onto the given columns, newest first."""
+        async with self._own_storage() as storage:
+            async for batch in storage.stream_user_bets_rows(user, columns=columns, batch_size=batch_size):
+                yield batch
+
+
+@typing.final
+class UserBetsInvalidation:
+    """Evict the cached versions of users' bets, keyed by user id, once their bets changed.
+
+    Pages and counts are cached under the version, so a new version makes them unreachable.
+    Implements `InvalidationHandler`, so it can be subscribed to the invalidation topic of bets.
+    """
+
+    @staticmethod
+    async def invalidate(keys: typing.Sequence[str]) -> None:
+        for user_id in keys:
+            await BetsService.get_user_bets_version.invalidate_key(_bets_key(user_id))
+
+    @staticmethod
+    async def clear() -> None:
+        await BetsService.get_user_bets_version.cache_clear()
+
+
+user_bets_invalidation = UserBetsInvalidation()
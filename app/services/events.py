@@ -1,26 +1,67 @@
+import time
 import typing
 
 import attrs
+from loguru import logger
 
 from app.dto import commands
+from app.dto.entities.events import SettlementProgress
 from app.repository.db import DB
+from app.utils.metrics import registry
+from app.utils.tracing import traced
+
+_BETS_SETTLED: typing.Final = registry.counter("bets_settled_total", "Bets settled by event updates.", ("status",))
+_SETTLEMENT_DURATION: typing.Final = registry.histogram(
+    "event_settlement_duration_seconds",
+    "Time to settle the pending bets of an event.",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600),
+)
 
 
 @typing.final
 @attrs.define(slots=True, frozen=True, kw_only=True)
 class EventsService:
     _events_storage: DB
+    _chunk_size: int = 1000
+    _max_passes: int = 3
 
+    @traced()
     async def update_event(
         self,
         *,
         command: commands.UpdateEvent,
-    ) -> None:
+    ) -> SettlementProgress:
+        """Settle the pending bets of an event chunk by chunk.
+
+        Every chunk is committed on its own, so a crashed settlement is resumed
+        by running it again. Bets locked by concurrent writers are skipped and
+        retried on the next pass, up to `max_passes` passes.
+        """
         # TODO (rudiemeant@gmail.com): Make sure the event is not already closed
         # When events are actually stored in the database
         # https://jira.example.com/browse/FOOBAR-123
 
-        await self._events_storage.update_event(
-            event_id=command.event_id,
-            status=command.status,
-        )
+        started_at = time.perf_counter()
+        settled_counter = _BETS_SETTLED.labels(command.status.value)
+        total = await self._events_storage.count_event_pending_bets(event_id=command.event_id)
+        progress = SettlementProgress(event_id=command.event_id, status=command.status, total=total, remaining=total)
+
+        while not progress.is_complete and progress.passes < self._max_passes:
+            progress.passes += 1
+            after = None
+            while settled := await self._events_storage.settle_event_bets(
+                event_id=command.event_id,
+                status=command.status,
+                limit=self._chunk_size,
+                after=after,
+            ):
+                after = max(settled)
+                progress.settled += len(settled)
+                settled_counter.inc(len(settled))
+                progress.chunks += 1
+                logger.info("event_settlement_progress", **progress.model_dump(mode="json"))
+            progress.remaining = await self._events_storage.count_event_pending_bets(event_id=command.event_id)
+
+        _SETTLEMENT_DURATION.observe(time.perf_counter() - started_at)
+        logger.info("event_settlement_finished", **progress.model_dump(mode="json"))
+        return progress
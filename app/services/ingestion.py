@@ -0,0 +1,102 @@
+import asyncio
+import contextlib
+import typing
+
+import attrs
+from loguru import logger
+
+from app import models
+from app.repository.db import DB
+
+StorageFactory = typing.Callable[[], typing.AsyncContextManager[DB]]
+
+
+@typing.final
+@attrs.frozen(slots=True)
+class _PendingBet:
+    bet: models.Bets
+    future: asyncio.Future[models.Bets]
+
+
+@typing.final
+@attrs.define(slots=True, kw_only=True)
+class BetsIngestionQueue:
+    """Coalesce bets of concurrent requests into multi-row inserts.
+
+    A flusher task collects queued bets until `max_batch` of them are pending
+    or `max_delay` seconds passed since the first one, and writes them in one transaction.
+    Callers wait until that transaction is committed, so a returned bet is as
+    durable as one written by its own transaction.
+    """
+
+    _storage: StorageFactory
+    _max_batch: int = 500
+    _max_delay: float = 0.005
+    _queue: asyncio.Queue[_PendingBet] = attrs.field(init=False, factory=asyncio.Queue)
+    _flusher: asyncio.Task[None] | None = attrs.field(init=False, default=None)
+
+    async def submit(self, bet: models.Bets) -> models.Bets:
+        """Queue a bet and wait until it is stored."""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run(), name="bets_ingestion_flusher")
+        future: asyncio.Future[models.Bets] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingBet(bet=bet, future=future))
+        return await future
+
+    async def close(self) -> None:
+        """Flush queued bets and stop the flusher."""
+        if self._flusher is None:
+            return
+        await self._queue.join()
+        self._flusher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._flusher
+        self._flusher = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_delay
+            while len(batch) < self._max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: list[_PendingBet]) -> None:
+        try:
+            async with self._storage() as db:
+                created = await db.add_bets([pending.bet for pending in batch])
+        except Exception as exc:  # noqa: BLE001
+            if len(batch) == 1:
+                self._resolve(batch[0], exc)
+                return
+            # NOTE: Retry one by one, so a bad bet does not fail the rest of the batch
+            logger.warning("bets_ingestion_batch_failed", size=len(batch), error=str(exc))
+            for pending in batch:
+                await self._flush([pending])
+            return
+        for pending, bet in zip(batch, created, strict=True):
+            self._resolve(pending, bet)
+
+    @staticmethod
+    def _resolve(pending: _PendingBet, result: models.Bets | Exception) -> None:
+        # The caller may have gone away, its bet is stored regardless
+        if pending.future.done():
+            return
+        if isinstance(result, Exception):
+            pending.future.set_exception(result)
+        else:
+            pending.future.set_result(result)
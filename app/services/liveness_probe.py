@@ -1,8 +1,10 @@
+import asyncio
+import contextlib
+import time
 import typing
 
 import attrs
-
-from app.utils import cached
+from loguru import logger
 
 
 class LivenessProbeInterface(typing.Protocol):
@@ -10,20 +12,82 @@ class LivenessProbeInterface(typing.Protocol):
 
 
 @typing.final
-@attrs.define(slots=True, frozen=True, kw_only=True)
+@attrs.frozen(slots=True, kw_only=True)
+class ProbeStatus:
+    """Outcome of the last probe of a resource."""
+
+    alive: bool
+    latency: float
+    checked_at: float
+    error: str | None = None
+
+
+@typing.final
+@attrs.define(slots=True, kw_only=True)
 class LivenessProbeSrv:
-    _resources: typing.Mapping[str, LivenessProbeInterface]
+    """Probe resources concurrently in background and keep their last known status.
+
+    Reads are in-memory only. A status older than `max_age` intervals counts as dead,
+    so a stuck poller is reported instead of its last good result.
+    """
 
-    def __getitem__(self, service: str) -> LivenessProbeInterface:
-        return self._resources[service]
+    _resources: typing.Mapping[str, LivenessProbeInterface]
+    _interval: float = 5.0
+    _timeout: float = 2.0
+    _max_age: int = 3
+    _timer: typing.Callable[[], float] = time.monotonic
+    _statuses: dict[str, ProbeStatus] = attrs.field(init=False, factory=dict)
+    _task: asyncio.Task[None] | None = attrs.field(init=False, default=None)
 
     def __contains__(self, service: str) -> bool:
         return service in self._resources
 
-    @cached()
-    async def is_alive(self, service: str) -> bool:
-        return await self._resources[service].is_alive()
+    def status(self, service: str) -> ProbeStatus | None:
+        return self._statuses.get(service)
+
+    def is_alive(self, service: str) -> bool:
+        status = self._statuses.get(service)
+        return (
+            status is not None and status.alive and self._timer() - status.checked_at <= self._interval * self._max_age
+        )
+
+    def all_alive(self) -> bool:
+        return all(self.is_alive(service) for service in self._resources)
+
+    async def probe_all(self) -> None:
+        statuses = await asyncio.gather(*(self._probe(resource) for resource in self._resources.values()))
+        self._statuses.update(zip(self._resources, statuses, strict=True))
+
+    async def start(self) -> None:
+        """Probe once, so statuses are known before serving, then keep probing in background."""
+        if self._task is not None:
+            return
+        await self.probe_all()
+        self._task = asyncio.create_task(self._poll(), name="liveness_probe_poller")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            await self.probe_all()
 
-    @cached()
-    async def all_alive(self) -> bool:
-        return all([await self.is_alive(service=service) for service in self._resources])
+    async def _probe(self, resource: LivenessProbeInterface) -> ProbeStatus:
+        started_at = self._timer()
+        error = None
+        try:
+            async with asyncio.timeout(self._timeout):
+                alive = await resource.is_alive()
+        except TimeoutError:
+            alive, error = False, f"Timed out after {self._timeout}s"
+        except Exception as exc:  # noqa: BLE001
+            logger.exception(exc)
+            alive, error = False, str(exc)
+        checked_at = self._timer()
+        return ProbeStatus(alive=alive, latency=checked_at - started_at, checked_at=checked_at, error=error)
@@ -2,41 +2,114 @@ import contextlib
 import typing
 
 from app import logs
-from app.repository.db import DatabaseSessionManager, DB
-from app.services.bets import BetsService
+from app.repository.cache import InvalidationBus
+from app.repository.db import DatabaseSessionManager, DB, QueryInstrumentation
+from app.repository.db.bets import USER_BETS_TOPIC
+from app.repository.db.users import USERS_TOPIC
+from app.services.auth import AuthService
+from app.services.bets import BetsService, user_bets_invalidation
+from app.services.ingestion import BetsIngestionQueue
 from app.services.liveness_probe import LivenessProbeInterface, LivenessProbeSrv
+from app.services.users import register_cache_invalidation, UsersCache, UsersCacheInvalidation
 from app.settings import settings
+from app.utils import metrics, tracing
+from app.utils.cache import cache_options
+
+
+def initialize_sessionmanager(manager: DatabaseSessionManager) -> None:
+    """Create the process-wide engine with a pool configured from settings."""
+    manager.initialize(
+        url=str(settings.ASYNC_DATABASE_URI),
+        instrumentation=QueryInstrumentation(slow_threshold=settings.POSTGRES_SLOW_QUERY_THRESHOLD),
+        echo=settings.POSTGRES_ECHO,
+        future=True,
+        **settings.DATABASE_POOL_OPTIONS,
+    )
+
 
 # Dependencies Layer
 sessionmanager = DatabaseSessionManager()
-sessionmanager.initialize(
-    url=str(settings.ASYNC_DATABASE_URI),
-    echo=True,
-    future=True,
-)
+initialize_sessionmanager(sessionmanager)
 session = sessionmanager.create_session()
-cache = settings.CACHE_TYPE()
+cache = settings.CACHE_TYPE(**cache_options(settings.CACHE_TYPE))
+users_cache = UsersCache(maxsize=settings.USERS_CACHE_SIZE, ttl=settings.USERS_CACHE_TTL)
+register_cache_invalidation(users_cache)
+invalidation_bus = InvalidationBus(dsn=str(settings.DATABASE_URI))
+invalidation_bus.subscribe(USER_BETS_TOPIC, user_bets_invalidation)
+invalidation_bus.subscribe(USERS_TOPIC, UsersCacheInvalidation(users_cache))
 
 
 # Repository Layer
 db = DB(session=session)
 
+
+@contextlib.asynccontextmanager
+async def standalone_db() -> typing.AsyncIterator[DB]:
+    """Yield a repository over its own session, outside of any request transaction."""
+    async with sessionmanager.session() as _session:
+        yield DB(session=_session)
+
+
 # Service Layer
-bets_service = BetsService(bets_storage=db)
+bets_ingestion = (
+    BetsIngestionQueue(
+        storage=standalone_db,
+        max_batch=settings.BETS_INGESTION_MAX_BATCH,
+        max_delay=settings.BETS_INGESTION_MAX_DELAY,
+    )
+    if settings.BETS_INGESTION_ENABLED
+    else None
+)
+bets_service = BetsService(bets_storage=db, ingestion=bets_ingestion, storage_factory=standalone_db)
+auth_service = AuthService(
+    secret_key=settings.SECRET_KEY,
+    algorithm=settings.JWT_ALGORITHM,
+    expiration=settings.JWT_EXPIRATION,
+)
 
 
 liveness_probe_resources: typing.Mapping[str, LivenessProbeInterface] = {
-    "db": db,
+    "db": sessionmanager,
 }
-liveness_probe_service = LivenessProbeSrv(resources=liveness_probe_resources)
+liveness_probe_service = LivenessProbeSrv(
+    resources=liveness_probe_resources,
+    interval=settings.HEALTH_POLL_INTERVAL,
+    timeout=settings.HEALTH_PROBE_TIMEOUT,
+)
+
+metrics.registry.on_collect(sessionmanager.collect_metrics)
+metrics_aggregator = metrics.MetricsAggregator(
+    metrics.registry,
+    directory=settings.METRICS_DIR,
+    interval=settings.METRICS_INTERVAL,
+)
+
+span_exporter: tracing.SpanExporter
+if settings.TRACING_EXPORTER == "file":
+    span_exporter = tracing.JSONFileExporter(settings.TRACING_FILE)
+else:
+    span_exporter = tracing.RingBufferExporter(maxsize=settings.TRACING_BUFFER_SIZE)
+tracing.tracer.configure(exporter=span_exporter, sample_rate=settings.TRACING_SAMPLE_RATE)
 
 
 async def startup() -> None:
     logs.setup_logging()
+    if not sessionmanager.is_initialized:
+        initialize_sessionmanager(sessionmanager)
     await session.begin()
+    invalidation_bus.start()
+    await liveness_probe_service.start()
+    metrics_aggregator.start()
+    span_exporter.start()
 
 
 async def shutdown() -> None:
+    await metrics_aggregator.stop()
+    span_exporter.stop()
+    await liveness_probe_service.stop()
+    await invalidation_bus.stop()
+    if bets_ingestion is not None:
+        await bets_ingestion.close()
     await cache.close()
     await session.close()
     await sessionmanager.close()
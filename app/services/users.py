@@ -0,0 +1,99 @@
+import typing
+import uuid
+
+import attrs
+import sqlalchemy.event
+import sqlalchemy.orm
+
+from app import models
+from app.dto.entities.auth import TokenClaims
+from app.repository.db.users import ALL_USERS, publish_users_invalidation
+from app.services.ingestion import StorageFactory
+from app.utils import TTLCache
+from app.utils.tracing import traced
+
+UsersCache = TTLCache[uuid.UUID, models.User]
+
+
+@typing.final
+@attrs.define(slots=True, frozen=True, kw_only=True)
+class UsersService:
+    _storage_factory: StorageFactory
+    _cache: UsersCache
+
+    @traced()
+    async def get_user(
+        self,
+        *,
+        claims: TokenClaims,
+    ) -> models.User:
+        """Resolve the user the token was issued to, creating it on first sight.
+
+        Users are served from the in-process cache when possible,
+        so authenticated requests usually don't touch the database.
+        A missing user is created and committed in a transaction of its own rather than the request's,
+        so work running outside of the request transaction, e.g. bets ingestion, can reference it at once.
+        """
+        user = self._cache.get(claims.sub)
+        if user is not None:
+            return user
+        async with self._storage_factory() as storage:
+            user, _ = await storage.get_or_create(
+                models.User,
+                id=claims.sub,
+                email=claims.email,
+            )
+            await storage.session.commit()
+            # NOTE: detach the user so a rollback of the session doesn't expire the cached instance
+            storage.session.expunge(user)
+        self._cache.set(user.id, user)
+        return user
+
+
+@typing.final
+@attrs.frozen(slots=True)
+class UsersCacheInvalidation:
+    """Evict users cached by this worker once any worker commits changes to them.
+
+    Implements `InvalidationHandler` for the `USERS_TOPIC` of the invalidation bus.
+    """
+
+    _cache: UsersCache
+
+    async def invalidate(self, keys: typing.Sequence[str]) -> None:
+        if ALL_USERS in keys:
+            await self.clear()
+            return
+        for key in keys:
+            self._cache.pop(uuid.UUID(key))
+
+    async def clear(self) -> None:
+        self._cache.clear()
+
+
+def register_cache_invalidation(cache: UsersCache) -> None:
+    """Evict cached users whenever they are updated or deleted.
+
+    Flushed changes evict the affected user only, `INSERT` (an upsert may update users),
+    `UPDATE` and `DELETE` statements against users clear the whole cache. The changes are
+    published on the invalidation bus as well, so other workers evict them once committed,
+    see `UsersCacheInvalidation`.
+    """
+
+    def _evict(
+        _mapper: sqlalchemy.orm.Mapper[models.User], connection: sqlalchemy.Connection, target: models.User
+    ) -> None:
+        cache.pop(target.id)
+        publish_users_invalidation(connection, [str(target.id)])
+
+    def _clear(orm_execute_state: sqlalchemy.orm.ORMExecuteState) -> None:
+        if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_ is models.User:
+            cache.clear()
+            publish_users_invalidation(orm_execute_state.session.connection(), [ALL_USERS])
+
+    sqlalchemy.event.listen(models.User, "after_update", _evict)
+    sqlalchemy.event.listen(models.User, "after_delete", _evict)
+    sqlalchemy.event.listen(sqlalchemy.orm.Session, "do_orm_execute", _clear)
@@ -14,6 +14,15 @@ class DatabaseSettings(pydantic_settings.BaseSettings):
     POSTGRES_PASSWORD: pydantic.SecretStr
     POSTGRES_NAME: str
 
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_POOL_MAX_OVERFLOW: int = 20
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    POSTGRES_POOL_RECYCLE: int = 1800
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_ECHO: bool = False
+    POSTGRES_SLOW_QUERY_THRESHOLD: float = 0.2
+    POSTGRES_REPEATED_QUERY_THRESHOLD: int = 5
+
     @property
     def ASYNC_DATABASE_URI(self) -> pydantic.PostgresDsn:  # noqa: N802
         return pydantic.PostgresDsn.build(
@@ -36,6 +45,17 @@ class DatabaseSettings(pydantic_settings.BaseSettings):
             path=self.POSTGRES_NAME,
         )
 
+    @property
+    def DATABASE_POOL_OPTIONS(self) -> dict[str, int | float | bool]:  # noqa: N802
+        """Keyword arguments for the process-wide engine connection pool."""
+        return {
+            "pool_size": self.POSTGRES_POOL_SIZE,
+            "max_overflow": self.POSTGRES_POOL_MAX_OVERFLOW,
+            "pool_timeout": self.POSTGRES_POOL_TIMEOUT,
+            "pool_recycle": self.POSTGRES_POOL_RECYCLE,
+            "pool_pre_ping": self.POSTGRES_POOL_PRE_PING,
+        }
+
 
 class AppSettings(pydantic_settings.BaseSettings):
     ENVIRONMENT: typing.Literal["stage", "prod"]
@@ -45,7 +65,48 @@ class AppSettings(pydantic_settings.BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION: int
 
-    CACHE_TYPE: type[aiocache.BaseCache] = aiocache.Cache.MEMORY
+    CACHE_TYPE: pydantic.ImportString[type[aiocache.BaseCache]] = pydantic.Field(  # type: ignore[assignment]
+        default="app.repository.cache.BoundedMemoryCache",
+        validate_default=True,
+    )
+    CACHE_LOCAL_MAXSIZE: int = 1024
+    # NOTE: limits of each bounded memory cache, i.e. of every `cached` function and of the process-wide
+    # cache separately, a process with N cached functions may hold up to N + 1 times CACHE_MAX_BYTES
+    CACHE_MAX_ENTRIES: int = 10_000
+    CACHE_MAX_BYTES: int | None = 64 * 1024 * 1024
+    CACHE_EVICTION: typing.Literal["lru", "lfu"] = "lru"
+
+    LOG_QUEUE_SIZE: int = 10_000
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SAMPLE_RATES: dict[str, float] = {}
+
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+    EXPORT_BATCH_SIZE: int = 1000
+
+    USERS_CACHE_SIZE: int = 10_000
+    USERS_CACHE_TTL: int = 300
+
+    BETS_CACHE_TTL: int = 300
+
+    HEALTH_POLL_INTERVAL: float = 5.0
+    HEALTH_PROBE_TIMEOUT: float = 2.0
+
+    # NOTE: set to a directory shared by the workers, e.g. on tmpfs, to aggregate their metrics
+    METRICS_DIR: str | None = None
+    METRICS_INTERVAL: float = 5.0
+
+    TRACING_SAMPLE_RATE: float = 0.0
+    TRACING_EXPORTER: typing.Literal["memory", "file"] = "memory"
+    TRACING_BUFFER_SIZE: int = 10_000
+    TRACING_FILE: str = "traces.jsonl"
+
+    SETTLEMENT_CHUNK_SIZE: int = 1000
+    SETTLEMENT_MAX_PASSES: int = 3
+
+    BETS_INGESTION_ENABLED: bool = False
+    BETS_INGESTION_MAX_BATCH: int = 500
+    BETS_INGESTION_MAX_DELAY: float = 0.005
 
     @property
     def is_dev(self) -> bool:
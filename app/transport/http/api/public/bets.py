@@ -4,11 +4,23 @@ import fastapi
 
 from app import models
 from app.dto import commands
-from app.dto.entities.base import Page
+from app.dto.entities.base import Cursor, Page
+from app.dto.exceptions import APIError
 from app.services.bets import BetsService
+from app.settings import settings
 from app.transport.http import dependencies, schema
+from app.transport.http.responses import (
+    etag_matches,
+    ExportFormat,
+    make_etag,
+    RowsEncoder,
+    RowsStreamEncoder,
+    validator_headers,
+)
 
 router = fastapi.APIRouter(tags=["bets"])
+_bets_encoder: typing.Final = RowsEncoder(schema.bets.Bet)
+_bets_export_encoder: typing.Final = RowsStreamEncoder(schema.bets.ExportedBet)
 
 
 @router.post(
@@ -37,12 +49,102 @@ async def make_bet(
     return schema.bets.MakeBetResponse.model_validate(bet, from_attributes=True)
 
 
+@router.post(
+    path="/v1/bets:batch",
+    summary="Make several bets at once",
+    responses=schema.error.Responses,
+    status_code=fastapi.status.HTTP_201_CREATED,
+)
+async def make_bets(
+    req: schema.bets.MakeBetsRequest,
+    user: typing.Annotated[
+        models.User,
+        fastapi.Depends(dependencies.get_current_user),
+    ],
+    bets_service: typing.Annotated[
+        BetsService,
+        fastapi.Depends(dependencies.bets_service),
+    ],
+) -> schema.bets.MakeBetsResponse:
+    command = commands.MakeBets(
+        user=user,
+        bets=[(item.event_id, item.amount) for item in req.items],
+    )
+    results = await bets_service.make_bets(command=command)
+    return schema.bets.MakeBetsResponse(
+        items=[
+            schema.bets.MakeBetsResultItem(
+                error=schema.error.APIErrorResponseProtocol(code=result.code, detail=result.detail),
+            )
+            if isinstance(result, APIError)
+            else schema.bets.MakeBetsResultItem(
+                bet=schema.bets.MakeBetResponse.model_validate(result, from_attributes=True),
+            )
+            for result in results
+        ]
+    )
+
+
 @router.get(
     path="/v1/bets",
     summary="Get all bets",
+    description="Answer `304 Not Modified` when the `ETag` given in `If-None-Match` is still current.",
+    response_model=Page[schema.bets.Bet],
+    responses=schema.error.Responses,
+)
+async def get_bets(  # noqa: PLR0913, PLR0917
+    user: typing.Annotated[
+        models.User,
+        fastapi.Depends(dependencies.get_current_user),
+    ],
+    bets_service: typing.Annotated[
+        BetsService,
+        fastapi.Depends(dependencies.bets_service),
+    ],
+    limit: typing.Annotated[
+        int,
+        fastapi.Query(ge=1, le=settings.PAGE_SIZE_MAX, description="Maximum number of bets to return"),
+    ] = settings.PAGE_SIZE_DEFAULT,
+    cursor: typing.Annotated[
+        str | None,
+        fastapi.Query(description="`nextCursor` of the previous page"),
+    ] = None,
+    with_total: typing.Annotated[  # noqa: FBT002
+        bool,
+        fastapi.Query(alias="withTotal", description="Count all bets of the user"),
+    ] = False,
+    if_none_match: typing.Annotated[
+        str | None,
+        fastapi.Header(description="`ETag` of the copy held by the client"),
+    ] = None,
+) -> fastapi.Response:
+    version, last_modified = await bets_service.get_user_bets_version(user=user)
+    headers = validator_headers(make_etag(version, limit, cursor, with_total), last_modified)
+    if etag_matches(headers["ETag"], if_none_match):
+        return fastapi.Response(status_code=fastapi.status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    rows, next_cursor = await bets_service.get_user_bets_rows(
+        user=user,
+        version=version,
+        columns=_bets_encoder.columns,
+        limit=limit,
+        cursor=Cursor.decode(cursor) if cursor is not None else None,
+    )
+    # NOTE: rows are encoded as is, the response model is documented but not validated
+    total = await bets_service.count_user_bets(user=user, version=version) if with_total else None
+    response = _bets_encoder.page(rows, total=total, next_cursor=next_cursor)
+    response.headers.update(headers)
+    return response
+
+
+@router.get(
+    path="/v1/bets/export",
+    summary="Export all bets",
+    description="Stream every bet of the user, newest first, as NDJSON or CSV lines of `ExportedBet`.",
+    response_class=fastapi.responses.StreamingResponse,
     responses=schema.error.Responses,
 )
-async def get_bets(
+async def export_bets(
     user: typing.Annotated[
         models.User,
         fastapi.Depends(dependencies.get_current_user),
@@ -51,7 +153,11 @@ async def get_bets(
         BetsService,
         fastapi.Depends(dependencies.bets_service),
     ],
-) -> Page[schema.bets.Bet]:
-    bets = await bets_service.get_user_bets(user=user)
-    items = [schema.bets.Bet.model_validate(bet, from_attributes=True) for bet in bets]
-    return Page[schema.bets.Bet].create(items)
+    format_: typing.Annotated[
+        ExportFormat,
+        fastapi.Query(alias="format", description="Format of the exported file"),
+    ] = "ndjson",
+) -> fastapi.responses.StreamingResponse:
+    # NOTE: the body is sent once the request's dependencies are closed, batches are read over a session of their own
+    batches = bets_service.export_user_bets_rows(user=user, columns=_bets_export_encoder.columns)
+    return _bets_export_encoder.response(batches, format_=format_, filename="bets")
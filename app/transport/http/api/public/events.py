@@ -15,17 +15,27 @@ router = fastapi.APIRouter(tags=["events"])
 @router.put(
     path="/v1/events/{event_id}",
     summary="Update an event",
-    responses=schema.error.Responses,
+    responses={
+        **schema.error.Responses,
+        fastapi.status.HTTP_202_ACCEPTED: {
+            "model": schema.events.EventSettlement,
+            "description": "Some pending bets are still to be settled, update the event again to resume",
+        },
+    },
     status_code=fastapi.status.HTTP_201_CREATED,
 )
 async def update_event(
     event_id: typing.Annotated[uuid.UUID, fastapi.Path(..., description="Event ID")],
     req: schema.events.UpdateEventRequest,
+    response: fastapi.Response,
     user: typing.Annotated[models.User, fastapi.Depends(dependencies.get_current_user)],
     events_service: typing.Annotated[EventsService, fastapi.Depends(dependencies.events_service)],
-) -> schema.events.Event:
+) -> schema.events.Event | schema.events.EventSettlement:
     if not user.is_superuser:
         raise PermissionScopeError("Only superusers can update events.")
     command = commands.UpdateEvent(event_id=event_id, status=req.status)
-    await events_service.update_event(command=command)
+    progress = await events_service.update_event(command=command)
+    if not progress.is_complete:
+        response.status_code = fastapi.status.HTTP_202_ACCEPTED
+        return schema.events.EventSettlement(id=event_id, status=req.status, remaining=progress.remaining)
     return schema.events.Event(id=event_id, status=req.status)
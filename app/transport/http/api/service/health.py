@@ -27,7 +27,7 @@ class StatusResponse(pydantic.BaseModel):
 async def get_api_status(
     liveness_probe_service: typing.Annotated[LivenessProbeSrv, fastapi.Depends(dependencies.liveness_probe_service)],
 ) -> fastapi.responses.ORJSONResponse:
-    if await liveness_probe_service.all_alive():
+    if liveness_probe_service.all_alive():
         return fastapi.responses.ORJSONResponse({"status": "ok"})
     return fastapi.responses.ORJSONResponse(
         {"status": "error"},
@@ -50,7 +50,7 @@ async def get_service_status(
 ) -> fastapi.responses.ORJSONResponse:
     if service not in liveness_probe_service:
         raise NotFoundError(f"Service {service} not found")
-    if await liveness_probe_service.is_alive(service=service):
+    if liveness_probe_service.is_alive(service=service):
         return fastapi.responses.ORJSONResponse({"status": "ok"})
     return fastapi.responses.ORJSONResponse(
         {"status": "error"},
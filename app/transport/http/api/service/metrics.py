@@ -0,0 +1,24 @@
+import typing
+
+import fastapi
+
+from app.transport.http import dependencies
+from app.utils.metrics import CONTENT_TYPE, MetricsAggregator
+
+router: typing.Final = fastapi.APIRouter()
+
+
+@router.get(
+    "/metrics",
+    response_class=fastapi.responses.PlainTextResponse,
+    responses={
+        fastapi.status.HTTP_200_OK: {
+            "description": "Metrics of every worker in the Prometheus text format",
+            "content": {CONTENT_TYPE: {}},
+        },
+    },
+)
+async def get_metrics(
+    metrics_aggregator: typing.Annotated[MetricsAggregator, fastapi.Depends(dependencies.metrics_aggregator)],
+) -> fastapi.responses.PlainTextResponse:
+    return fastapi.responses.PlainTextResponse(await metrics_aggregator.render(), media_type=CONTENT_TYPE)
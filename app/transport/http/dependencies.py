@@ -1,36 +1,36 @@
 import typing
-import uuid
 
 import fastapi
 import fastapi.security
 import sqlalchemy.ext.asyncio
 
 from app import models
+from app.dto.entities.auth import TokenClaims
+from app.dto.exceptions import AuthenticationError
 from app.repository.db import DatabaseSessionManager, DB
+from app.services import service
+from app.services.auth import AuthService
 from app.services.bets import BetsService
 from app.services.events import EventsService
+from app.services.ingestion import StorageFactory
 from app.services.liveness_probe import LivenessProbeSrv
+from app.services.users import UsersService
 from app.settings import Settings
 from app.settings import settings as global_settings
+from app.utils.metrics import MetricsAggregator
+from app.utils.tracing import traced
 
 
 def settings() -> Settings:
     return global_settings
 
 
-async def session_manager(
-    settings: typing.Annotated[Settings, fastapi.Depends(settings)],
-) -> typing.AsyncGenerator[DatabaseSessionManager, None]:
-    manager = DatabaseSessionManager()
-    manager.initialize(
-        url=str(settings.ASYNC_DATABASE_URI),
-        echo=False,
-        future=True,
-    )
-    yield manager
-    await manager.close()
+def session_manager() -> DatabaseSessionManager:
+    """Return the process-wide session manager initialized on startup."""
+    return service.sessionmanager
 
 
+@traced()
 async def db_session(
     session_manager: typing.Annotated[DatabaseSessionManager, fastapi.Depends(session_manager)],
 ) -> typing.AsyncGenerator[sqlalchemy.ext.asyncio.AsyncSession, None]:
@@ -41,45 +41,88 @@ async def db_session(
         yield _session
 
 
+@traced()
+async def standalone_db_session(
+    session_manager: typing.Annotated[DatabaseSessionManager, fastapi.Depends(session_manager)],
+) -> typing.AsyncGenerator[sqlalchemy.ext.asyncio.AsyncSession, None]:
+    """Yield a session that is not wrapped into the request transaction, its commits are applied at once."""
+    async with session_manager.session() as _session:
+        yield _session
+
+
 def db(
     db_session: typing.Annotated[sqlalchemy.ext.asyncio.AsyncSession, fastapi.Depends(db_session)],
 ) -> DB:
     return DB(session=db_session)
 
 
+def db_factory() -> StorageFactory:
+    """Return a factory of repositories over their own session, for work outliving the request's session.
+
+    E.g. cached loads shared between requests and streamed responses.
+    """
+    return service.standalone_db
+
+
 def bets_service(
     db: typing.Annotated[DB, fastapi.Depends(db)],
+    db_factory: typing.Annotated[StorageFactory, fastapi.Depends(db_factory)],
 ) -> BetsService:
-    return BetsService(bets_storage=db)
+    return BetsService(bets_storage=db, ingestion=service.bets_ingestion, storage_factory=db_factory)
+
+
+def standalone_db(
+    db_session: typing.Annotated[sqlalchemy.ext.asyncio.AsyncSession, fastapi.Depends(standalone_db_session)],
+) -> DB:
+    return DB(session=db_session)
 
 
 def events_service(
-    db: typing.Annotated[DB, fastapi.Depends(db)],
+    db: typing.Annotated[DB, fastapi.Depends(standalone_db)],
+    settings: typing.Annotated[Settings, fastapi.Depends(settings)],
 ) -> EventsService:
-    return EventsService(events_storage=db)
+    return EventsService(
+        events_storage=db,
+        chunk_size=settings.SETTLEMENT_CHUNK_SIZE,
+        max_passes=settings.SETTLEMENT_MAX_PASSES,
+    )
 
 
-def liveness_resources(
-    db: typing.Annotated[DB, fastapi.Depends(db)],
-) -> dict[str, typing.Any]:
-    return {
-        "db": db,
-    }
+def liveness_probe_service() -> LivenessProbeSrv:
+    """Return the process-wide poller, its statuses are read without touching the resources."""
+    return service.liveness_probe_service
+
+
+def metrics_aggregator() -> MetricsAggregator:
+    return service.metrics_aggregator
+
 
+def users_service(
+    db_factory: typing.Annotated[StorageFactory, fastapi.Depends(db_factory)],
+) -> UsersService:
+    return UsersService(storage_factory=db_factory, cache=service.users_cache)
 
-def liveness_probe_service(
-    liveness_resources: typing.Annotated[dict[str, typing.Any], fastapi.Depends(liveness_resources)],
-) -> LivenessProbeSrv:
-    return LivenessProbeSrv(resources=liveness_resources)
 
+def auth_service() -> AuthService:
+    return service.auth_service
 
+
+bearer = fastapi.security.HTTPBearer(auto_error=False)
+
+
+@traced()
+def get_token_claims(
+    credentials: typing.Annotated[fastapi.security.HTTPAuthorizationCredentials | None, fastapi.Depends(bearer)],
+    auth_service: typing.Annotated[AuthService, fastapi.Depends(auth_service)],
+) -> TokenClaims:
+    if credentials is None:
+        raise AuthenticationError("Missing bearer token.")
+    return auth_service.decode_token(credentials.credentials)
+
+
+@traced()
 async def get_current_user(
-    db: typing.Annotated[DB, fastapi.Depends(db)],
+    claims: typing.Annotated[TokenClaims, fastapi.Depends(get_token_claims)],
+    users_service: typing.Annotated[UsersService, fastapi.Depends(users_service)],
 ) -> models.User:
-    user, _is_created = await db.get_or_create(
-        models.User,
-        id=uuid.UUID("00000000-0000-0000-0000-000000000000"),
-        email="test@mail.com",
-        is_superuser=False,
-    )
-    return user
+    return await users_service.get_user(claims=claims)
@@ -3,8 +3,24 @@ import typing
 
 import fastapi
 import fastapi.middleware.cors
+import starlette.datastructures
+import starlette.requests
+import starlette.types
 from loguru import logger
 
+from app.logs import AccessLogSampler
+from app.repository.db import QueryStats, track_queries
+from app.settings import settings
+from app.utils.metrics import registry
+from app.utils.tracing import tracer
+
+_QUERY_STATS_SCOPE_KEY: typing.Final[str] = "query_stats"
+_REQUEST_DURATION: typing.Final = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to serve HTTP requests, by route template.",
+    ("method", "route", "status"),
+)
+
 
 def register_middlewares(app: fastapi.FastAPI) -> None:
     app.add_middleware(
@@ -14,24 +30,180 @@ def register_middlewares(app: fastapi.FastAPI) -> None:
         allow_methods=["*"],
         allow_headers=["*"],
     )
-    app.middleware("http")(_log_request)
-
-
-async def _log_request(
-    request: fastapi.Request,
-    call_next: typing.Callable[..., typing.Awaitable[fastapi.Response]],
-) -> fastapi.Response:
-    start_time = time.time()
-    response: fastapi.Response = await call_next(request)
-    route = request.scope.get("route")
-    logger.info(
-        "api_request",
-        path=route.path if route else "",
-        url=str(request.url),
-        http_method=request.method,
-        http_status=response.status_code,
-        path_params=request.path_params,
-        query_params=dict(request.query_params),
-        process_time=time.time() - start_time,
+    app.add_middleware(TracingMiddleware)
+    app.add_middleware(QueryTimingMiddleware, repeated_threshold=settings.POSTGRES_REPEATED_QUERY_THRESHOLD)
+    app.add_middleware(
+        RequestLoggingMiddleware,
+        sampler=AccessLogSampler(settings.ACCESS_LOG_SAMPLE_RATES, default=settings.ACCESS_LOG_SAMPLE_RATE),
     )
-    return response
+
+
+@typing.final
+class RequestLoggingMiddleware:
+    """Log an `api_request` line per HTTP request and record its duration.
+
+    A plain ASGI middleware: status and sizes are read from the messages passing through
+    `receive` and `send`, bodies are neither buffered nor copied, and no task is spawned
+    per request as with `BaseHTTPMiddleware`.
+
+    Args:
+    ----
+        app (ASGIApp): wrapped application.
+        sampler (Callable): tells from the route and status whether the request is logged,
+            every request is by default.
+        timer (Callable): monotonic clock, overridable in tests.
+
+    """
+
+    def __init__(
+        self,
+        app: starlette.types.ASGIApp,
+        *,
+        sampler: typing.Callable[[str, int], bool] | None = None,
+        timer: typing.Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._app = app
+        self._sampler = sampler
+        self._timer = timer
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        started_at = self._timer()
+        first_byte_at: float | None = None
+        status = fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
+        request_size = response_size = 0
+
+        async def _receive() -> starlette.types.Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def _send(message: starlette.types.Message) -> None:
+            nonlocal first_byte_at, status, response_size
+            if message["type"] == "http.response.start":
+                first_byte_at = self._timer()
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self._app(scope, _receive, _send)
+        finally:
+            finished_at = self._timer()
+            # NOTE: the router stores the matched route in the scope it shares with us
+            route = getattr(scope.get("route"), "path", "")
+            _REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(finished_at - started_at)
+            if self._sampler is None or self._sampler(route, status):
+                connection = starlette.requests.HTTPConnection(scope)
+                stats: QueryStats | None = scope.get(_QUERY_STATS_SCOPE_KEY)
+                logger.info(
+                    "api_request",
+                    path=route,
+                    url=str(connection.url),
+                    http_method=scope["method"],
+                    http_status=status,
+                    path_params=scope.get("path_params", {}),
+                    query_params=dict(connection.query_params),
+                    request_size=request_size,
+                    response_size=response_size,
+                    time_to_first_byte=(first_byte_at or finished_at) - started_at,
+                    process_time=finished_at - started_at,
+                    db_queries=stats.count if stats else None,
+                    db_time=stats.total if stats else None,
+                )
+
+
+@typing.final
+class QueryTimingMiddleware:
+    """Collect the database statements of each HTTP request.
+
+    Their count and duration are added to the response as a `Server-Timing` header,
+    and statements executed at least `repeated_threshold` times, typically N+1 queries,
+    are logged. The `QueryStats` are left in the scope for `RequestLoggingMiddleware`.
+    Requires a `QueryInstrumentation` attached to the engine.
+
+    Args:
+    ----
+        app (ASGIApp): wrapped application.
+        repeated_threshold (int): number of executions from which a statement is reported.
+
+    """
+
+    def __init__(self, app: starlette.types.ASGIApp, *, repeated_threshold: int = 5) -> None:
+        self._app = app
+        self._repeated_threshold = repeated_threshold
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            scope[_QUERY_STATS_SCOPE_KEY] = stats
+
+            async def _send(message: starlette.types.Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = starlette.datastructures.MutableHeaders(scope=message)
+                    headers.append("Server-Timing", f'db;dur={stats.total * 1000:.1f};desc="{stats.count} queries"')
+                await send(message)
+
+            try:
+                await self._app(scope, receive, _send)
+            finally:
+                if repeated := stats.repeated(self._repeated_threshold):
+                    logger.warning(
+                        "repeated_queries",
+                        path=getattr(scope.get("route"), "path", ""),
+                        http_method=scope["method"],
+                        statements=repeated,
+                        slowest_statement=stats.slowest_statement,
+                    )
+
+
+@typing.final
+class TracingMiddleware:
+    """Open the root span of each HTTP request, the spans of its dependencies, services and repositories nest in it."""
+
+    def __init__(self, app: starlette.types.ASGIApp) -> None:
+        self._app = app
+
+    async def __call__(
+        self,
+        scope: starlette.types.Scope,
+        receive: starlette.types.Receive,
+        send: starlette.types.Send,
+    ) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        with tracer.span("http.request", method=scope["method"], path=scope["path"]) as span:
+            if span is None:
+                await self._app(scope, receive, send)
+                return
+
+            async def _send(message: starlette.types.Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.attributes["status"] = message["status"]
+                await send(message)
+
+            try:
+                await self._app(scope, receive, _send)
+            finally:
+                span.attributes["route"] = getattr(scope.get("route"), "path", "")
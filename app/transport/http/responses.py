@@ -0,0 +1,167 @@
+import enum
+import hashlib
+import types
+import typing
+import uuid
+
+import aiocsv
+import arrow
+import fastapi
+import orjson
+import pydantic
+
+from app.dto.entities.base import Cursor
+
+# NOTE: orjson encodes these the way pydantic does in JSON mode
+_NATIVE_TYPES: typing.Final = (str, int, float, bool, uuid.UUID, enum.Enum, types.NoneType)
+
+Rows = typing.Iterable[typing.Sequence[typing.Any]]
+ExportFormat = typing.Literal["ndjson", "csv"]
+
+
+def _is_native(annotation: typing.Any) -> bool:  # noqa: ANN401
+    if typing.get_origin(annotation) in {typing.Union, types.UnionType}:
+        return all(_is_native(arg) for arg in typing.get_args(annotation))
+    return isinstance(annotation, type) and issubclass(annotation, _NATIVE_TYPES)
+
+
+def _serialization_keys(model: type[pydantic.BaseModel]) -> tuple[str, ...]:
+    return tuple(field.serialization_alias or field.alias or name for name, field in model.model_fields.items())
+
+
+def make_etag(*parts: typing.Any) -> str:  # noqa: ANN401
+    """Weak entity tag of a representation built from the given parts, e.g. a version and the query."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """Tell whether an `If-None-Match` header lists the entity tag, compared weakly as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def validator_headers(etag: str, last_modified: arrow.Arrow | None = None) -> dict[str, str]:
+    """Headers letting clients revalidate their copy with a conditional request instead of downloading it again."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified.to("utc").format("ddd, DD MMM YYYY HH:mm:ss [GMT]")
+    return headers
+
+
+@typing.final
+class RowsResponse(fastapi.responses.ORJSONResponse):
+    def render(self, content: typing.Any) -> bytes:  # noqa: ANN401, PLR6301
+        # NOTE: asyncpg returns UUIDs of its own type, orjson only knows `uuid.UUID`
+        return orjson.dumps(content, default=str)
+
+
+@typing.final
+class RowsEncoder:
+    """Turn repository rows into the JSON of a schema without building a model per row.
+
+    Rows start with the schema's fields in order, as selected with `columns=encoder.columns`,
+    and are mapped to the fields' serialization aliases in a single pass, trailing
+    columns such as those of the cursor are left out. Only fields
+    orjson encodes exactly like pydantic are accepted, so the response matches the
+    schema and the route may declare it as `response_model` while skipping its validation.
+    """
+
+    def __init__(self, model: type[pydantic.BaseModel]) -> None:
+        for name, field in model.model_fields.items():
+            if not _is_native(field.annotation):
+                raise TypeError(f"{model.__name__}.{name} of type {field.annotation} needs pydantic to be serialized")
+        self.columns: tuple[str, ...] = tuple(model.model_fields)
+        self._keys = _serialization_keys(model)
+
+    def encode(self, rows: Rows) -> list[dict[str, typing.Any]]:
+        keys = self._keys
+        return [dict(zip(keys, row, strict=False)) for row in rows]
+
+    def page(
+        self,
+        rows: Rows,
+        *,
+        total: int | None = None,
+        next_cursor: Cursor | None = None,
+    ) -> RowsResponse:
+        """Respond with the rows as a `Page` of the schema."""
+        return RowsResponse({
+            "items": self.encode(rows),
+            "total": total,
+            "nextCursor": next_cursor.encode() if next_cursor is not None else None,
+        })
+
+
+class _Chunks:
+    """Text file collecting what is written until it is drained."""
+
+    def __init__(self) -> None:
+        self._chunks: list[str] = []
+
+    async def write(self, chunk: str) -> None:
+        self._chunks.append(chunk)
+
+    def drain(self) -> str:
+        text = "".join(self._chunks)
+        self._chunks.clear()
+        return text
+
+
+@typing.final
+class RowsStreamEncoder:
+    """Encode batches of repository rows as lines of a file export while they are read.
+
+    Rows start with the schema's fields in order, as selected with `columns=encoder.columns`.
+    Each batch is encoded into one chunk of the body, so a response holds a single batch
+    at a time. Values orjson and csv don't know, such as decimals and timestamps,
+    are written as their `str`.
+    """
+
+    media_types: typing.Final[dict[ExportFormat, str]] = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv; charset=utf-8",
+    }
+
+    def __init__(self, model: type[pydantic.BaseModel]) -> None:
+        self.columns: tuple[str, ...] = tuple(model.model_fields)
+        self._keys = _serialization_keys(model)
+
+    def response(
+        self,
+        batches: typing.AsyncIterable[Rows],
+        *,
+        format_: ExportFormat,
+        filename: str,
+    ) -> fastapi.responses.StreamingResponse:
+        """Stream the batches as a file download of the given format."""
+        body: typing.AsyncIterator[bytes] | typing.AsyncIterator[str] = (
+            self.ndjson(batches) if format_ == "ndjson" else self.csv(batches)
+        )
+        return fastapi.responses.StreamingResponse(
+            body,
+            media_type=self.media_types[format_],
+            headers={"Content-Disposition": f'attachment; filename="{filename}.{format_}"'},
+        )
+
+    async def ndjson(self, batches: typing.AsyncIterable[Rows]) -> typing.AsyncIterator[bytes]:
+        keys = self._keys
+        async for batch in batches:
+            yield b"".join(
+                orjson.dumps(dict(zip(keys, row, strict=False)), default=str, option=orjson.OPT_APPEND_NEWLINE)
+                for row in batch
+            )
+
+    async def csv(self, batches: typing.AsyncIterable[Rows]) -> typing.AsyncIterator[str]:
+        chunks = _Chunks()
+        writer = aiocsv.AsyncWriter(chunks)
+        await writer.writerow(self._keys)
+        yield chunks.drain()
+        width = len(self._keys)
+        async for batch in batches:
+            await writer.writerows(row[:width] for row in batch)
+            yield chunks.drain()
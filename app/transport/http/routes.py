@@ -18,6 +18,7 @@ def _service_api(app: FastAPI, router: APIRouter) -> None:
 
 def register_http_routes(app: FastAPI) -> None:
     _service_api(app=app, router=service.health.router)
+    _service_api(app=app, router=service.metrics.router)
     app.include_router(
         router=public.bets.router,
         prefix=API_PREFIX,
@@ -5,21 +5,27 @@ import uuid
 import pydantic
 
 from app.dto import enums
+from app.dto.annotations import BetAmount
 from app.dto.entities.base import APISchemeBaseModel, ISOArrowType
+from app.transport.http.schema.error import APIErrorResponseProtocol
+
+MAX_BATCH_SIZE: typing.Final[int] = 1000
 
 
 @typing.final
 class MakeBetRequest(APISchemeBaseModel):
     event_id: uuid.UUID
-    amount: typing.Annotated[
-        decimal.Decimal,
-        pydantic.Field(
-            ge=0,
-            max_digits=10,
-            decimal_places=2,
-            allow_inf_nan=False,
-        ),
-    ]
+    amount: BetAmount
+    value: typing.Literal[enums.ResultValue.HOME] = enums.ResultValue.HOME
+    bet_type: typing.Annotated[typing.Literal[enums.BetType.RESULT], pydantic.Field(enums.BetType.RESULT, alias="type")]
+
+
+@typing.final
+class MakeBetsRequestItem(APISchemeBaseModel):
+    """Bet of a batch, its amount is checked by the service so an invalid one only fails this bet."""
+
+    event_id: uuid.UUID
+    amount: decimal.Decimal
     value: typing.Literal[enums.ResultValue.HOME] = enums.ResultValue.HOME
     bet_type: typing.Annotated[typing.Literal[enums.BetType.RESULT], pydantic.Field(enums.BetType.RESULT, alias="type")]
 
@@ -47,3 +53,33 @@ class MakeBetResponse(APISchemeBaseModel):
 class Bet(APISchemeBaseModel):
     id: uuid.UUID
     status: enums.BetStatus
+
+
+@typing.final
+class ExportedBet(APISchemeBaseModel):
+    """Line of a bets export."""
+
+    id: uuid.UUID
+    event_id: uuid.UUID
+    amount: decimal.Decimal
+    status: enums.BetStatus
+    created_at: ISOArrowType
+    updated_at: ISOArrowType
+
+
+@typing.final
+class MakeBetsRequest(APISchemeBaseModel):
+    items: typing.Annotated[list[MakeBetsRequestItem], pydantic.Field(min_length=1, max_length=MAX_BATCH_SIZE)]
+
+
+@typing.final
+class MakeBetsResultItem(APISchemeBaseModel):
+    """Outcome of one bet of a batch, either the created bet or the reason it was rejected."""
+
+    bet: MakeBetResponse | None = None
+    error: APIErrorResponseProtocol | None = None
+
+
+@typing.final
+class MakeBetsResponse(APISchemeBaseModel):
+    items: list[MakeBetsResultItem]
@@ -14,3 +14,10 @@ class UpdateEventRequest(APISchemeBaseModel):
 class Event(APISchemeBaseModel):
     id: uuid.UUID
     status: enums.EventStatus
+
+
+@typing.final
+class EventSettlement(APISchemeBaseModel):
+    id: uuid.UUID
+    status: enums.EventStatus
+    remaining: int
@@ -1,4 +1,14 @@
-from .cache import cached
+from .cache import cache_options, cached, CachedFunction, CacheInfo, key_from_args, TwoTierCache
+from .memory import TTLCache
 from .misc import make_url
 
-__all__ = ["cached", "make_url"]
+__all__ = [
+    "CacheInfo",
+    "CachedFunction",
+    "TTLCache",
+    "TwoTierCache",
+    "cache_options",
+    "cached",
+    "key_from_args",
+    "make_url",
+]
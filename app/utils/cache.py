@@ -1,119 +1,375 @@
+import asyncio
 import functools
+import inspect
+import math
+import random
+import time
 import typing
 
 import aiocache
-import aiocache.plugins  # type: ignore[import-untyped]
 import aiocache.serializers  # type: ignore[import-untyped]
+import attrs
+from loguru import logger
 
+from app.dto.annotations import F, P, T
+from app.repository.cache import BoundedMemoryCache
 from app.settings import settings
+from app.utils.memory import TTLCache
+from app.utils.metrics import registry
 
-if typing.TYPE_CHECKING:
-    from app.dto.annotations import F, P, T
+_V = typing.TypeVar("_V")
 
-    def _skip_cache_func(val: typing.Any, /) -> typing.Literal[False]:  # noqa: ARG001, ANN401
-        """Never skip caching."""
-        return False
+_CACHE_REQUESTS: typing.Final = registry.counter(
+    "cache_requests_total",
+    "Lookups of two-tier caches, by result: hit, stale or miss.",
+    ("cache", "result"),
+)
+_CACHE_LOAD_DURATION: typing.Final = registry.histogram(
+    "cache_load_duration_seconds",
+    "Time to load values missing from two-tier caches.",
+    ("cache",),
+)
 
-    # NOTE (rudiemeant@gmail.com): I've had to add the type hints to the `cached` function
-    # because the `aiocache.cached` function is not typed correctly.
-    def cached(  # noqa: PLR0913, D417
+
+@typing.final
+@attrs.frozen(slots=True)
+class _Entry(typing.Generic[_V]):
+    value: _V
+    fresh_until: float
+    stale_until: float
+
+
+@typing.final
+class TwoTierCache:
+    """Bounded in-process LRU in front of a shared `aiocache` backend.
+
+    Concurrent misses of the same key share a single load (single-flight).
+    An entry is fresh for `ttl` seconds, shortened by up to `jitter` of it so keys
+    set together do not expire together. For `stale_ttl` seconds after that
+    the stale value is still served while one background load refreshes it.
+
+    A load is shared by every caller waiting for the key, runs on even if the caller that
+    started it is cancelled, and refreshes run after their caller got the stale value.
+    Loaders must therefore not use anything scoped to their caller, such as the request's
+    database session, but acquire their own.
+
+    Args:
+    ----
+        shared (BaseCache): backend shared between workers, e.g. the one of `Settings.CACHE_TYPE`.
+        ttl (float): seconds an entry is fresh.
+        stale_ttl (float): seconds an expired entry may still be served while it is refreshed.
+        jitter (float): fraction of `ttl` an entry's freshness is randomly shortened by.
+        local_maxsize (int): maximum number of entries kept in process.
+        timer (Callable): wall clock shared with other workers, overridable in tests.
+        name (str): `cache` label of the cache's metrics.
+
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        shared: aiocache.BaseCache,
+        ttl: float,
+        stale_ttl: float = 0,
+        jitter: float = 0,
+        local_maxsize: int = 1024,
+        timer: typing.Callable[[], float] = time.time,
+        name: str = "default",
+    ) -> None:
+        self._shared = shared
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._jitter = jitter
+        self._timer = timer
+        self._local = TTLCache[str, _Entry[typing.Any]](maxsize=local_maxsize, ttl=ttl + stale_ttl, timer=timer)
+        self._inflight: dict[str, asyncio.Task[typing.Any]] = {}
+        self._hits = self._stale_hits = self._misses = self._loads = 0
+        self._load_seconds = 0.0
+        self._hit_counter = _CACHE_REQUESTS.labels(name, "hit")
+        self._stale_counter = _CACHE_REQUESTS.labels(name, "stale")
+        self._miss_counter = _CACHE_REQUESTS.labels(name, "miss")
+        self._load_duration = _CACHE_LOAD_DURATION.labels(name)
+
+    def stats(self) -> "CacheInfo":
+        return CacheInfo(
+            hits=self._hits,
+            stale_hits=self._stale_hits,
+            misses=self._misses,
+            loads=self._loads,
+            load_seconds=self._load_seconds,
+            local_entries=len(self._local),
+        )
+
+    async def get_or_load(self, key: str, loader: typing.Callable[[], typing.Awaitable[_V]]) -> _V:
+        """Return the cached value of the key, loading it on a miss."""
+        entry = self._local.get(key)
+        if entry is None and (shared := await self._shared.get(key)) is not None:
+            entry = _Entry(*shared)
+            self._local.set(key, entry)
+
+        now = self._timer()
+        if entry is not None and now < entry.stale_until:
+            if now >= entry.fresh_until:
+                self._stale_hits += 1
+                self._stale_counter.inc()
+                self._load(key, loader)
+            else:
+                self._hits += 1
+                self._hit_counter.inc()
+            return typing.cast(_V, entry.value)
+        self._misses += 1
+        self._miss_counter.inc()
+        # NOTE: shielded, so a cancelled caller does not cancel the load other callers wait for
+        return await asyncio.shield(self._load(key, loader))
+
+    def _load(self, key: str, loader: typing.Callable[[], typing.Awaitable[_V]]) -> asyncio.Task[_V]:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_and_store(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._loaded, key))
+        return task
+
+    def _loaded(self, key: str, task: asyncio.Task[typing.Any]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception, background refreshes have no caller to raise it to
+        if not task.cancelled() and (exc := task.exception()) is not None:
+            logger.warning("cache_load_failed", key=key, error=str(exc))
+
+    async def _load_and_store(self, key: str, loader: typing.Callable[[], typing.Awaitable[_V]]) -> _V:
+        started_at = time.perf_counter()
+        value = await loader()
+        duration = time.perf_counter() - started_at
+        self._loads += 1
+        self._load_seconds += duration
+        self._load_duration.observe(duration)
+        if self._inflight.get(key) is not asyncio.current_task():
+            # The key was invalidated while loading, the value may predate the change
+            return value
+        ttl = self._ttl * (1 - self._jitter * random.random())
+        now = self._timer()
+        entry = _Entry(value=value, fresh_until=now + ttl, stale_until=now + ttl + self._stale_ttl)
+        self._local.set(key, entry)
+        # NOTE: a plain tuple in the shared tier, so any serializer can store it
+        await self._shared.set(
+            key,
+            (entry.value, entry.fresh_until, entry.stale_until),
+            ttl=math.ceil(ttl + self._stale_ttl),
+        )
+        return value
+
+    async def delete(self, key: str) -> None:
+        self._inflight.pop(key, None)
+        self._local.pop(key)
+        await self._shared.delete(key)
+
+    async def clear(self) -> None:
+        """Drop every entry, in the shared tier only those of the backend's namespace."""
+        self._inflight.clear()
+        self._local.clear()
+        await self._shared.clear(namespace=self._shared.namespace)
+
+
+_SKIPPED: typing.Final = object()
+
+
+def _key_part(value: object, *, nested: bool = False) -> object:
+    """Return what identifies the value in a key, or `_SKIPPED` for an argument that does not.
+
+    Objects hashed by identity, such as sessions, services and repositories, do not identify
+    the result and are skipped. Containers are keyed by their items. Other unhashable values,
+    e.g. mutable models whose equality depends on their fields, can't be keyed faithfully
+    and raise `TypeError`, such functions need a `key_builder`.
+    """
+    if value is None:
+        return value
+    if isinstance(value, list | tuple):
+        return (type(value).__name__, *(_key_part(item, nested=True) for item in value))
+    if isinstance(value, set | frozenset):
+        return (type(value).__name__, *sorted(repr(_key_part(item, nested=True)) for item in value))
+    if isinstance(value, dict):
+        items = ((_key_part(key, nested=True), _key_part(item, nested=True)) for key, item in value.items())
+        return ("dict", *sorted(items, key=repr))
+    hash_ = type(value).__hash__
+    if hash_ is None or (nested and hash_ is object.__hash__):
+        raise TypeError(f"Cannot build a cache key from {type(value).__name__}, pass a key_builder")
+    return _SKIPPED if hash_ is object.__hash__ else value
+
+
+def key_from_args(
+    func: typing.Callable[..., typing.Any],
+    *args: typing.Any,  # noqa: ANN401
+    noself: bool = True,
+    **kwargs: typing.Any,  # noqa: ANN401
+) -> str:
+    """Build a key from the arguments of the call, bound to the function's parameter names.
+
+    Arguments hashed by identity (sessions, services, repositories) do not identify
+    the result and are left out of the key. Raises `TypeError` for values that can't be keyed.
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    parts = list(bound.arguments.items())
+    if noself and parts:
+        parts = parts[1:]
+    return repr([(name, part) for name, value in parts if (part := _key_part(value)) is not _SKIPPED])
+
+
+@typing.final
+@attrs.frozen(slots=True, kw_only=True)
+class CacheInfo:
+    hits: int
+    stale_hits: int
+    misses: int
+    loads: int
+    load_seconds: float
+    local_entries: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+    @property
+    def load_seconds_avg(self) -> float:
+        return self.load_seconds / self.loads if self.loads else 0.0
+
+
+class CachedFunction(typing.Generic[P, T]):
+    """Coroutine function whose results are kept in a `TwoTierCache` of its own."""
+
+    def __init__(
+        self,
+        func: F[P, T],
         *,
-        ttl: int | None = aiocache.base.SENTINEL,
-        key: str | None = None,
-        namespace: str | None = None,
-        key_builder: typing.Callable[..., str] | None = None,
-        skip_cache_func: typing.Callable[..., bool] = _skip_cache_func,
-        cache: type[aiocache.base.BaseCache] = aiocache.Cache.MEMORY,
-        serializer: aiocache.serializers.BaseSerializer | None = None,
-        plugins: list[aiocache.plugins.BasePlugin] | None = None,
-        alias: str | None = None,
-        noself: bool = False,
-        cache_read: bool = True,
-        cache_write: bool = True,
-        aiocache_wait_for_write: bool = True,
-    ) -> typing.Callable[[F[P, T]], F[P, T]]:
-        """Cache the function's return value into a key generated with module_name,
-        function_name, and args. The cache is accessible via `<function_name>.cache`.
-
-        In some scenarios, additional arguments are necessary for cache configuration,
-        such as endpoint and port for Redis cache.
-        These can be supplied as kwargs and will be propagated accordingly.
-
-        A single cache instance is created per decorated call.
-        High concurrency on the same function may require pool size adjustments.
-
-        Args:
-        ----
-            ttl (int):
-                Time in seconds to store the function call. Defaults to None, indicating no expiration.
-            key (str):
-                Key for the function return. Takes precedence over `key_builder`.
-                Defaults to a combination of module_name, function_name, args, and kwargs
-                if neither key nor key_builder are provided.
-            namespace (str):
-                Prefix for the key used in all backend operations. Defaults to None.
-            key_builder (Callable):
-                Allows dynamic key construction. Receives the function and the same args and kwargs.
-            skip_cache_func (Callable):
-                Determines whether to skip caching the result.
-                For example, to avoid caching None results, use `lambda r: r is None`.
-            cache (cache class):
-                Cache class for `set`/`get` operations. Defaults to `aiocache.SimpleMemoryCache`.
-            serializer:
-                Serializer instance for `dumps`/`loads`. Defaults to the cache backend's default serializer.
-            plugins (list):
-                Plugins for cmd hooks. Defaults to those from the cache class.
-            alias (str):
-                Config alias. Other config parameters are ignored if alias is provided.
-                Use explicit parameters for a per function cache.
-            noself (bool):
-                If decorating a class function, set to True to exclude `self` from the key generation.
-                Defaults to False.
-            cache_read (bool):
-                Tries to read from cache before executing the function. Enabled by default.
-            cache_write (bool):
-                Writes the result to the cache after retrieval. Enabled by default.
-            aiocache_wait_for_write (bool):
-                Waits for the write to complete before returning.
-                Enabled by default, set to False for background write.
-
-        Only one cache instance is created per decorated call.
-        Adapt pool size for high concurrency.
-
-        Note:
-        ----
-            Use `noself=True` to exclude `self` from key generation in class methods,
-            preventing different instances from creating unique keys for the same function calls.
-
-        """
-
-        def _cached(func: F[P, T]) -> F[P, T]:
-            @functools.wraps(func)
-            async def _wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-                result = await aiocache.cached(
-                    ttl=ttl,
-                    key=key,
-                    namespace=namespace,
-                    key_builder=key_builder,
-                    skip_cache_func=skip_cache_func,
-                    cache=cache,
-                    serializer=serializer,
-                    plugins=plugins,
-                    alias=alias,
-                    noself=noself,
-                )(func)(
-                    *args,
-                    cache_read=cache_read,
-                    cache_write=cache_write,
-                    aiocache_wait_for_write=aiocache_wait_for_write,
-                    **kwargs,
-                )
-                return typing.cast(T, result)
-
-            return _wrapper
-
-        return _cached
-
-    cached = functools.partial(cached, noself=True, ttl=60, cache=settings.CACHE_TYPE, aiocache_wait_for_write=False)
-else:
-    cached = functools.partial(aiocache.cached, noself=True, ttl=60, cache=settings.CACHE_TYPE)
+        cache: TwoTierCache,
+        key_builder: typing.Callable[..., str],
+    ) -> None:
+        functools.update_wrapper(self, func)
+        self._func = func
+        self._cache = cache
+        self._key_builder = key_builder
+
+    async def __call__(self, *args: P.args, **kwargs: P.kwargs) -> T:
+        key = self._key_builder(self._func, *args, **kwargs)
+        return await self._cache.get_or_load(key, functools.partial(self._func, *args, **kwargs))
+
+    @typing.overload
+    def __get__(self, instance: None, owner: type[typing.Any]) -> typing.Self: ...
+
+    @typing.overload
+    def __get__(self, instance: object, owner: type[typing.Any]) -> "BoundCachedFunction[T]": ...
+
+    def __get__(self, instance: object | None, owner: type[typing.Any]) -> "typing.Self | BoundCachedFunction[T]":
+        if instance is None:
+            return self
+        return BoundCachedFunction(self, instance)
+
+    async def invalidate(self, *args: P.args, **kwargs: P.kwargs) -> None:
+        """Drop the cached result of a call with these arguments."""
+        await self.invalidate_key(self._key_builder(self._func, *args, **kwargs))
+
+    async def invalidate_key(self, key: str) -> None:
+        """Drop the cached result under a key built by the key builder, when the arguments are not at hand."""
+        await self._cache.delete(key)
+
+    async def cache_clear(self) -> None:
+        await self._cache.clear()
+
+    def stats(self) -> CacheInfo:
+        return self._cache.stats()
+
+
+@typing.final
+class BoundCachedFunction(typing.Generic[T]):
+    """`CachedFunction` accessed through an instance, which is passed as the first argument."""
+
+    def __init__(self, cached_function: CachedFunction[..., T], instance: object) -> None:
+        self._cached_function = cached_function
+        self._instance = instance
+
+    async def __call__(self, *args: typing.Any, **kwargs: typing.Any) -> T:  # noqa: ANN401
+        return await self._cached_function(self._instance, *args, **kwargs)
+
+    async def invalidate(self, *args: typing.Any, **kwargs: typing.Any) -> None:  # noqa: ANN401
+        await self._cached_function.invalidate(self._instance, *args, **kwargs)
+
+    async def cache_clear(self) -> None:
+        await self._cached_function.cache_clear()
+
+    def stats(self) -> CacheInfo:
+        return self._cached_function.stats()
+
+
+def cache_options(cache: type[aiocache.BaseCache]) -> dict[str, typing.Any]:
+    """Keyword arguments of the cache class from the settings, only the bounded memory backend takes limits.
+
+    The limits apply to each instance, see `Settings.CACHE_MAX_BYTES`.
+    """
+    if not issubclass(cache, BoundedMemoryCache):
+        return {}
+    return {
+        "max_entries": settings.CACHE_MAX_ENTRIES,
+        "max_bytes": settings.CACHE_MAX_BYTES,
+        "eviction": settings.CACHE_EVICTION,
+    }
+
+
+def cached(  # noqa: PLR0913
+    *,
+    ttl: float = 60,
+    stale_ttl: float = 0,
+    jitter: float = 0.1,
+    namespace: str | None = None,
+    key_builder: typing.Callable[..., str] | None = None,
+    noself: bool = True,
+    cache: type[aiocache.BaseCache] = settings.CACHE_TYPE,
+    serializer: aiocache.serializers.BaseSerializer | None = None,
+    local_maxsize: int = settings.CACHE_LOCAL_MAXSIZE,
+) -> typing.Callable[[F[P, T]], CachedFunction[P, T]]:
+    """Cache the function's return value in a `TwoTierCache` of its own.
+
+    The function is the loader of the cache, it must not use a session of its caller,
+    see `TwoTierCache`.
+
+    The returned `CachedFunction` exposes `invalidate(*args, **kwargs)`, `cache_clear()` and `stats()`.
+
+    Args:
+    ----
+        ttl (float): seconds a result is fresh.
+        stale_ttl (float): seconds an expired result is still returned while it is refreshed in background.
+        jitter (float): fraction of `ttl` the freshness of a result is randomly shortened by.
+        namespace (str): prefix of the keys in the shared backend, the function's qualified name by default.
+        key_builder (Callable): builds the key from the function and the same args and kwargs.
+            Defaults to `key_from_args`.
+        noself (bool): exclude the first argument from the default key, for methods.
+        cache (cache class): backend class of the shared tier, `Settings.CACHE_TYPE` by default.
+            A bounded memory backend gets limits of its own, see `cache_options`.
+        serializer: serializer of the shared tier, e.g. `MsgPackSerializer`.
+            Defaults to the backend's default serializer.
+        local_maxsize (int): maximum number of results kept in process.
+
+    """
+
+    def _cached(func: F[P, T]) -> CachedFunction[P, T]:
+        name = f"{func.__module__}.{func.__qualname__}"
+        two_tier = TwoTierCache(
+            shared=cache(
+                namespace=namespace or f"{name}:",
+                serializer=serializer,
+                **cache_options(cache),
+            ),
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            jitter=jitter,
+            local_maxsize=local_maxsize,
+            name=name,
+        )
+        return CachedFunction(
+            func,
+            cache=two_tier,
+            key_builder=key_builder or functools.partial(key_from_args, noself=noself),
+        )
+
+    return _cached
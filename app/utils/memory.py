@@ -0,0 +1,64 @@
+import collections
+import time
+import typing
+
+K = typing.TypeVar("K", bound=typing.Hashable)
+V = typing.TypeVar("V")
+
+
+class TTLCache(typing.Generic[K, V]):
+    """Bounded in-process mapping with least-recently-used eviction and per-entry expiry.
+
+    Access is synchronous so entries can be evicted from ORM event hooks.
+
+    Args:
+    ----
+        maxsize (int): maximum number of entries kept, the least recently used one is evicted first.
+        ttl (float): seconds an entry stays valid after it was set.
+        timer (Callable): monotonic clock, overridable in tests.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        maxsize: int,
+        ttl: float,
+        timer: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._timer = timer
+        self._data: collections.OrderedDict[K, tuple[float, V]] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= self._timer():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = (self._timer() + self._ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        item = self._data.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
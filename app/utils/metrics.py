@@ -0,0 +1,412 @@
+import abc
+import asyncio
+import bisect
+import contextlib
+import fcntl
+import math
+import os
+import pathlib
+import time
+import typing
+
+import orjson
+from loguru import logger
+
+MetricType = typing.Literal["counter", "gauge", "histogram"]
+Aggregate = typing.Literal["sum", "max"]
+# Family name -> {"type", "help", "labelnames", "buckets", "aggregate", "samples": [[labels, values]]}
+Snapshot = dict[str, dict[str, typing.Any]]
+
+DEFAULT_BUCKETS: typing.Final = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE: typing.Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+_RETIRED: typing.Final[str] = "retired.json"
+_LOCK: typing.Final[str] = ".lock"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def values(self) -> list[float]:
+        return [self.value]
+
+
+class _HistogramValue:
+    __slots__ = ("_buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._buckets = buckets
+        # The last count is the one of the implicit +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.sum += value
+
+    @contextlib.contextmanager
+    def time(self) -> typing.Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at)
+
+    def values(self) -> list[float]:
+        return [*self.counts, self.sum]
+
+
+_C = typing.TypeVar("_C", _Value, _HistogramValue)
+
+
+class _Metric(typing.Generic[_C], abc.ABC):
+    type: typing.ClassVar[MetricType]
+
+    def __init__(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], _C] = {}
+
+    def labels(self, *values: str) -> _C:
+        """Return the child of the label values, hold on to it on hot paths to skip the lookup."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> _C: ...
+
+    def family(self) -> dict[str, typing.Any]:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": self.labelnames,
+            "samples": [[labels, child.values()] for labels, child in self._children.items()],
+        }
+
+
+@typing.final
+class Counter(_Metric[_Value]):
+    type = "counter"
+
+    def _new_child(self) -> _Value:  # noqa: PLR6301
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+@typing.final
+class Gauge(_Metric[_Value]):
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        aggregate: Aggregate = "sum",
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.aggregate = aggregate
+
+    def _new_child(self) -> _Value:  # noqa: PLR6301
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def family(self) -> dict[str, typing.Any]:
+        return {**super().family(), "aggregate": self.aggregate}
+
+
+@typing.final
+class Histogram(_Metric[_HistogramValue]):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def family(self) -> dict[str, typing.Any]:
+        return {**super().family(), "buckets": self.buckets}
+
+
+_M = typing.TypeVar("_M", Counter, Gauge, Histogram)
+
+
+@typing.final
+class MetricsRegistry:
+    """Metrics of this process.
+
+    Recording only updates numbers in memory, everything else happens when a snapshot
+    is taken. Callbacks registered with `on_collect` run before every snapshot,
+    to set gauges from state that is cheaper to read than to track, e.g. pool usage.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._callbacks: list[typing.Callable[[], None]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        aggregate: Aggregate = "sum",
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, aggregate=aggregate))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        *,
+        buckets: typing.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def on_collect(self, callback: typing.Callable[[], None]) -> None:
+        self._callbacks.append(callback)
+
+    def snapshot(self) -> Snapshot:
+        for callback in self._callbacks:
+            try:
+                callback()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("metrics_callback_failed", error=str(exc))
+        return {name: metric.family() for name, metric in self._metrics.items()}
+
+    def render(self) -> str:
+        return render(self.snapshot())
+
+    def _register(self, metric: _M) -> _M:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def merge_snapshots(snapshots: typing.Iterable[Snapshot]) -> Snapshot:
+    """Add up the samples of several processes, gauges are summed or maxed as declared."""
+    merged: Snapshot = {}
+    samples: dict[str, dict[tuple[str, ...], list[float]]] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            if name not in merged:
+                merged[name] = {**family, "samples": []}
+                samples[name] = {}
+            use_max = family.get("aggregate") == "max"
+            family_samples = samples[name]
+            for labels, values in family["samples"]:
+                key = tuple(labels)
+                current = family_samples.get(key)
+                family_samples[key] = (
+                    list(values)
+                    if current is None
+                    else [max(a, b) if use_max else a + b for a, b in zip(current, values, strict=True)]
+                )
+    for name, family in merged.items():
+        family["samples"] = [[labels, values] for labels, values in samples[name].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names: typing.Sequence[str], values: typing.Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render(snapshot: Snapshot) -> str:
+    """Format a snapshot in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for name, family in sorted(snapshot.items()):
+        documentation, type_, labelnames = family["help"], family["type"], family["labelnames"]
+        lines.extend((f"# HELP {name} {_escape(documentation)}", f"# TYPE {name} {type_}"))
+        for labels, values in family["samples"]:
+            if type_ != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(values[0])}")
+                continue
+            *counts, total = values
+            cumulative = 0.0
+            for bound, count in zip([*family["buckets"], math.inf], counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {_format_value(cumulative)}")
+            lines.extend((
+                f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(total)}",
+                f"{name}_count{_format_labels(labelnames, labels)} {_format_value(cumulative)}",
+            ))
+    return "\n".join(lines) + "\n"
+
+
+@typing.final
+class MetricsAggregator:
+    """Expose the metrics of every worker of a prefork server such as gunicorn.
+
+    Each worker writes a snapshot of its registry to `<directory>/<pid>.json` every
+    `interval` seconds. The worker serving a scrape refreshes its own snapshot and merges
+    it with those of the other workers, snapshots older than `max_age` intervals belong
+    to workers that are gone. Like prometheus_client's multiprocess mode, the counters and
+    histograms of gone workers are folded into a retired snapshot, so aggregated counters
+    never go down when workers are recycled, while their gauges are dropped.
+    Without a directory only this process is exposed.
+
+    Args:
+    ----
+        registry (MetricsRegistry): metrics of this process.
+        directory (str): directory shared by the workers, unset for a single process.
+        interval (float): seconds between two snapshots of this process.
+        max_age (int): number of intervals after which a snapshot is considered stale.
+
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        *,
+        directory: str | None = None,
+        interval: float = 5.0,
+        max_age: int = 3,
+    ) -> None:
+        self._registry = registry
+        self._directory = pathlib.Path(directory) if directory else None
+        self._interval = interval
+        self._max_age = max_age
+        self._task: asyncio.Task[None] | None = None
+
+    async def render(self) -> str:
+        if self._directory is None:
+            return self._registry.render()
+        snapshot = self._registry.snapshot()
+        others = await asyncio.to_thread(self._exchange, snapshot)
+        return render(merge_snapshots([snapshot, *others]))
+
+    def start(self) -> None:
+        if self._directory is not None and self._task is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._task = asyncio.create_task(self._publish(), name="metrics_publisher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        await asyncio.to_thread(self._retire_own)
+
+    def _path(self) -> pathlib.Path:
+        # NOTE: resolved on use, the pid changes when gunicorn forks a preloaded application
+        return self._directory / f"{os.getpid()}.json"  # type: ignore[operator]
+
+    async def _publish(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self._write, self._registry.snapshot())
+            except OSError as exc:
+                logger.warning("metrics_publish_failed", error=str(exc))
+            await asyncio.sleep(self._interval)
+
+    def _retired_path(self) -> pathlib.Path:
+        return self._directory / _RETIRED  # type: ignore[operator]
+
+    def _write(self, snapshot: Snapshot) -> None:
+        _dump(self._path(), snapshot)
+
+    def _exchange(self, snapshot: Snapshot) -> list[Snapshot]:
+        """Write the snapshot of this process and read those of the other live workers and the retired ones."""
+        self._write(snapshot)
+        own, retired = self._path(), self._retired_path()
+        expired_at = time.time() - self._interval * self._max_age
+        snapshots: list[Snapshot] = []
+        for path in self._directory.glob("*.json"):  # type: ignore[union-attr]
+            if path in {own, retired}:
+                continue
+            try:
+                if path.stat().st_mtime < expired_at:
+                    self._retire(path, expired_at=expired_at)
+                    continue
+                snapshots.append(orjson.loads(path.read_bytes()))
+            except (OSError, orjson.JSONDecodeError):
+                # The worker exited or is rewriting it, its numbers are in the next scrape
+                continue
+        with contextlib.suppress(FileNotFoundError):
+            snapshots.append(orjson.loads(retired.read_bytes()))
+        return snapshots
+
+    def _retire(self, path: pathlib.Path, *, expired_at: float = math.inf) -> None:
+        """Fold the counters and histograms of a snapshot into the retired one and remove it."""
+        # NOTE: locked, so workers scraping at once never fold the same snapshot twice
+        with (self._directory / _LOCK).open("a") as lock:  # type: ignore[operator]
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                # Checked again, another worker may have retired it or a new worker reused the pid
+                if not path.exists() or path.stat().st_mtime >= expired_at:
+                    return
+                snapshot = orjson.loads(path.read_bytes())
+                retired = self._retired_path()
+                previous = orjson.loads(retired.read_bytes()) if retired.exists() else {}
+                monotonic = {name: family for name, family in snapshot.items() if family["type"] != "gauge"}
+                _dump(retired, merge_snapshots([previous, monotonic]))
+                path.unlink()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _retire_own(self) -> None:
+        self._write(self._registry.snapshot())
+        self._retire(self._path())
+
+
+def _dump(path: pathlib.Path, snapshot: Snapshot) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(orjson.dumps(snapshot))
+    tmp_path.replace(path)
+
+
+registry: typing.Final = MetricsRegistry()
@@ -0,0 +1,227 @@
+import collections
+import contextlib
+import contextvars
+import functools
+import inspect
+import pathlib
+import random
+import time
+import typing
+
+import attrs
+
+from app.logs import AsyncJSONSink
+
+_F = typing.TypeVar("_F", bound=typing.Callable[..., typing.Any])
+_T = typing.TypeVar("_T")
+
+
+@attrs.define(slots=True, kw_only=True)
+class Span:
+    """Timed operation of a trace, `parent_id` is the id of the enclosing span if any."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    started_at: float
+    duration: float = 0.0
+    error: str | None = None
+    attributes: dict[str, typing.Any] = attrs.field(factory=dict)
+
+    def to_dict(self) -> dict[str, typing.Any]:
+        return attrs.asdict(self)
+
+
+# NOTE: set in place of a span when a trace is not sampled, so nested spans are skipped at once
+_NOT_SAMPLED: typing.Final = Span(name="", trace_id="", span_id="", parent_id=None, started_at=0)
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    span = _current_span.get()
+    return None if span is _NOT_SAMPLED else span
+
+
+class SpanExporter(typing.Protocol):
+    def export(self, span: Span) -> None: ...
+
+    def start(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+@typing.final
+class RingBufferExporter:
+    """Keep the last `maxsize` finished spans in memory, e.g. for tests or a debug endpoint."""
+
+    def __init__(self, *, maxsize: int = 10_000) -> None:
+        self._spans: collections.deque[Span] = collections.deque(maxlen=maxsize)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self, trace_id: str | None = None) -> list[Span]:
+        return [span for span in self._spans if trace_id is None or span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+@typing.final
+class JSONFileExporter:
+    """Append finished spans to a file as JSON lines, written from a background thread."""
+
+    def __init__(self, path: str, *, maxsize: int = 10_000) -> None:
+        self._path = pathlib.Path(path)
+        self._maxsize = maxsize
+        self._file: typing.BinaryIO | None = None
+        self._sink: AsyncJSONSink | None = None
+
+    def export(self, span: Span) -> None:
+        if self._sink is not None:
+            self._sink.put(span.to_dict())
+
+    def start(self) -> None:
+        if self._sink is None:
+            self._file = self._path.open("ab")
+            self._sink = AsyncJSONSink(self._file, maxsize=self._maxsize)
+            self._sink.start()
+
+    def stop(self) -> None:
+        if self._sink is not None:
+            self._sink.stop()
+            self._file.close()  # type: ignore[union-attr]
+            self._sink = self._file = None
+
+
+@typing.final
+class Tracer:
+    """Open spans propagated through context variables.
+
+    Whether a trace is recorded is decided once, when its root span is opened, so an
+    unsampled trace costs a context variable lookup per nested span. Nothing is recorded
+    without an exporter.
+
+    Args:
+    ----
+        exporter (SpanExporter): receives every finished span of the sampled traces.
+        sample_rate (float): fraction of the traces recorded.
+        timer (Callable): monotonic clock the durations are measured with, overridable in tests.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        exporter: SpanExporter | None = None,
+        sample_rate: float = 1.0,
+        timer: typing.Callable[[], float] = time.perf_counter,
+        random_: typing.Callable[[], float] = random.random,
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._timer = timer
+        self._random = random_
+
+    def configure(self, *, exporter: SpanExporter | None, sample_rate: float) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes: typing.Any) -> typing.Iterator[Span | None]:  # noqa: ANN401
+        """Time the block as a child of the current span, yield None when the trace is not recorded."""
+        parent = _current_span.get()
+        if parent is _NOT_SAMPLED:
+            yield None
+            return
+        exporter = self.exporter
+        if parent is None and (
+            exporter is None or self.sample_rate <= 0 or (self.sample_rate < 1 and self._random() >= self.sample_rate)
+        ):
+            token = _current_span.set(_NOT_SAMPLED)
+            try:
+                yield None
+            finally:
+                _current_span.reset(token)
+            return
+
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}",
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent.span_id if parent is not None else None,
+            started_at=time.time(),
+            attributes=attributes,
+        )
+        started_at = self._timer()
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = repr(exc)
+            raise
+        finally:
+            span.duration = self._timer() - started_at
+            _current_span.reset(token)
+            if exporter is not None:
+                exporter.export(span)
+
+
+tracer: typing.Final = Tracer()
+
+
+def traced(name: str | None = None) -> typing.Callable[[_F], _F]:
+    """Run every call of the function in a span, named after the function's qualified name by default.
+
+    Coroutine functions, async generator functions and plain functions are supported.
+    The span of an async generator, such as a FastAPI dependency with `yield`,
+    covers its code up to the first `yield` only.
+    """
+
+    def _traced(func: _F) -> _F:
+        span_name = name or func.__qualname__
+
+        if inspect.isasyncgenfunction(func):
+            enter = contextlib.asynccontextmanager(func)
+
+            @functools.wraps(func)
+            async def _async_gen_wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.AsyncIterator[typing.Any]:  # noqa: ANN401
+                async with contextlib.AsyncExitStack() as stack:
+                    with tracer.span(span_name):
+                        value = await stack.enter_async_context(enter(*args, **kwargs))
+                    yield value
+
+            return typing.cast(_F, _async_gen_wrapper)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def _async_wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:  # noqa: ANN401
+                with tracer.span(span_name):
+                    return await func(*args, **kwargs)
+
+            return typing.cast(_F, _async_wrapper)
+
+        @functools.wraps(func)
+        def _wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:  # noqa: ANN401
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+
+        return typing.cast(_F, _wrapper)
+
+    return _traced
+
+
+def trace_methods(cls: type[_T]) -> type[_T]:
+    """Trace the public coroutine methods the class defines, as `<class>.<method>`."""
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.iscoroutinefunction(value) and not hasattr(value, "__wrapped__"):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
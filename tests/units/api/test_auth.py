@@ -0,0 +1,86 @@
+import typing
+import uuid
+
+import fastapi
+import httpx
+import pytest
+
+from app import models
+from app.repository.db import DB
+from app.services import service
+from app.transport.http.api.public import bets
+
+
+@pytest.fixture(autouse=True)
+def _clear_users_cache() -> typing.Generator[None, None, None]:
+    service.users_cache.clear()
+    yield
+    service.users_cache.clear()
+
+
+async def test_missing_token(app: fastapi.FastAPI, client: httpx.AsyncClient) -> None:
+    resp = await client.get(app.url_path_for(bets.get_bets.__name__))
+    assert resp.status_code == fastapi.status.HTTP_401_UNAUTHORIZED
+    assert resp.json() == {"detail": "Missing bearer token.", "code": "authentication_error"}
+
+
+async def test_invalid_token(app: fastapi.FastAPI, client: httpx.AsyncClient) -> None:
+    resp = await client.get(
+        app.url_path_for(bets.get_bets.__name__),
+        headers={"Authorization": "Bearer not-a-jwt"},
+    )
+    assert resp.status_code == fastapi.status.HTTP_401_UNAUTHORIZED
+    assert resp.json() == {"detail": "Invalid bearer token.", "code": "authentication_error"}
+
+
+async def test_token_of_new_user(app: fastapi.FastAPI, client: httpx.AsyncClient) -> None:
+    new_user = models.User(id=uuid.uuid4(), email="new@mail.com")
+    token = service.auth_service.issue_token(user=new_user)
+
+    resp = await client.get(
+        app.url_path_for(bets.get_bets.__name__),
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    # Committed on creation, so cached at once
+    assert new_user.id in service.users_cache
+    service.users_cache.pop(new_user.id)
+
+
+async def test_token_of_existing_user_is_cached(
+    app: fastapi.FastAPI,
+    client: httpx.AsyncClient,
+    user: models.User,
+) -> None:
+    token = service.auth_service.issue_token(user=user)
+
+    for _ in range(2):
+        resp = await client.get(
+            app.url_path_for(bets.get_bets.__name__),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert resp.status_code == fastapi.status.HTTP_200_OK
+
+    cached_user = service.users_cache.get(user.id)
+    assert cached_user is not None
+    assert cached_user.email == user.email
+
+
+async def test_updated_user_is_evicted(
+    app: fastapi.FastAPI,
+    client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    token = service.auth_service.issue_token(user=user)
+    for _ in range(2):
+        await client.get(
+            app.url_path_for(bets.get_bets.__name__),
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    assert user.id in service.users_cache
+
+    user.is_superuser = True
+    await db.update(user)
+
+    assert user.id not in service.users_cache
@@ -1,11 +1,18 @@
+import csv
+import decimal
+import io
 import uuid
 
 import fastapi
 import httpx
+import orjson
 
 from app import models
+from app.dto import enums
 from app.repository.db import DB
+from app.services.bets import user_bets_invalidation
 from app.transport.http.api.public import bets
+from app.utils.tracing import RingBufferExporter
 
 
 async def test_make_bet_negative_amount(
@@ -96,13 +103,116 @@ async def test_make_bet(
     }
 
 
+async def test_make_bet_is_traced(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    user: models.User,  # noqa: ARG001
+    spans: RingBufferExporter,
+) -> None:
+    resp = await auth_client.post(
+        app.url_path_for(bets.make_bet.__name__),
+        json={"event_id": str(uuid.uuid4()), "amount": 1},
+    )
+    assert resp.status_code == fastapi.status.HTTP_201_CREATED
+
+    by_name = {span.name: span for span in spans.spans()}
+    root = by_name["http.request"]
+    assert root.attributes == {"method": "POST", "path": "/api/v1/bets", "status": 201, "route": "/api/v1/bets"}
+    assert by_name["BetsService.make_bet"].parent_id == root.span_id
+    assert by_name["BetsDB.create_bet"].parent_id == by_name["BetsService.make_bet"].span_id
+    assert by_name["EntityDB.create"].parent_id == by_name["BetsDB.create_bet"].span_id
+    assert {span.trace_id for span in spans.spans()} == {root.trace_id}
+
+
+async def test_make_bets(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    event_ids = [str(uuid.uuid4()) for _ in range(3)]
+    resp = await auth_client.post(
+        app.url_path_for(bets.make_bets.__name__),
+        json={"items": [{"event_id": event_id, "amount": 10.5} for event_id in event_ids]},
+    )
+    assert resp.status_code == fastapi.status.HTTP_201_CREATED
+
+    items = resp.json()["items"]
+    assert [item["bet"]["eventId"] for item in items] == event_ids
+    assert all(item["error"] is None for item in items)
+    assert {str(bet.id) for bet in await db.get_user_bets(user=user)} == {item["bet"]["id"] for item in items}
+
+
+async def test_make_bets_superuser(
+    app: fastapi.FastAPI,
+    superuser_auth_client: httpx.AsyncClient,
+) -> None:
+    resp = await superuser_auth_client.post(
+        app.url_path_for(bets.make_bets.__name__),
+        json={"items": [{"event_id": str(uuid.uuid4()), "amount": 1}]},
+    )
+    assert resp.status_code == fastapi.status.HTTP_201_CREATED
+    assert resp.json() == {
+        "items": [
+            {
+                "bet": None,
+                "error": {
+                    "code": "permission_scope_error",
+                    "detail": "Superusers are not allowed to make bets.",
+                },
+            },
+        ],
+    }
+
+
+async def test_make_bets_invalid_item(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    event_id = str(uuid.uuid4())
+    resp = await auth_client.post(
+        app.url_path_for(bets.make_bets.__name__),
+        json={
+            "items": [
+                {"event_id": event_id, "amount": 1},
+                {"event_id": str(uuid.uuid4()), "amount": -1},
+                {"event_id": str(uuid.uuid4()), "amount": "1.001"},
+            ],
+        },
+    )
+    assert resp.status_code == fastapi.status.HTTP_201_CREATED
+
+    created, negative, too_precise = resp.json()["items"]
+    assert created["bet"]["eventId"] == event_id
+    assert negative == {
+        "bet": None,
+        "error": {"code": "client_error", "detail": "Invalid amount: Input should be greater than or equal to 0."},
+    }
+    assert too_precise["error"]["code"] == "client_error"
+    assert [str(bet.event_id) for bet in await db.get_user_bets(user=user)] == [event_id]
+
+
+async def test_make_bets_malformed_item(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+) -> None:
+    resp = await auth_client.post(
+        app.url_path_for(bets.make_bets.__name__),
+        json={"items": [{"event_id": "not-a-uuid", "amount": 1}]},
+    )
+    assert resp.status_code == fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "('body', 'items', 0, 'event_id')" in resp.json()["detail"]
+
+
 async def test_get_bets_empty(
     app: fastapi.FastAPI,
     auth_client: httpx.AsyncClient,
 ) -> None:
     resp = await auth_client.get(app.url_path_for(bets.get_bets.__name__))
     assert resp.status_code == fastapi.status.HTTP_200_OK
-    assert resp.json() == {"items": [], "total": 0}
+    assert resp.json() == {"items": [], "total": None, "nextCursor": None}
 
 
 async def test_get_bets(
@@ -123,7 +233,7 @@ async def test_get_bets(
         )
         assert resp.status_code == fastapi.status.HTTP_201_CREATED
 
-    resp = await auth_client.get(app.url_path_for(bets.get_bets.__name__))
+    resp = await auth_client.get(app.url_path_for(bets.get_bets.__name__), params={"withTotal": True})
     assert resp.status_code == fastapi.status.HTTP_200_OK
 
     _bets = await db.get_user_bets(user=user)
@@ -134,4 +244,207 @@ async def test_get_bets(
             {"id": str(_bets[1].id), "status": "pending"},
         ],
         "total": 2,
+        "nextCursor": None,
+    }
+
+
+async def test_get_bets_pagination(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    for amount in ("10.00", "20.00", "30.00"):
+        await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(amount))
+    _bets = await db.get_user_bets(user=user)
+
+    resp = await auth_client.get(app.url_path_for(bets.get_bets.__name__), params={"limit": 2})
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    first_page = resp.json()
+    assert first_page["items"] == [
+        {"id": str(_bets[0].id), "status": "pending"},
+        {"id": str(_bets[1].id), "status": "pending"},
+    ]
+    assert first_page["nextCursor"] is not None
+
+    resp = await auth_client.get(
+        app.url_path_for(bets.get_bets.__name__),
+        params={"limit": 2, "cursor": first_page["nextCursor"]},
+    )
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.json() == {
+        "items": [{"id": str(_bets[2].id), "status": "pending"}],
+        "total": None,
+        "nextCursor": None,
     }
+
+
+async def test_get_bets_invalid_cursor(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+) -> None:
+    resp = await auth_client.get(app.url_path_for(bets.get_bets.__name__), params={"cursor": "garbage"})
+    assert resp.status_code == fastapi.status.HTTP_400_BAD_REQUEST
+    assert resp.json() == {"detail": "Invalid cursor.", "code": "client_error"}
+
+
+async def test_get_bets_is_cached_until_bets_change(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    url = app.url_path_for(bets.get_bets.__name__)
+    assert (await auth_client.get(url)).json()["items"] == []
+
+    # Written behind the service's back, the notification is never committed in tests
+    await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    assert (await auth_client.get(url)).json()["items"] == []
+
+    resp = await auth_client.post(
+        app.url_path_for(bets.make_bet.__name__),
+        json={"event_id": str(uuid.uuid4()), "amount": 1},
+    )
+    assert resp.status_code == fastapi.status.HTTP_201_CREATED
+    assert len((await auth_client.get(url)).json()["items"]) == 2  # noqa: PLR2004
+
+    await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    await user_bets_invalidation.invalidate([str(user.id)])
+    assert len((await auth_client.get(url)).json()["items"]) == 3  # noqa: PLR2004
+
+
+async def test_get_bets_not_modified(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    url = app.url_path_for(bets.get_bets.__name__)
+    await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+
+    resp = await auth_client.get(url)
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    etag = resp.headers["etag"]
+    assert resp.headers["last-modified"].endswith(" GMT")
+
+    resp = await auth_client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == fastapi.status.HTTP_304_NOT_MODIFIED
+    assert not resp.content
+    assert resp.headers["etag"] == etag
+
+    # Another page of the same bets is another representation
+    resp = await auth_client.get(url, params={"limit": 1}, headers={"If-None-Match": etag})
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.headers["etag"] != etag
+
+    resp = await auth_client.post(
+        app.url_path_for(bets.make_bet.__name__),
+        json={"event_id": str(uuid.uuid4()), "amount": 1},
+    )
+    assert resp.status_code == fastapi.status.HTTP_201_CREATED
+    resp = await auth_client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert len(resp.json()["items"]) == 2  # noqa: PLR2004
+    assert resp.headers["etag"] != etag
+
+
+async def test_get_bets_modified_by_a_status_change(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    url = app.url_path_for(bets.get_bets.__name__)
+    bet = await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    etag = (await auth_client.get(url)).headers["etag"]
+
+    await db.transition_bets_status([bet.id], enums.BetStatus.WON)
+    # Delivered by the invalidation bus once committed, which never happens in tests
+    await user_bets_invalidation.invalidate([str(user.id)])
+
+    resp = await auth_client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.json()["items"] == [{"id": str(bet.id), "status": "won"}]
+
+
+async def test_get_bets_not_modified_without_bets(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+) -> None:
+    url = app.url_path_for(bets.get_bets.__name__)
+    resp = await auth_client.get(url)
+    assert "last-modified" not in resp.headers
+
+    resp = await auth_client.get(url, headers={"If-None-Match": resp.headers["etag"]})
+    assert resp.status_code == fastapi.status.HTTP_304_NOT_MODIFIED
+
+
+async def test_export_bets_ndjson(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    for amount in ("10.00", "20.50"):
+        await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(amount))
+    _bets = await db.get_user_bets(user=user)
+
+    resp = await auth_client.get(app.url_path_for(bets.export_bets.__name__))
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    assert resp.headers["content-disposition"] == 'attachment; filename="bets.ndjson"'
+
+    assert [orjson.loads(line) for line in resp.text.splitlines()] == [
+        {
+            "id": str(bet.id),
+            "eventId": str(bet.event_id),
+            "amount": str(bet.amount),
+            "status": "pending",
+            "createdAt": bet.created_at.isoformat(),
+            "updatedAt": bet.updated_at.isoformat(),
+        }
+        for bet in _bets
+    ]
+
+
+async def test_export_bets_csv(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+    db: DB,
+    user: models.User,
+) -> None:
+    await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal("10.00"))
+    [bet] = await db.get_user_bets(user=user)
+
+    resp = await auth_client.get(app.url_path_for(bets.export_bets.__name__), params={"format": "csv"})
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.headers["content-type"] == "text/csv; charset=utf-8"
+
+    assert list(csv.reader(io.StringIO(resp.text))) == [
+        ["id", "eventId", "amount", "status", "createdAt", "updatedAt"],
+        [
+            str(bet.id),
+            str(bet.event_id),
+            "10.00",
+            "pending",
+            bet.created_at.isoformat(),
+            bet.updated_at.isoformat(),
+        ],
+    ]
+
+
+async def test_export_bets_empty(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+) -> None:
+    resp = await auth_client.get(app.url_path_for(bets.export_bets.__name__))
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert not resp.text
+
+
+async def test_export_bets_unknown_format(
+    app: fastapi.FastAPI,
+    auth_client: httpx.AsyncClient,
+) -> None:
+    resp = await auth_client.get(app.url_path_for(bets.export_bets.__name__), params={"format": "xml"})
+    assert resp.status_code == fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -5,8 +5,10 @@ import fastapi
 import httpx
 
 from app import models
-from app.dto import enums
+from app.dto import commands, enums
+from app.dto.entities.events import SettlementProgress
 from app.repository.db import DB
+from app.transport.http import dependencies
 from app.transport.http.api.public import events
 
 
@@ -41,6 +43,34 @@ async def test_superusers_can_update_events(
     }
 
 
+async def test_partially_settled_events_are_accepted(
+    app: fastapi.FastAPI,
+    superuser_auth_client: httpx.AsyncClient,
+) -> None:
+    class _PartialSettlement:
+        @staticmethod
+        async def update_event(*, command: commands.UpdateEvent) -> SettlementProgress:
+            return SettlementProgress(
+                event_id=command.event_id, status=command.status, total=3, settled=1, passes=3, remaining=2
+            )
+
+    event_id = str(uuid.uuid4())
+    app.dependency_overrides[dependencies.events_service] = _PartialSettlement
+    try:
+        resp = await superuser_auth_client.put(
+            app.url_path_for(events.update_event.__name__, event_id=event_id),
+            json={"status": enums.EventStatus.WON},
+        )
+    finally:
+        app.dependency_overrides.pop(dependencies.events_service)
+    assert resp.status_code == fastapi.status.HTTP_202_ACCEPTED
+    assert resp.json() == {
+        "id": event_id,
+        "status": "won",
+        "remaining": 2,
+    }
+
+
 async def test_update_event_bets(
     app: fastapi.FastAPI,
     superuser_auth_client: httpx.AsyncClient,
@@ -0,0 +1,42 @@
+import typing
+
+import fastapi
+import httpx
+import pytest
+
+from app.services.liveness_probe import LivenessProbeSrv
+from app.transport.http import dependencies
+from app.transport.http.api.service import health
+
+
+class Resource:
+    def __init__(self, *, alive: bool) -> None:
+        self.alive = alive
+
+    async def is_alive(self) -> bool:
+        return self.alive
+
+
+@pytest.fixture()
+async def liveness_probe_service(app: fastapi.FastAPI) -> typing.AsyncGenerator[LivenessProbeSrv, None]:
+    probe = LivenessProbeSrv(resources={"db": Resource(alive=True), "cache": Resource(alive=False)})
+    await probe.probe_all()
+    app.dependency_overrides[dependencies.liveness_probe_service] = lambda: probe
+    yield probe
+    app.dependency_overrides.pop(dependencies.liveness_probe_service)
+
+
+async def test_health(
+    app: fastapi.FastAPI,
+    client: httpx.AsyncClient,
+    liveness_probe_service: LivenessProbeSrv,  # noqa: ARG001
+) -> None:
+    resp = await client.get(app.url_path_for(health.get_api_status.__name__))
+    assert resp.status_code == fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+
+    resp = await client.get(app.url_path_for(health.get_service_status.__name__, service="db"))
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.json() == {"status": "ok"}
+
+    resp = await client.get(app.url_path_for(health.get_service_status.__name__, service="queue"))
+    assert resp.status_code == fastapi.status.HTTP_404_NOT_FOUND
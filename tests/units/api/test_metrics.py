@@ -0,0 +1,16 @@
+import fastapi
+import httpx
+
+from app.transport.http.api.service import health, metrics
+from app.utils.metrics import CONTENT_TYPE
+
+
+async def test_metrics(app: fastapi.FastAPI, client: httpx.AsyncClient) -> None:
+    await client.get(app.url_path_for(health.get_api_status.__name__))
+
+    resp = await client.get(app.url_path_for(metrics.get_metrics.__name__))
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.headers["Content-Type"] == CONTENT_TYPE
+    assert "# TYPE http_request_duration_seconds histogram" in resp.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="' in resp.text
+    assert "# TYPE db_pool_checked_out gauge" in resp.text
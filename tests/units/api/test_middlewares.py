@@ -0,0 +1,115 @@
+import typing
+
+import fastapi
+import httpx
+import pytest
+import sqlalchemy.ext.asyncio
+from loguru import logger
+
+from app.repository.db import QueryInstrumentation
+from app.transport.http.middlewares import QueryTimingMiddleware, RequestLoggingMiddleware
+
+
+@pytest.fixture()
+def records() -> typing.Generator[list[dict[str, typing.Any]], None, None]:
+    records: list[dict[str, typing.Any]] = []
+    handler_id = logger.add(
+        lambda message: records.append(message.record["extra"]),
+        filter=lambda record: record["message"] in {"api_request", "repeated_queries"},
+    )
+    yield records
+    logger.remove(handler_id)
+
+
+@pytest.fixture()
+def logged_client() -> httpx.AsyncClient:
+    _app = fastapi.FastAPI()
+
+    @_app.post("/items/{item_id}")
+    async def create_item(item_id: int, request: fastapi.Request) -> dict[str, int]:
+        return {"item_id": item_id, "size": len(await request.body())}
+
+    @_app.get("/fail")
+    async def fail() -> None:
+        raise RuntimeError
+
+    ticks = iter(range(100))
+    _app.add_middleware(RequestLoggingMiddleware, timer=lambda: float(next(ticks)))
+    return httpx.AsyncClient(
+        base_url="http://test",
+        transport=httpx.ASGITransport(app=_app, raise_app_exceptions=False),  # type: ignore[arg-type]
+    )
+
+
+async def test_request_is_logged(logged_client: httpx.AsyncClient, records: list[dict[str, typing.Any]]) -> None:
+    resp = await logged_client.post("/items/42?dry=1", content=b"12345")
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+
+    assert records == [
+        {
+            "path": "/items/{item_id}",
+            "url": "http://test/items/42?dry=1",
+            "http_method": "POST",
+            "http_status": fastapi.status.HTTP_200_OK,
+            "path_params": {"item_id": "42"},
+            "query_params": {"dry": "1"},
+            "request_size": 5,
+            "response_size": len(resp.content),
+            "time_to_first_byte": 1.0,
+            "process_time": 2.0,
+            "db_queries": None,
+            "db_time": None,
+        }
+    ]
+
+
+async def test_failed_request_is_logged(logged_client: httpx.AsyncClient, records: list[dict[str, typing.Any]]) -> None:
+    resp = await logged_client.get("/fail")
+    assert resp.status_code == fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    assert len(records) == 1
+    assert records[0]["path"] == "/fail"
+    assert records[0]["http_status"] == fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+async def test_unsampled_request_is_not_logged(records: list[dict[str, typing.Any]]) -> None:
+    _app = fastapi.FastAPI()
+
+    @_app.get("/health")
+    async def health() -> None:
+        return None
+
+    _app.add_middleware(RequestLoggingMiddleware, sampler=lambda route, status: route != "/health" or status != 200)  # noqa: PLR2004
+    client = httpx.AsyncClient(base_url="http://test", transport=httpx.ASGITransport(app=_app))  # type: ignore[arg-type]
+
+    assert (await client.get("/health")).status_code == fastapi.status.HTTP_200_OK
+    assert records == []
+    assert (await client.get("/missing")).status_code == fastapi.status.HTTP_404_NOT_FOUND
+    assert [(record["path"], record["http_status"]) for record in records] == [("", 404)]
+
+
+async def test_request_queries_are_reported(db_url: str, records: list[dict[str, typing.Any]]) -> None:
+    engine = sqlalchemy.ext.asyncio.create_async_engine(db_url, poolclass=sqlalchemy.pool.NullPool)
+    QueryInstrumentation().attach(engine)
+    _app = fastapi.FastAPI()
+
+    @_app.get("/items")
+    async def get_items() -> list[int]:
+        async with engine.connect() as connection:
+            return [(await connection.execute(sqlalchemy.text(f"SELECT {i % 2}"))).scalar_one() for i in range(5)]
+
+    _app.add_middleware(QueryTimingMiddleware, repeated_threshold=3)
+    _app.add_middleware(RequestLoggingMiddleware)
+    client = httpx.AsyncClient(base_url="http://test", transport=httpx.ASGITransport(app=_app))  # type: ignore[arg-type]
+
+    resp = await client.get("/items")
+    await engine.dispose()
+
+    assert resp.status_code == fastapi.status.HTTP_200_OK
+    assert resp.headers["Server-Timing"].startswith("db;dur=")
+    assert resp.headers["Server-Timing"].endswith(';desc="5 queries"')
+    repeated, logged = records
+    assert repeated["path"] == "/items"
+    assert repeated["statements"] == {"SELECT 0": 3}
+    assert logged["db_queries"] == 5  # noqa: PLR2004
+    assert logged["db_time"] > 0
@@ -0,0 +1,72 @@
+import uuid
+
+import arrow
+import fastapi
+import orjson
+import pytest
+
+from app.dto.entities.base import Cursor, Page
+from app.transport.http import schema
+from app.transport.http.api.public import bets
+from app.transport.http.responses import etag_matches, make_etag, RowsEncoder, validator_headers
+
+
+def test_rows_encoder_matches_the_schema() -> None:
+    encoder = RowsEncoder(schema.bets.Bet)
+    assert encoder.columns == ("id", "status")
+    bet_id = uuid.uuid4()
+    cursor = Cursor(created_at=arrow.get("2024-01-01T00:00:00+00:00"), id=bet_id)
+    rows = [(bet_id, "pending", "2024-01-01T00:00:00+00:00")]
+
+    resp = encoder.page(rows, total=1, next_cursor=cursor)
+
+    expected = Page[schema.bets.Bet].create(
+        [schema.bets.Bet(id=bet_id, status="pending")],  # type: ignore[arg-type]
+        total=1,
+        next_cursor=cursor,
+    )
+    assert orjson.loads(resp.body) == expected.model_dump(mode="json", by_alias=True)
+
+
+def test_rows_encoder_rejects_fields_pydantic_serializes() -> None:
+    with pytest.raises(TypeError, match="MakeBetResponse.amount"):
+        RowsEncoder(schema.bets.MakeBetResponse)
+
+
+def test_bets_page_schema_is_documented(app: fastapi.FastAPI) -> None:
+    operation = app.openapi()["paths"][app.url_path_for(bets.get_bets.__name__)]["get"]
+    assert operation["responses"]["200"]["content"]["application/json"]["schema"] == {
+        "$ref": "#/components/schemas/Page_Bet_",
+    }
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"xyz", W/"abc"', True),
+        ('W/"xyz"', False),
+    ],
+)
+def test_etag_matches(if_none_match: str | None, expected: bool) -> None:  # noqa: FBT001
+    assert etag_matches('W/"abc"', if_none_match) is expected
+
+
+def test_make_etag_depends_on_every_part() -> None:
+    assert make_etag(1, "a") == make_etag(1, "a")
+    assert make_etag(1, "a") != make_etag(2, "a")
+    assert make_etag(1, "a").startswith('W/"')
+
+
+def test_validator_headers() -> None:
+    headers = validator_headers('W/"abc"', arrow.get("2024-01-02T03:04:05.678+02:00"))
+    assert headers == {
+        "ETag": 'W/"abc"',
+        "Cache-Control": "private, no-cache",
+        "Last-Modified": "Tue, 02 Jan 2024 01:04:05 GMT",
+    }
+    assert "Last-Modified" not in validator_headers('W/"abc"')
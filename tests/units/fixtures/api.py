@@ -1,3 +1,4 @@
+import contextlib
 import typing
 
 import aioresponses
@@ -9,6 +10,8 @@ import sqlalchemy.ext.asyncio
 
 from app import models
 from app.asgi import get_app
+from app.repository.db import DB
+from app.repository.db.base import run_after_commit
 from app.transport.http import dependencies
 
 
@@ -22,8 +25,19 @@ async def _override_app_dependencies(
     app: fastapi.FastAPI,
     db_session: sqlalchemy.ext.asyncio.AsyncSession,
 ) -> typing.AsyncGenerator[None, None]:
+    @contextlib.asynccontextmanager
+    async def _db() -> typing.AsyncIterator[DB]:
+        yield DB(session=db_session)
+
+    async def _db_session() -> typing.AsyncIterator[sqlalchemy.ext.asyncio.AsyncSession]:
+        yield db_session
+        # NOTE: the test's transaction is rolled back in the end, requests act as if theirs committed
+        await run_after_commit(typing.cast(sqlalchemy.ext.asyncio.AsyncConnection, db_session.bind))
+
     try:
-        app.dependency_overrides[dependencies.db_session] = lambda: db_session
+        app.dependency_overrides[dependencies.db_session] = _db_session
+        app.dependency_overrides[dependencies.standalone_db_session] = lambda: db_session
+        app.dependency_overrides[dependencies.db_factory] = lambda: _db
         yield
     finally:
         app.dependency_overrides.clear()
@@ -1,7 +1,11 @@
+import typing
+
 import pytest
 
 from app.models import *  # noqa: F403
+from app.services.bets import BetsService
 from app.settings import Settings
+from app.utils.tracing import RingBufferExporter, tracer
 
 
 @pytest.fixture()
@@ -14,3 +18,24 @@ def settings() -> Settings:
     _settings = Settings()
     _settings.POSTGRES_NAME = "test_db"
     return _settings
+
+
+@pytest.fixture(autouse=True)
+async def _clear_user_bets_cache() -> None:
+    """Every test starts from an empty database, cached bets of the previous one must not leak.
+
+    Versions of the bets start over with the database, so the pages cached under them are cleared as well.
+    """
+    await BetsService.get_user_bets_version.cache_clear()
+    await BetsService.get_user_bets_rows.cache_clear()
+    await BetsService.count_user_bets.cache_clear()
+
+
+@pytest.fixture()
+def spans() -> typing.Generator[RingBufferExporter, None, None]:
+    """Record every trace while the test runs."""
+    exporter, sample_rate = tracer.exporter, tracer.sample_rate
+    spans = RingBufferExporter()
+    tracer.configure(exporter=spans, sample_rate=1)
+    yield spans
+    tracer.configure(exporter=exporter, sample_rate=sample_rate)
@@ -88,6 +88,7 @@ async def session_manager(
         manager = DatabaseSessionManager()
         manager._engine = engine  # noqa: SLF001
         manager._sessionmaker = sessionmaker  # noqa: SLF001
+        manager.instrument_pool()
         yield manager
     finally:
         await manager.close()
@@ -0,0 +1,67 @@
+import decimal
+import uuid
+
+import pytest
+
+from app import models
+from app.dto import enums
+from app.dto.exceptions import ClientError, NotFoundError
+from app.repository.db import DB
+
+
+async def test_settle_event_bets_walks_pending_bets_by_id(db: DB, user: models.User) -> None:
+    event_id = uuid.uuid4()
+    bets = await db.create_bets(user=user, bets=[(event_id, decimal.Decimal(1))] * 3)
+    other = await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    ids = sorted(bet.id for bet in bets)
+
+    first = await db.settle_event_bets(event_id=event_id, status=enums.EventStatus.WON, limit=2)
+    assert sorted(first) == ids[:2]
+
+    rest = await db.settle_event_bets(event_id=event_id, status=enums.EventStatus.WON, limit=2, after=max(first))
+    assert rest == ids[2:]
+
+    assert await db.settle_event_bets(event_id=event_id, status=enums.EventStatus.LOST, limit=2) == []
+    assert {bet.status for bet in await db.get_many(models.Bets, event_id=event_id)} == {enums.BetStatus.WON}
+    assert (await db.get(models.Bets, id=other.id)).status == enums.BetStatus.PENDING
+
+
+async def test_transition_bets_status_only_moves_pending_bets(db: DB, user: models.User) -> None:
+    event_id = uuid.uuid4()
+    pending, settled = await db.create_bets(user=user, bets=[(event_id, decimal.Decimal(1))] * 2)
+    await db.transition_bets_status([settled.id], enums.BetStatus.LOST)
+
+    transitioned = await db.transition_bets_status([pending.id, settled.id, uuid.uuid4()], enums.BetStatus.WON)
+
+    assert [bet.id for bet in transitioned] == [pending.id]
+    assert transitioned[0].status == enums.BetStatus.WON
+    assert (await db.get(models.Bets, id=settled.id)).status == enums.BetStatus.LOST
+
+
+async def test_update_bet_status(db: DB, user: models.User) -> None:
+    bet = await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+
+    updated = await db.update_bet_status(bet.id, enums.BetStatus.WON)
+    assert updated.status == enums.BetStatus.WON
+
+    with pytest.raises(ClientError, match="final bet"):
+        await db.update_bet_status(bet.id, enums.BetStatus.LOST)
+    with pytest.raises(NotFoundError):
+        await db.update_bet_status(uuid.uuid4(), enums.BetStatus.LOST)
+
+
+async def test_every_write_bumps_the_bets_version(db: DB, user: models.User) -> None:
+    assert await db.get_user_bets_version(user=user) == (0, None)
+
+    bet = await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    version, last_modified = await db.get_user_bets_version(user=user)
+    assert version == 1
+    assert last_modified is not None
+
+    await db.create_bets(user=user, bets=[(bet.event_id, decimal.Decimal(1))])
+    await db.transition_bets_status([bet.id], enums.BetStatus.WON)
+    await db.settle_event_bets(event_id=bet.event_id, status=enums.EventStatus.LOST, limit=10)
+    await db.transition_bets_status([bet.id], enums.BetStatus.LOST)
+
+    # The last transition matched no pending bet
+    assert (await db.get_user_bets_version(user=user))[0] == 4  # noqa: PLR2004
@@ -0,0 +1,64 @@
+import decimal
+import uuid
+
+import arrow
+import pytest
+
+from app import models
+from app.dto import enums
+from app.repository.cache import BoundedMemoryCache, MsgPackSerializer
+
+
+def test_msgpack_round_trips_entities() -> None:
+    serializer = MsgPackSerializer(models=(models.Bets,))
+    bet = models.Bets(
+        event_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        amount=decimal.Decimal("10.50"),
+        status=enums.BetStatus.WON,
+    )
+
+    loaded = serializer.loads(serializer.dumps((bet, arrow.get("2024-05-12T21:44:40+03:00"))))
+
+    assert loaded[0].model_dump() == bet.model_dump()
+    assert isinstance(loaded[0], models.Bets)
+    assert loaded[0].status is enums.BetStatus.WON
+    assert loaded[1] == arrow.get("2024-05-12T21:44:40+03:00")
+
+
+def test_msgpack_round_trips_enums() -> None:
+    serializer = MsgPackSerializer()
+
+    loaded = serializer.loads(serializer.dumps({"status": enums.BetStatus.WON, "statuses": [enums.BetType.TOTALS]}))
+
+    assert loaded["status"] is enums.BetStatus.WON
+    assert loaded["statuses"] == (enums.BetType.TOTALS,)
+    assert type(loaded["statuses"][0]) is enums.BetType
+    assert serializer.loads(serializer.dumps(enums.ResultValue.DRAW)) is enums.ResultValue.DRAW
+
+
+def test_msgpack_packs_other_builtin_subclasses_as_their_base() -> None:
+    class Label(str):
+        __slots__ = ()
+
+    serializer = MsgPackSerializer()
+
+    assert serializer.loads(serializer.dumps({"label": Label("a"), "pair": (1, 2.5)})) == {
+        "label": "a",
+        "pair": (1, 2.5),
+    }
+
+
+def test_msgpack_rejects_unregistered_models() -> None:
+    with pytest.raises(TypeError, match="Cannot serialize User"):
+        MsgPackSerializer().dumps(models.User(email="test@mail.com"))
+
+
+async def test_msgpack_backs_a_cache() -> None:
+    cache = BoundedMemoryCache(serializer=MsgPackSerializer())
+    value = {"id": uuid.uuid4(), "amount": decimal.Decimal("1.01")}
+
+    await cache.set("key", value)
+
+    assert await cache.get("key") == value
+    assert await cache.get("missing") is None
@@ -0,0 +1,163 @@
+import decimal
+import typing
+import uuid
+
+import pytest
+import sqlalchemy.event
+import sqlmodel
+
+from app import models
+from app.dto import enums
+from app.dto.exceptions import AlreadyExistsError, ClientError
+from app.repository.db import DB
+
+
+async def test_get_or_create(db: DB) -> None:
+    user_id = uuid.uuid4()
+
+    user, is_created = await db.get_or_create(models.User, id=user_id, email="new@mail.com")
+    assert is_created
+    assert user.id == user_id
+
+    same_user, is_created = await db.get_or_create(models.User, id=user_id, email="new@mail.com")
+    assert not is_created
+    assert same_user.id == user_id
+    assert same_user.created_at == user.created_at
+
+
+async def test_get_or_create_by_unique_column(db: DB, user: models.User) -> None:
+    same_user, is_created = await db.get_or_create(models.User, email=user.email)
+    assert not is_created
+    assert same_user.id == user.id
+
+
+async def test_get_or_create_conflicting_row_not_matching_filters(db: DB, user: models.User) -> None:
+    with pytest.raises(AlreadyExistsError):
+        await db.get_or_create(models.User, email=user.email, is_superuser=not user.is_superuser)
+    with pytest.raises(AlreadyExistsError):
+        await db.get_or_create(models.User, id=uuid.uuid4(), email=user.email)
+
+
+async def test_get_or_create_leaves_existing_row_untouched(db: DB, user: models.User) -> None:
+    xmin = sqlmodel.text("SELECT xmin::text FROM bts.users WHERE id = :id").bindparams(id=user.id)
+    before = (await db.session.execute(xmin)).scalar()
+
+    await db.get_or_create(models.User, id=user.id, email=user.email)
+
+    assert (await db.session.execute(xmin)).scalar() == before
+
+
+async def test_get_or_create_existing_row_in_one_statement(db: DB, user: models.User) -> None:
+    statements: list[str] = []
+
+    def _record(*args: typing.Any) -> None:  # noqa: ANN401
+        statements.append(args[2])
+
+    engine = db.session.bind.engine
+    sqlalchemy.event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        same_user, is_created = await db.get_or_create(models.User, id=user.id, email=user.email)
+    finally:
+        sqlalchemy.event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+    assert not is_created
+    assert same_user is user
+    assert len(statements) == 1
+
+
+async def test_get_or_create_without_unique_filters(db: DB) -> None:
+    with pytest.raises(ValueError, match="No unique constraint"):
+        await db.get_or_create(models.User, is_superuser=True)
+
+
+async def test_upsert_updates_existing_row(db: DB, user: models.User) -> None:
+    updated, is_created = await db.upsert(models.User(id=user.id, email=user.email, is_superuser=True))
+    assert not is_created
+    assert updated.is_superuser
+
+
+async def test_upsert_conflicting_unique_column(db: DB, user: models.User) -> None:
+    with pytest.raises(AlreadyExistsError):
+        await db.upsert(models.User(email=user.email))
+
+
+async def test_insert_ignore(db: DB, user: models.User) -> None:
+    assert await db.insert_ignore(models.User(id=user.id, email="other@mail.com")) is None
+
+    created = await db.insert_ignore(models.User(email="other@mail.com"))
+    assert created is not None
+    assert created.email == "other@mail.com"
+
+
+async def test_get_many_rows(db: DB, user: models.User) -> None:
+    bet = await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal("10.00"))
+
+    [row] = await db.get_many_rows(models.Bets, columns=["id", "status"], user_id=user.id)
+
+    assert row._asdict() == {"id": bet.id, "status": enums.BetStatus.PENDING}
+
+
+async def test_stream(db: DB, user: models.User) -> None:
+    for amount in ("10.00", "20.00", "30.00"):
+        await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(amount))
+
+    batches = [batch async for batch in db.stream(models.Bets, columns=["amount"], batch_size=2, user_id=user.id)]
+
+    assert [[row.amount for row in batch] for batch in batches] == [
+        [decimal.Decimal("30.00"), decimal.Decimal("20.00")],
+        [decimal.Decimal("10.00")],
+    ]
+
+
+async def test_get_many_rows_unknown_column(db: DB) -> None:
+    with pytest.raises(ValueError, match="Unknown columns"):
+        await db.get_many_rows(models.Bets, columns=["id", "password"])
+
+
+async def test_filters(db: DB, user: models.User, superuser: models.User) -> None:
+    assert await db.count(models.User, id_in=[user.id, superuser.id]) == len([user, superuser])
+    assert [u.id for u in await db.get_many(models.User, id_notin=[user.id])] == [superuser.id]
+    assert (await db.get(models.User, is_superuser_is=True)).id == superuser.id
+    assert (await db.get(models.User, email_ilike="TEST@%")).id == user.id
+    assert await db.count(models.User, created_at_gt=user.created_at, id_ne=superuser.id) == 0
+
+
+async def test_filters_reuse_compiled_expression(db: DB, user: models.User) -> None:
+    query, params = db._apply_filters(model=models.User, query=sqlmodel.select(models.User), email=user.email)  # noqa: SLF001
+    other_query, other_params = db._apply_filters(model=models.User, query=sqlmodel.select(models.User), email="x")  # noqa: SLF001
+    assert query.whereclause is other_query.whereclause
+    assert params != other_params
+
+
+async def test_unknown_filter(db: DB) -> None:
+    with pytest.raises(ValueError, match=r"Unknown filter name \(password_in\)"):
+        await db.get_many(models.User, password_in=["secret"])
+    with pytest.raises(ValueError, match=r"Unknown filter name \(email_between\)"):
+        await db.get_many(models.User, email_between=["a", "b"])
+
+
+async def test_create_many_isolated(db: DB, user: models.User) -> None:
+    existing = await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    conflicting = db.new_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(2))
+    conflicting.id = existing.id
+    new = db.new_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(3))
+
+    created, conflict = await db.create_many_isolated([new, conflicting])
+
+    assert isinstance(created, models.Bets)
+    assert created.id == new.id
+    assert isinstance(conflict, AlreadyExistsError)
+    assert (await db.get(models.Bets, id=existing.id)).amount == decimal.Decimal(1)
+
+
+async def test_create_many_isolated_falls_back_to_one_by_one(db: DB, user: models.User) -> None:
+    orphan = db.new_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    orphan.user_id = uuid.uuid4()
+    new = db.new_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(2))
+
+    failed, created = await db.create_many_isolated([orphan, new])
+
+    assert isinstance(failed, ClientError)
+    assert "bets_user_id_fkey" in failed.detail
+    assert isinstance(created, models.Bets)
+    assert [bet.id for bet in await db.get_user_bets(user=user)] == [new.id]
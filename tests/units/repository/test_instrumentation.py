@@ -0,0 +1,58 @@
+import typing
+
+import pytest
+import sqlalchemy.ext.asyncio
+from loguru import logger
+
+from app.repository.db import QueryInstrumentation, track_queries
+
+
+@pytest.fixture()
+async def instrumented_engine(db_url: str) -> typing.AsyncGenerator[sqlalchemy.ext.asyncio.AsyncEngine, None]:
+    engine = sqlalchemy.ext.asyncio.create_async_engine(db_url, poolclass=sqlalchemy.pool.NullPool)
+    ticks = iter(range(100))
+    QueryInstrumentation(slow_threshold=2, timer=lambda: float(next(ticks) ** 2)).attach(engine)
+    yield engine
+    await engine.dispose()
+
+
+async def test_queries_are_tracked(instrumented_engine: sqlalchemy.ext.asyncio.AsyncEngine) -> None:
+    slow: list[str] = []
+    handler_id = logger.add(
+        lambda message: slow.append(message.record["extra"]["statement"]),
+        filter=lambda record: record["message"] == "slow_query",
+    )
+    with track_queries() as stats:
+        async with instrumented_engine.connect() as connection:
+            for value in range(3):
+                await connection.execute(sqlalchemy.text("SELECT :value"), {"value": str(value)})
+            await connection.execute(sqlalchemy.text("SELECT 1"))
+    logger.remove(handler_id)
+
+    # Durations are 1, 5, 9 and 13 seconds on the fake clock
+    assert stats.count == 4  # noqa: PLR2004
+    assert stats.total == 28  # noqa: PLR2004
+    assert stats.slowest == 13  # noqa: PLR2004
+    assert stats.slowest_statement == "SELECT 1"
+    assert stats.repeated(3) == {"SELECT $1": 3}
+    assert slow == ["SELECT $1", "SELECT $1", "SELECT 1"]
+
+
+async def test_queries_outside_tracking_are_not_recorded(
+    instrumented_engine: sqlalchemy.ext.asyncio.AsyncEngine,
+) -> None:
+    async with instrumented_engine.connect() as connection:
+        await connection.execute(sqlalchemy.text("SELECT 1"))
+    with track_queries() as stats:
+        pass
+    assert stats.count == 0
+
+
+async def test_failed_queries_do_not_skew_timings(instrumented_engine: sqlalchemy.ext.asyncio.AsyncEngine) -> None:
+    with track_queries() as stats:
+        async with instrumented_engine.connect() as connection:
+            with pytest.raises(sqlalchemy.exc.DBAPIError):
+                await connection.execute(sqlalchemy.text("SELECT 1/0"))
+            await connection.rollback()
+            await connection.execute(sqlalchemy.text("SELECT 1"))
+    assert stats.count == 1
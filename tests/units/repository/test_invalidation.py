@@ -0,0 +1,68 @@
+import asyncio
+import typing
+
+from app.repository.cache import InvalidationBus
+from app.repository.cache.invalidation import decode_payload, encode_payloads
+from app.repository.db import DatabaseSessionManager, DB
+
+
+class Handler:
+    def __init__(self) -> None:
+        self.keys: list[str] = []
+        self.clears = 0
+        self.received = asyncio.Event()
+
+    async def invalidate(self, keys: typing.Sequence[str]) -> None:
+        self.keys.extend(keys)
+        self.received.set()
+
+    async def clear(self) -> None:
+        self.clears += 1
+
+
+def test_payloads_fit_notify_limit() -> None:
+    keys = [f"{i:036d}" for i in range(500)]
+
+    payloads = encode_payloads("user_bets", [*keys, keys[0]])
+
+    assert len(payloads) > 1
+    assert all(len(payload) < 8000 for payload in payloads)  # noqa: PLR2004
+    decoded = [decode_payload(payload) for payload in payloads]
+    assert {topic for topic, _ in decoded} == {"user_bets"}
+    assert [key for _, chunk in decoded for key in chunk] == keys
+
+
+async def test_dispatch_reaches_topic_handlers() -> None:
+    bus = InvalidationBus(dsn="postgresql://unused")
+    handler, other = Handler(), Handler()
+    bus.subscribe("user_bets", handler)
+    bus.subscribe("users", other)
+
+    await bus.dispatch("user_bets|a,b")
+
+    assert handler.keys == ["a", "b"]
+    assert other.keys == []
+
+
+async def test_committed_notifications_are_dispatched(
+    sync_db_url: str,
+    session_manager: DatabaseSessionManager,
+) -> None:
+    bus = InvalidationBus(dsn=sync_db_url, reconnect_delay=0.01)
+    handler = Handler()
+    bus.subscribe("user_bets", handler)
+    bus.start()
+    try:
+        async with asyncio.timeout(5):
+            while not handler.clears:
+                await asyncio.sleep(0.01)
+
+            async with session_manager.session() as session:
+                await DB(session).publish_invalidation("user_bets", ["a"])
+                await session.commit()
+
+            await handler.received.wait()
+    finally:
+        await bus.stop()
+
+    assert handler.keys == ["a"]
@@ -0,0 +1,87 @@
+from app.repository.cache import BoundedMemoryCache
+from tests.units.utils.test_memory import FakeTimer
+
+
+async def test_lru_evicts_least_recently_used() -> None:
+    cache = BoundedMemoryCache(max_entries=2)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    assert await cache.get("a") == 1
+
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3  # noqa: PLR2004
+    assert cache.stats().evictions == 1
+
+
+async def test_lfu_evicts_least_frequently_used() -> None:
+    cache = BoundedMemoryCache(max_entries=2, eviction="lfu")
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    for _ in range(3):
+        await cache.get("a")
+    await cache.get("b")
+
+    await cache.set("c", 3)
+    await cache.get("c")
+    await cache.set("d", 4)
+
+    assert await cache.exists("a")
+    assert not await cache.exists("b")
+    assert not await cache.exists("c")
+    assert await cache.exists("d")
+
+
+async def test_max_bytes_bounds_resident_size() -> None:
+    max_bytes = 4096
+    cache = BoundedMemoryCache(max_entries=1000, max_bytes=max_bytes)
+    for i in range(100):
+        await cache.set(f"key-{i}", "x" * 200)
+
+    stats = cache.stats()
+    assert stats.size <= max_bytes
+    assert stats.entries < 100  # noqa: PLR2004
+    assert stats.evictions == 100 - stats.entries
+
+
+async def test_entries_larger_than_max_bytes_are_rejected() -> None:
+    max_bytes = 1024
+    cache = BoundedMemoryCache(max_bytes=max_bytes)
+    await cache.set("small", "x")
+    await cache.set("large", "x")
+
+    assert not await cache.set("large", "x" * max_bytes)
+
+    assert await cache.get("small") == "x"
+    assert await cache.get("large") is None
+    stats = cache.stats()
+    assert stats.rejections == 1
+    assert stats.evictions == 0
+    assert stats.entries == 1
+
+
+async def test_entries_expire() -> None:
+    timer = FakeTimer()
+    cache = BoundedMemoryCache(timer=timer)
+    await cache.set("a", 1, ttl=10)
+
+    timer.now = 10
+
+    assert await cache.get("a") is None
+    stats = cache.stats()
+    assert stats.expirations == 1
+    assert stats.entries == 0
+    assert stats.size == 0
+
+
+async def test_stats_count_hits_and_misses() -> None:
+    cache = BoundedMemoryCache()
+    await cache.set("a", 1)
+    await cache.get("a")
+    await cache.get("b")
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (1, 1)
+    assert stats.hit_ratio == 0.5  # noqa: PLR2004
@@ -0,0 +1,88 @@
+import pytest
+import sqlalchemy
+
+from app.repository.db import DatabaseSessionManager, DB
+from app.services import service
+from app.transport.http import dependencies
+
+
+def test_session_manager_dependency_is_shared() -> None:
+    assert dependencies.session_manager() is service.sessionmanager
+    assert dependencies.session_manager() is dependencies.session_manager()
+
+
+async def test_pool_status_records_checkouts(session_manager: DatabaseSessionManager) -> None:
+    checkouts = session_manager.pool_status().checkouts
+
+    async with session_manager.connection() as connection:
+        await connection.execute(sqlalchemy.text("SELECT 1"))
+
+    status = session_manager.pool_status()
+    assert status.checkouts == checkouts + 1
+    assert status.checkout_wait_max >= 0
+    assert status.saturation == 0
+
+
+async def test_pool_status_records_lazy_checkouts(session_manager: DatabaseSessionManager) -> None:
+    checkouts = session_manager.pool_status().checkouts
+
+    async with session_manager.session() as session:
+        assert session_manager.pool_status().checkouts == checkouts
+        await session.execute(sqlalchemy.text("SELECT 1"))
+
+    assert session_manager.pool_status().checkouts == checkouts + 1
+
+
+async def test_pool_capacity_uses_the_configured_overflow(db_url: str) -> None:
+    manager = DatabaseSessionManager()
+    manager.initialize(url=db_url, pool_size=2, max_overflow=3)
+    try:
+        async with manager.session() as session:
+            await session.execute(sqlalchemy.text("SELECT 1"))
+
+        status = manager.pool_status()
+        assert status.capacity == 5  # noqa: PLR2004
+        assert status.checkouts == 1
+    finally:
+        await manager.close()
+
+
+async def test_is_alive_releases_its_connection(session_manager: DatabaseSessionManager) -> None:
+    assert await session_manager.is_alive()
+    assert session_manager.pool_status().checked_out == 0
+
+
+async def test_after_commit_waits_for_the_outer_transaction(session_manager: DatabaseSessionManager) -> None:
+    calls: list[str] = []
+
+    async def _called() -> None:
+        calls.append("called")
+
+    async with session_manager.bet() as bet, session_manager.session(conn=bet.connection) as session:
+        await DB(session=session).after_commit(_called)
+        await session.commit()
+        assert calls == []
+    assert calls == ["called"]
+
+    async def _fail() -> None:
+        async with session_manager.bet() as bet, session_manager.session(conn=bet.connection) as session:
+            await DB(session=session).after_commit(_called)
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        await _fail()
+    async with session_manager.bet() as bet, session_manager.session(conn=bet.connection) as session:
+        await DB(session=session).after_commit(_called)
+        await bet.rollback()
+    assert calls == ["called"]
+
+
+async def test_after_commit_of_a_standalone_session(session_manager: DatabaseSessionManager) -> None:
+    calls: list[str] = []
+
+    async def _called() -> None:
+        calls.append("called")
+
+    async with session_manager.session() as session:
+        await DB(session=session).after_commit(_called)
+    assert calls == ["called"]
@@ -0,0 +1,30 @@
+import contextlib
+import decimal
+import typing
+import uuid
+
+from app import models
+from app.repository.db import DB
+from app.services.bets import BetsService
+
+
+async def test_cached_loads_use_a_session_of_their_own(db: DB, user: models.User) -> None:
+    await db.create_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    sessions = 0
+
+    @contextlib.asynccontextmanager
+    async def storage() -> typing.AsyncIterator[DB]:
+        nonlocal sessions
+        sessions += 1
+        yield db
+
+    # The request's repository, which loads shared with other callers must not touch
+    service = BetsService(bets_storage=typing.cast(DB, object()), storage_factory=storage)
+
+    version, last_modified = await service.get_user_bets_version(user=user)
+    assert version == 1
+    assert last_modified is not None
+    rows, _ = await service.get_user_bets_rows(user=user, version=version, columns=["id"], limit=10)
+    assert len(rows) == 1
+    assert await service.count_user_bets(user=user, version=version) == 1
+    assert sessions == 3  # noqa: PLR2004
@@ -0,0 +1,75 @@
+import decimal
+import typing
+import uuid
+
+import sqlalchemy
+
+from app import models
+from app.dto import commands, enums
+from app.repository.db import DatabaseSessionManager, DB
+from app.services.events import EventsService
+
+
+async def test_update_event_settles_in_chunks(db: DB, user: models.User) -> None:
+    event_id = uuid.uuid4()
+    bets_count = 5
+    await db.create_bets(user=user, bets=[(event_id, decimal.Decimal(1))] * bets_count)
+
+    service = EventsService(events_storage=db, chunk_size=2)
+    progress = await service.update_event(
+        command=commands.UpdateEvent(event_id=event_id, status=enums.EventStatus.LOST)
+    )
+
+    assert progress.total == bets_count
+    assert progress.settled == bets_count
+    assert progress.chunks == len(range(0, bets_count, 2))
+    assert progress.passes == 1
+    assert progress.is_complete
+    assert await db.count_event_pending_bets(event_id=event_id) == 0
+
+
+async def test_update_event_resumes_pending_bets(db: DB, user: models.User) -> None:
+    event_id = uuid.uuid4()
+    await db.create_bets(user=user, bets=[(event_id, decimal.Decimal(1))] * 3)
+    await db.settle_event_bets(event_id=event_id, status=enums.EventStatus.WON, limit=2)
+
+    service = EventsService(events_storage=db, chunk_size=2)
+    progress = await service.update_event(command=commands.UpdateEvent(event_id=event_id, status=enums.EventStatus.WON))
+
+    assert progress.total == 1
+    assert progress.settled == 1
+    assert {bet.status for bet in await db.get_many(models.Bets, event_id=event_id)} == {enums.BetStatus.WON}
+
+
+async def test_update_event_reports_bets_left_locked(session_manager: DatabaseSessionManager) -> None:
+    event_id = uuid.uuid4()
+    bets = typing.cast(sqlalchemy.Table, models.Bets.__table__)  # type: ignore[attr-defined]
+    async with session_manager.session() as session:
+        user, _ = await DB(session=session).get_or_create(models.User, id=uuid.uuid4(), email="locked@mail.com")
+        await DB(session=session).create_bets(user=user, bets=[(event_id, decimal.Decimal(1))] * 3)
+        await session.commit()
+    try:
+        async with session_manager.connection() as locker:
+            # Held by a concurrent writer for the whole settlement
+            await locker.execute(
+                sqlalchemy.select(bets.c.id).where(bets.c.event_id == event_id).limit(1).with_for_update()
+            )
+            async with session_manager.session() as session:
+                service = EventsService(events_storage=DB(session=session), max_passes=2)
+                progress = await service.update_event(
+                    command=commands.UpdateEvent(event_id=event_id, status=enums.EventStatus.WON)
+                )
+            await locker.rollback()
+
+        assert progress.total == 3  # noqa: PLR2004
+        assert progress.settled == 2  # noqa: PLR2004
+        assert progress.passes == 2  # noqa: PLR2004
+        assert progress.remaining == 1
+        assert not progress.is_complete
+    finally:
+        async with session_manager.session() as session:
+            for model in (models.Bets, models.UserBetsVersion, models.User):
+                table = typing.cast(sqlalchemy.Table, model.__table__)  # type: ignore[attr-defined]
+                column = table.c.id if model is models.User else table.c.user_id
+                await session.execute(sqlalchemy.delete(table).where(column == user.id))
+            await session.commit()
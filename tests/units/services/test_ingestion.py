@@ -0,0 +1,55 @@
+import asyncio
+import contextlib
+import decimal
+import typing
+import uuid
+
+from app import models
+from app.dto.exceptions import AlreadyExistsError
+from app.repository.db import DB
+from app.services.ingestion import BetsIngestionQueue
+
+
+async def test_submit_coalesces_concurrent_bets(db: DB, user: models.User) -> None:
+    transactions = 0
+
+    @contextlib.asynccontextmanager
+    async def storage() -> typing.AsyncIterator[DB]:
+        nonlocal transactions
+        transactions += 1
+        yield db
+
+    queue = BetsIngestionQueue(storage=storage, max_batch=10, max_delay=0.05)
+    bets = [db.new_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(i + 1)) for i in range(5)]
+
+    created = await asyncio.gather(*(queue.submit(bet) for bet in bets))
+    await queue.close()
+
+    assert transactions == 1
+    assert [bet.id for bet in created] == [bet.id for bet in bets]
+    assert await db.count_user_bets(user=user) == len(bets)
+
+
+async def test_submit_isolates_failed_bets(user: models.User) -> None:
+    rejected = uuid.uuid4()
+
+    class _Storage:
+        @staticmethod
+        async def add_bets(bets: typing.Sequence[models.Bets]) -> list[models.Bets]:
+            if any(bet.event_id == rejected for bet in bets):
+                raise AlreadyExistsError("Bet already exists")
+            return list(bets)
+
+    @contextlib.asynccontextmanager
+    async def storage() -> typing.AsyncIterator[DB]:
+        yield typing.cast(DB, _Storage())
+
+    queue = BetsIngestionQueue(storage=storage, max_batch=10, max_delay=0.05)
+    good = DB.new_bet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1))
+    bad = DB.new_bet(user=user, event_id=rejected, amount=decimal.Decimal(1))
+
+    results = await asyncio.gather(queue.submit(good), queue.submit(bad), return_exceptions=True)
+    await queue.close()
+
+    assert results[0] is good
+    assert isinstance(results[1], AlreadyExistsError)
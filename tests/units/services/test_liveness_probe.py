@@ -0,0 +1,53 @@
+import asyncio
+
+from app.services.liveness_probe import LivenessProbeSrv
+from tests.units.utils.test_memory import FakeTimer
+
+
+class Resource:
+    def __init__(self, *, alive: bool = True, delay: float = 0) -> None:
+        self.alive = alive
+        self.delay = delay
+        self.probes = 0
+
+    async def is_alive(self) -> bool:
+        self.probes += 1
+        await asyncio.sleep(self.delay)
+        return self.alive
+
+
+async def test_statuses_are_read_from_memory() -> None:
+    db, cache = Resource(), Resource(alive=False)
+    probe = LivenessProbeSrv(resources={"db": db, "cache": cache})
+    await probe.probe_all()
+
+    assert probe.is_alive("db")
+    assert not probe.is_alive("cache")
+    assert not probe.all_alive()
+    assert (db.probes, cache.probes) == (1, 1)
+
+
+async def test_slow_probes_time_out_concurrently() -> None:
+    probe = LivenessProbeSrv(
+        resources={"slow": Resource(delay=1), "also_slow": Resource(delay=1)},
+        timeout=0.05,
+    )
+
+    async with asyncio.timeout(0.5):
+        await probe.probe_all()
+
+    status = probe.status("slow")
+    assert status is not None
+    assert not status.alive
+    assert status.error == "Timed out after 0.05s"
+
+
+async def test_outdated_status_counts_as_dead() -> None:
+    timer = FakeTimer()
+    probe = LivenessProbeSrv(resources={"db": Resource()}, interval=1, max_age=3, timer=timer)
+    await probe.probe_all()
+
+    timer.now = 3
+    assert probe.is_alive("db")
+    timer.now = 4
+    assert not probe.is_alive("db")
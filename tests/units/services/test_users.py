@@ -0,0 +1,84 @@
+import contextlib
+import decimal
+import time
+import typing
+import uuid
+
+import sqlalchemy
+
+from app import models
+from app.dto import commands
+from app.dto.entities.auth import TokenClaims
+from app.repository.db import DatabaseSessionManager, DB
+from app.repository.db.users import ALL_USERS
+from app.services import service
+from app.services.bets import BetsService
+from app.services.ingestion import BetsIngestionQueue
+from app.services.users import UsersCache, UsersCacheInvalidation, UsersService
+
+
+async def test_cached_user_is_resolved_without_a_session(user: models.User) -> None:
+    @contextlib.asynccontextmanager
+    async def storage() -> typing.AsyncIterator[DB]:
+        raise AssertionError("A session was opened")
+        yield
+
+    cache = UsersCache(maxsize=10, ttl=60)
+    cache.set(user.id, user)
+    users = UsersService(storage_factory=storage, cache=cache)
+
+    claims = TokenClaims(sub=user.id, email=user.email, exp=int(time.time()) + 60)
+    assert await users.get_user(claims=claims) is user
+
+
+async def test_upserted_users_are_evicted(db: DB, user: models.User) -> None:
+    service.users_cache.set(user.id, user)
+
+    await db.upsert(models.User(id=user.id, email=user.email, is_superuser=True))
+
+    assert user.id not in service.users_cache
+
+
+async def test_invalidation_evicts_users(user: models.User, superuser: models.User) -> None:
+    cache = UsersCache(maxsize=10, ttl=60)
+    invalidation = UsersCacheInvalidation(cache)
+    cache.set(user.id, user)
+    cache.set(superuser.id, superuser)
+
+    await invalidation.invalidate([str(user.id)])
+    assert user.id not in cache
+    assert superuser.id in cache
+
+    await invalidation.invalidate([ALL_USERS])
+    assert superuser.id not in cache
+
+
+async def test_new_user_places_first_bet_with_ingestion(session_manager: DatabaseSessionManager) -> None:
+    @contextlib.asynccontextmanager
+    async def storage() -> typing.AsyncIterator[DB]:
+        async with session_manager.session() as session:
+            yield DB(session=session)
+
+    users = UsersService(storage_factory=storage, cache=UsersCache(maxsize=10, ttl=60))
+    ingestion = BetsIngestionQueue(storage=storage, max_delay=0)
+    claims = TokenClaims(sub=uuid.uuid4(), email="first@mail.com", exp=int(time.time()) + 60)
+    try:
+        # The request transaction stays open while the flusher writes the bet in its own
+        async with session_manager.bet() as bet, session_manager.session(conn=bet.connection) as session:
+            user = await users.get_user(claims=claims)
+            service = BetsService(bets_storage=DB(session=session), ingestion=ingestion)
+            created = await service.make_bet(
+                command=commands.MakeBet(user=user, event_id=uuid.uuid4(), amount=decimal.Decimal(1)),
+            )
+            await bet.rollback()
+        await ingestion.close()
+
+        async with storage() as db:
+            assert [bet.id for bet in await db.get_user_bets(user=user)] == [created.id]
+    finally:
+        async with session_manager.session() as session:
+            for model in (models.Bets, models.UserBetsVersion, models.User):
+                table = typing.cast(sqlalchemy.Table, model.__table__)  # type: ignore[attr-defined]
+                column = table.c.id if model is models.User else table.c.user_id
+                await session.execute(sqlalchemy.delete(table).where(column == claims.sub))
+            await session.commit()
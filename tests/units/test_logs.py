@@ -0,0 +1,115 @@
+import io
+import os
+import pathlib
+import threading
+import typing
+
+import orjson
+import pytest
+from loguru import logger
+
+from app.logs import AccessLogSampler, AsyncJSONSink
+
+
+@pytest.fixture()
+def stream() -> io.BytesIO:
+    return io.BytesIO()
+
+
+def _log_to(sink: AsyncJSONSink) -> typing.Callable[[], None]:
+    handler_id = logger.add(sink, format="{message}", filter=lambda record: record["extra"].get("test") is True)
+    return lambda: logger.remove(handler_id)
+
+
+def _lines(stream: io.BytesIO) -> list[dict[str, typing.Any]]:
+    return [orjson.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_sink_writes_json_lines(stream: io.BytesIO) -> None:
+    sink = AsyncJSONSink(stream)
+    sink.start()
+    remove = _log_to(sink)
+    logger.info("api_request", test=True, http_status=200, path_params={"id": 1})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed", test=True)
+    remove()
+    sink.stop()
+
+    first, second = _lines(stream)
+    assert first["message"] == "api_request"
+    assert first["level"] == "INFO"
+    assert first["http_status"] == 200  # noqa: PLR2004
+    assert first["path_params"] == {"id": 1}
+    assert second["message"] == "failed"
+    assert "ValueError: boom" in second["exception"]
+
+
+def test_sink_drops_and_reports_records_when_full(stream: io.BytesIO) -> None:
+    sink = AsyncJSONSink(stream, maxsize=2)
+    remove = _log_to(sink)
+    for i in range(5):
+        logger.info("event", test=True, i=i)
+    remove()
+    assert sink.dropped == 3  # noqa: PLR2004
+
+    sink.start()
+    sink.stop()
+    lines = _lines(stream)
+    assert [line.get("i") for line in lines[:2]] == [0, 1]
+    assert lines[2]["message"] == "logs_dropped"
+    assert lines[2]["dropped"] == 3  # noqa: PLR2004
+
+
+def test_sink_writes_from_a_forked_process(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "logs.jsonl"
+    with path.open("ab") as stream:
+        sink = AsyncJSONSink(stream)
+        sink.start()
+        sink.put({"message": "parent"})
+        sink.stop()
+        sink.start()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            sink.start()
+            sink.put({"message": "child"})
+            sink.stop()
+            os._exit(0)
+        os.waitpid(pid, 0)
+        sink.stop()
+
+    assert [orjson.loads(line)["message"] for line in path.read_bytes().splitlines()] == ["parent", "child"]
+
+
+def test_sink_restarts_a_dead_writer(stream: io.BytesIO) -> None:
+    sink = AsyncJSONSink(stream, maxsize=1)
+    # What a child process inherits from a parent that started the writer
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    sink._thread = dead  # noqa: SLF001
+    sink.put({"message": "queued"})
+
+    # Returns at once instead of waiting on the full queue
+    sink.stop(timeout=0)
+    sink.start()
+    sink.stop()
+    assert [line["message"] for line in _lines(stream)] == ["queued"]
+
+
+def test_sampler_prefers_the_most_specific_rate() -> None:
+    sampler = AccessLogSampler({"/health": 0.0, "/health 5xx": 1.0, "2xx": 0.5}, default=0.25)
+    assert sampler.rate("/health", 200) == 0.0
+    assert sampler.rate("/health", 503) == 1.0
+    assert sampler.rate("/bets", 201) == 0.5  # noqa: PLR2004
+    assert sampler.rate("/bets", 404) == 0.25  # noqa: PLR2004
+
+
+def test_sampler_keeps_a_fraction_of_requests() -> None:
+    draws = iter([0.1, 0.9])
+    sampler = AccessLogSampler({"2xx": 0.5}, random_=lambda: next(draws))
+    assert sampler("/bets", 200)
+    assert not sampler("/bets", 200)
+    assert sampler("/bets", 500)
+    assert not AccessLogSampler(default=0)("/bets", 500)
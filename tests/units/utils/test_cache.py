@@ -0,0 +1,167 @@
+import asyncio
+
+import aiocache
+import pydantic
+import pytest
+
+from app.repository.cache import BoundedMemoryCache
+from app.settings import settings
+from app.utils import cache_options, cached, key_from_args, TwoTierCache
+from tests.units.utils.test_memory import FakeTimer
+
+
+class Loader:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await asyncio.sleep(0)
+        return self.calls
+
+
+@pytest.fixture()
+def timer() -> FakeTimer:
+    return FakeTimer()
+
+
+@pytest.fixture()
+def two_tier(timer: FakeTimer) -> TwoTierCache:
+    return TwoTierCache(shared=aiocache.SimpleMemoryCache(), ttl=10, stale_ttl=5, timer=timer)
+
+
+async def test_concurrent_misses_load_once(two_tier: TwoTierCache) -> None:
+    loader = Loader()
+
+    values = await asyncio.gather(*(two_tier.get_or_load("key", loader) for _ in range(10)))
+
+    assert values == [1] * 10
+    assert loader.calls == 1
+
+
+async def test_stale_value_is_served_while_refreshed(two_tier: TwoTierCache, timer: FakeTimer) -> None:
+    loader = Loader()
+    assert await two_tier.get_or_load("key", loader) == 1
+
+    timer.now = 12
+    assert await two_tier.get_or_load("key", loader) == 1
+    await asyncio.sleep(0.01)
+
+    assert loader.calls == 2  # noqa: PLR2004
+    assert await two_tier.get_or_load("key", loader) == 2  # noqa: PLR2004
+
+
+async def test_expired_value_is_reloaded(two_tier: TwoTierCache, timer: FakeTimer) -> None:
+    loader = Loader()
+    await two_tier.get_or_load("key", loader)
+
+    timer.now = 16
+
+    assert await two_tier.get_or_load("key", loader) == 2  # noqa: PLR2004
+
+
+async def test_shared_tier_is_read_on_local_miss(timer: FakeTimer) -> None:
+    shared = aiocache.SimpleMemoryCache()
+    loader = Loader()
+    await TwoTierCache(shared=shared, ttl=10, timer=timer).get_or_load("key", loader)
+
+    assert await TwoTierCache(shared=shared, ttl=10, timer=timer).get_or_load("key", loader) == 1
+    assert loader.calls == 1
+
+
+async def test_cached_ignores_self() -> None:
+    calls: list[int] = []
+
+    class Service:
+        @cached(ttl=10)
+        async def get(self, value: int) -> int:  # noqa: PLR6301
+            calls.append(value)
+            return value
+
+    assert await Service().get(1) == 1
+    assert await Service().get(1) == 1
+    assert calls == [1]
+
+
+async def test_invalidate_drops_one_key() -> None:
+    calls: list[int] = []
+
+    @cached(ttl=10, noself=False)
+    async def double(value: int) -> int:
+        calls.append(value)
+        return value * 2
+
+    await double(1)
+    await double(2)
+    await double.invalidate(value=1)
+    await double(1)
+    await double(2)
+
+    assert calls == [1, 2, 1]
+    stats = double.stats()
+    assert (stats.hits, stats.misses, stats.loads) == (1, 3, 3)
+
+
+async def test_cache_clear_and_bound_invalidate() -> None:
+    calls: list[int] = []
+
+    class Service:
+        @cached(ttl=10)
+        async def get(self, value: int) -> int:  # noqa: PLR6301
+            calls.append(value)
+            return value
+
+    service = Service()
+    await service.get(1)
+    await service.get.invalidate(1)
+    await service.get(1)
+    await Service.get.cache_clear()
+    await service.get(1)
+
+    assert calls == [1, 1, 1]
+
+
+def test_key_from_args_ignores_identity_hashed_arguments() -> None:
+    async def get_bets(session: object, user_id: int, limit: int = 10) -> None: ...  # noqa: ARG001
+
+    assert key_from_args(get_bets, object(), 1, noself=False) == key_from_args(
+        get_bets, object(), user_id=1, limit=10, noself=False
+    )
+    assert key_from_args(get_bets, object(), 1, noself=False) != key_from_args(get_bets, object(), 2, noself=False)
+    assert key_from_args(get_bets, object(), None, noself=False) != key_from_args(get_bets, object(), 0, noself=False)
+
+
+def test_key_from_args_keys_containers_by_items() -> None:
+    async def get_bets(session: object, ids: object) -> None: ...  # noqa: ARG001
+
+    def key(ids: object) -> str:
+        return key_from_args(get_bets, object(), ids, noself=False)
+
+    assert key([1]) == key([1])
+    assert key([1]) != key([2])
+    assert key([1]) != key((1,))
+    assert key({"a": [1], "b": 2}) == key({"b": 2, "a": [1]})
+    assert key({"a": 1}) != key({"a": 2})
+    assert key({2, 1}) == key({1, 2})
+
+
+def test_key_from_args_rejects_values_it_cannot_key() -> None:
+    class User(pydantic.BaseModel):
+        id: int
+
+    async def get_bets(user: object) -> None: ...  # noqa: ARG001
+
+    # Equal by their fields but unhashable, like `models.User`
+    with pytest.raises(TypeError, match="pass a key_builder"):
+        key_from_args(get_bets, User(id=1), noself=False)
+    with pytest.raises(TypeError, match="pass a key_builder"):
+        key_from_args(get_bets, [object()], noself=False)
+
+
+def test_cache_options() -> None:
+    assert cache_options(BoundedMemoryCache) == {
+        "max_entries": settings.CACHE_MAX_ENTRIES,
+        "max_bytes": settings.CACHE_MAX_BYTES,
+        "eviction": settings.CACHE_EVICTION,
+    }
+    assert cache_options(aiocache.SimpleMemoryCache) == {}
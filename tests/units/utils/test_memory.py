@@ -0,0 +1,45 @@
+from app.utils import TTLCache
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    maxsize = 2
+    cache = TTLCache[str, int](maxsize=maxsize, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 1)
+    assert cache.get("a") == 1
+
+    cache.set("c", 1)
+
+    assert len(cache) == maxsize
+    assert "b" not in cache
+    assert "a" in cache
+    assert "c" in cache
+
+
+def test_ttl_cache_expires_entries() -> None:
+    timer = FakeTimer()
+    cache = TTLCache[str, int](maxsize=2, ttl=10, timer=timer)
+    cache.set("a", 1)
+
+    timer.now = 9.9
+    assert cache.get("a") == 1
+
+    timer.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_pop() -> None:
+    cache = TTLCache[str, int](maxsize=2, ttl=10)
+    cache.set("a", 1)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
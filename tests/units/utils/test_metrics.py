@@ -0,0 +1,124 @@
+import os
+import pathlib
+import time
+
+import orjson
+import pytest
+
+from app.utils.metrics import merge_snapshots, MetricsAggregator, MetricsRegistry, render
+
+
+@pytest.fixture()
+def registry() -> MetricsRegistry:
+    return MetricsRegistry()
+
+
+def test_render(registry: MetricsRegistry) -> None:
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    connections = registry.gauge("connections", "Open connections.")
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    requests.labels('/a"b').inc()
+    requests.labels('/a"b').inc(2)
+    connections.set(3)
+    for value in (0.05, 0.1, 0.5, 5):
+        latency.observe(value)
+
+    assert registry.render() == (
+        "# HELP connections Open connections.\n"
+        "# TYPE connections gauge\n"
+        "connections 3.0\n"
+        "# HELP latency_seconds Latency.\n"
+        "# TYPE latency_seconds histogram\n"
+        'latency_seconds_bucket{le="0.1"} 2.0\n'
+        'latency_seconds_bucket{le="1.0"} 3.0\n'
+        'latency_seconds_bucket{le="+Inf"} 4.0\n'
+        "latency_seconds_sum 5.65\n"
+        "latency_seconds_count 4.0\n"
+        "# HELP requests_total Requests.\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{route="/a\\"b"} 3.0\n'
+    )
+
+
+def test_metrics_are_validated(registry: MetricsRegistry) -> None:
+    counter = registry.counter("requests_total", "Requests.", ("route",))
+    with pytest.raises(ValueError, match="expects labels"):
+        counter.inc()
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge("requests_total", "Requests.")
+
+
+def test_collect_callbacks_run_before_snapshots(registry: MetricsRegistry) -> None:
+    def _fail() -> None:
+        raise RuntimeError
+
+    connections = registry.gauge("connections", "Open connections.")
+    registry.on_collect(lambda: connections.set(7))
+    registry.on_collect(_fail)
+    assert registry.snapshot()["connections"]["samples"] == [[(), [7]]]
+
+
+def test_merge_snapshots(registry: MetricsRegistry) -> None:
+    registry.counter("requests_total", "Requests.", ("route",)).labels("/a").inc()
+    registry.gauge("connections", "Connections.").set(2)
+    registry.gauge("saturation", "Saturation.", aggregate="max").set(0.5)
+    registry.histogram("latency_seconds", "Latency.", buckets=(1,)).observe(0.5)
+    other = orjson.loads(orjson.dumps(registry.snapshot()))
+    other["requests_total"]["samples"].append([["/b"], [4]])
+    other["saturation"]["samples"] = [[[], [0.25]]]
+
+    merged = merge_snapshots([registry.snapshot(), other])
+    assert merged["requests_total"]["samples"] == [[("/a",), [2]], [("/b",), [4]]]
+    assert merged["connections"]["samples"] == [[(), [4]]]
+    assert merged["saturation"]["samples"] == [[(), [0.5]]]
+    assert merged["latency_seconds"]["samples"] == [[(), [2, 0, 1.0]]]
+    assert 'latency_seconds_bucket{le="1.0"} 2.0' in render(merged)
+
+
+async def test_aggregator_merges_live_workers(registry: MetricsRegistry, tmp_path: pathlib.Path) -> None:
+    registry.counter("requests_total", "Requests.").inc()
+    other = MetricsRegistry()
+    other.counter("requests_total", "Requests.").inc(2)
+    other.gauge("in_flight", "Requests in flight.").set(4)
+    (tmp_path / "1.json").write_bytes(orjson.dumps(other.snapshot()))
+    stale = tmp_path / "2.json"
+    stale.write_bytes(orjson.dumps(other.snapshot()))
+    os.utime(stale, (time.time() - 60, time.time() - 60))
+
+    aggregator = MetricsAggregator(registry, directory=str(tmp_path), interval=5)
+    rendered = await aggregator.render()
+    # The counter of the gone worker is kept, its gauge is dropped
+    assert "requests_total 5.0" in rendered
+    assert "in_flight 4.0" in rendered
+    assert not stale.exists()
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+    # Folded once, however many scrapes follow
+    assert "requests_total 5.0" in await aggregator.render()
+
+    aggregator.start()
+    await aggregator.stop()
+    assert not (tmp_path / f"{os.getpid()}.json").exists()
+
+
+async def test_aggregator_keeps_counters_of_stopped_workers(
+    registry: MetricsRegistry,
+    tmp_path: pathlib.Path,
+) -> None:
+    registry.counter("requests_total", "Requests.").inc(3)
+    registry.gauge("in_flight", "Requests in flight.").set(1)
+    aggregator = MetricsAggregator(registry, directory=str(tmp_path), interval=5)
+    aggregator.start()
+    await aggregator.stop()
+
+    successor = MetricsRegistry()
+    successor.counter("requests_total", "Requests.").inc()
+    successor.gauge("in_flight", "Requests in flight.")
+    rendered = await MetricsAggregator(successor, directory=str(tmp_path), interval=5).render()
+    assert "requests_total 4.0" in rendered
+    assert "in_flight 1.0" not in rendered
+
+
+async def test_aggregator_without_directory_renders_this_process(registry: MetricsRegistry) -> None:
+    registry.counter("requests_total", "Requests.").inc()
+    assert await MetricsAggregator(registry).render() == registry.render()
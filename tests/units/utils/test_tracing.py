@@ -0,0 +1,114 @@
+import pathlib
+import typing
+
+import orjson
+import pytest
+
+from app.utils.tracing import current_span, JSONFileExporter, RingBufferExporter, trace_methods, traced, Tracer, tracer
+
+
+def test_spans_nest(spans: RingBufferExporter) -> None:
+    with tracer.span("root", key="value") as root, tracer.span("child") as child:
+        assert current_span() is child
+
+    assert current_span() is None
+    assert root is not None
+    assert child is not None
+    assert spans.spans() == [child, root]
+    assert child.parent_id == root.span_id
+    assert child.trace_id == root.trace_id
+    assert root.parent_id is None
+    assert root.attributes == {"key": "value"}
+
+
+def test_span_records_errors(spans: RingBufferExporter) -> None:
+    with pytest.raises(ValueError, match="boom"), tracer.span("failing"):
+        raise ValueError("boom")
+    [span] = spans.spans()
+    assert span.error == "ValueError('boom')"
+
+
+def test_span_duration() -> None:
+    exporter = RingBufferExporter()
+    ticks = iter([1.0, 3.5])
+    with Tracer(exporter=exporter, timer=lambda: next(ticks)).span("timed"):
+        pass
+    [span] = exporter.spans()
+    assert span.duration == 2.5  # noqa: PLR2004
+
+
+def test_traces_are_sampled_at_the_root() -> None:
+    exporter = RingBufferExporter()
+    draws = iter([0.9, 0.1])
+    sampled = Tracer(exporter=exporter, sample_rate=0.5, random_=lambda: next(draws))
+    with sampled.span("dropped") as dropped, sampled.span("dropped_child") as dropped_child:
+        assert dropped is None
+        assert dropped_child is None
+    with sampled.span("kept") as kept:
+        assert kept is not None
+    assert [span.name for span in exporter.spans()] == ["kept"]
+
+    with Tracer(sample_rate=1).span("no_exporter") as span:
+        assert span is None
+
+
+async def test_traced(spans: RingBufferExporter) -> None:
+    @traced()
+    def square(a: int) -> int:
+        return a * a
+
+    @traced("custom")
+    async def square_async(a: int) -> int:
+        return square(a)
+
+    @traced()
+    async def dependency() -> typing.AsyncGenerator[int, None]:
+        with tracer.span("setup"):
+            pass
+        yield 1
+        with tracer.span("teardown"):
+            pass
+
+    assert await square_async(2) == 4  # noqa: PLR2004
+    generator = dependency()
+    assert await anext(generator) == 1
+    assert current_span() is None
+    with pytest.raises(StopAsyncIteration):
+        await anext(generator)
+
+    names = [(span.name, span.parent_id is None) for span in spans.spans()]
+    assert names == [
+        ("test_traced.<locals>.square", False),
+        ("custom", True),
+        ("setup", False),
+        ("test_traced.<locals>.dependency", True),
+        ("teardown", True),
+    ]
+
+
+async def test_trace_methods(spans: RingBufferExporter) -> None:
+    @trace_methods
+    class Repository:
+        async def get(self) -> int:  # noqa: PLR6301
+            return 1
+
+        async def _private(self) -> int:  # noqa: PLR6301
+            return 2
+
+    assert await Repository().get() == 1
+    assert await Repository()._private() == 2  # noqa: PLR2004, SLF001
+    assert [span.name for span in spans.spans()] == ["Repository.get"]
+
+
+def test_json_file_exporter(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / "traces.jsonl"
+    exporter = JSONFileExporter(str(path))
+    exporter.start()
+    with Tracer(exporter=exporter).span("root", key="value"):
+        pass
+    exporter.stop()
+
+    [line] = path.read_bytes().splitlines()
+    span = orjson.loads(line)
+    assert span["name"] == "root"
+    assert span["attributes"] == {"key": "value"}